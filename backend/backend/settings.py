@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'purchase_order.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -35,6 +36,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'purchase_order.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -69,6 +71,25 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database (purchase_order/routers.py). Each
+# host in DATABASE_REPLICA_HOSTS gets a copy of the default settings; set
+# DATABASE_REPLICA_SQLITE to a migrated SQLite file to use it as a local
+# stand-in. Tests read replicas through the default connection.
+for index, host in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica{index + 1}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+if os.environ.get('DATABASE_REPLICA_SQLITE'):
+    DATABASES['replica_local'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DATABASE_REPLICA_SQLITE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['purchase_order.routers.ReplicaRouter']
+# Upper bound on replication lag in seconds: a user's reads stay on the
+# primary this long after they write, and shared queue pages read from a
+# replica are cached no longer
+DATABASE_REPLICA_LAG = 5
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -100,13 +121,65 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'purchase_order.authentication.RoleTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Roles, role queue versions, shared queue pages and the read replica pins
+# live in the default cache (purchase_order/roles.py, queues.py, routers.py).
+# Local memory is private to a process, so it is only allowed with DEBUG and
+# without replicas (purchase_order/checks.py); set CACHE_DIR to share a
+# file-based cache between the workers of a node.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Threads the async views may use for signature verification at once
+# (purchase_order/verification.py); defaults to min(4, CPU count)
+CRYPTO_EXECUTOR_WORKERS = int(os.environ.get('CRYPTO_EXECUTOR_WORKERS', 0)) or None
+
+# Per-request SQL, crypto and rendering time (purchase_order/timing.py) is
+# returned in a Server-Timing header. Requests over either budget are logged
+# by purchase_order.middleware; None disables a budget.
+SERVER_TIMING_HEADER = True
+SERVER_TIMING_QUERY_BUDGET = 20
+SERVER_TIMING_LATENCY_BUDGET = 500  # milliseconds
+
+# Bearer token Prometheus must send to scrape /metrics (purchase_order/metrics.py);
+# unset, the endpoint is open with DEBUG and closed otherwise. Under gunicorn,
+# set PROMETHEUS_MULTIPROC_DIR to aggregate the metrics of all workers.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Seconds a cached page of a shared role queue is served (purchase_order/queues.py)
+QUEUE_CACHE_TIMEOUT = 60
+
+# Seconds a user's resolved role and groups stay cached (purchase_order/roles.py)
+ROLE_CACHE_TIMEOUT = 300
+
+# Buffered audit log writer (purchase_order/audit.py): flush once this many
+# entries are queued, or after this many seconds
+AUDIT_LOG_BATCH_SIZE = 100
+AUDIT_LOG_FLUSH_INTERVAL = 2.0
+
+# Reject workflow signatures that do not verify against the signer's
+# UserProfile.public_key, and keep verification results for this long
+# (purchase_order/verification.py)
+SIGNATURE_VERIFICATION_REQUIRED = True
+SIGNATURE_VERIFICATION_CACHE_TIMEOUT = 86400
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
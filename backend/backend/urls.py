@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
+from purchase_order.views import prometheus_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('purchase_order.urls')),
     path('api/token/', obtain_auth_token, name='api_token_auth'),
+    path('metrics', prometheus_metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""Load-compare the sync DRF views under WSGI against the async views under
+ASGI (purchase_order/async_views.py) with one worker each.
+
+CONCURRENCY clients each repeatedly list the supervisor queue, read an order
+and approve it with a real RSA-PSS signature. The WSGI worker serves them
+from THREADS threads, like gunicorn --threads, so the other clients queue
+for a thread. The ASGI worker serves all of them from one event loop, with
+signature checks on the bounded crypto executor. Latencies include queueing.
+
+SQLite answers in microseconds, so --db-latency adds a fixed delay to every
+query to model the network round trip of a database server. The benchmark
+builds its own throwaway SQLite database, so it never touches the
+configured DATABASES.
+
+Usage (from the backend directory):
+    python -m benchmarks.asgi_vs_wsgi [--concurrency N] [--threads N] [--iterations N] [--db-latency MS]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.query_plans import configure
+
+HOST = 'localhost'
+
+
+def populate(order_count):
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+    from purchase_order.models import UserProfile, PurchaseOrder
+    from utils.crypto import CryptoUtils
+
+    keys = CryptoUtils.generate_key_pair()
+    purchaser = User.objects.create(username='purchaser')
+    supervisor = User.objects.create(username='supervisor')
+    UserProfile.objects.create(user=purchaser, role='purchaser', public_key='')
+    UserProfile.objects.create(user=supervisor, role='supervisor', public_key=keys['public_key'])
+    token = Token.objects.create(user=supervisor).key
+
+    orders = PurchaseOrder.objects.bulk_create([
+        PurchaseOrder(
+            order_number=f'PO{i:09d}',
+            purchaser=purchaser,
+            description='Generated order',
+            amount='1234.50',
+            vendor='Acme',
+            encrypted_details='x' * 512
+        )
+        for i in range(order_count)
+    ])
+    # Clients sign ahead of time; only the server's verification is measured
+    approvals = []
+    for order in orders:
+        signing = order.signing_payload('approved')
+        approvals.append((order.id, json.dumps({
+            'signature': CryptoUtils.sign_data(signing.payload, keys['private_key']),
+            'hash': signing.digest
+        }).encode('utf-8')))
+    return token, approvals
+
+
+def add_db_latency(seconds):
+    """Delay every query on every connection by seconds"""
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+    connection_created.connect(install, weak=False)
+
+
+def client_requests(prefix, token, approvals):
+    """The (label, method, path, query, body) requests of one client"""
+    headers = {'authorization': f'Token {token}', 'content-type': 'application/json'}
+    for order_id, body in approvals:
+        yield headers, ('list', 'GET', f'{prefix}/', 'page_size=20', b'')
+        yield headers, ('detail', 'GET', f'{prefix}/{order_id}/', '', b'')
+        yield headers, ('approve', 'POST', f'{prefix}/{order_id}/approve/', '', body)
+
+
+def wsgi_call(handler, headers, method, path, query, body):
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': str(len(body)),
+        'CONTENT_TYPE': headers['content-type'],
+        'HTTP_AUTHORIZATION': headers['authorization'],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    response = handler(environ, lambda status_line, response_headers, exc_info=None: status.append(status_line))
+    b''.join(response)
+    # Closing the response fires request_finished, as a WSGI server would
+    response.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_call(application, headers, method, path, query, body):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode('ascii'),
+        'query_string': query.encode('ascii'),
+        'root_path': '',
+        'headers': [(name.encode('ascii'), value.encode('ascii')) for name, value in headers.items()]
+                   + [(b'host', HOST.encode('ascii')), (b'content-length', str(len(body)).encode('ascii'))],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+    received = False
+    status = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # The client never disconnects early
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def record(timings, errors, label, status, elapsed):
+    timings.setdefault(label, []).append(elapsed)
+    if status >= 400:
+        errors.append((label, status))
+
+
+def run_wsgi(token, approvals, concurrency, threads):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    worker = ThreadPoolExecutor(max_workers=threads)
+    timings = {}
+    errors = []
+
+    def client(client_approvals):
+        for headers, (label, method, path, query, body) in client_requests('/api/purchase-orders', token, client_approvals):
+            start = time.perf_counter()
+            status = worker.submit(wsgi_call, handler, headers, method, path, query, body).result()
+            record(timings, errors, label, status, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(client, [approvals[i::concurrency] for i in range(concurrency)]))
+    elapsed = time.perf_counter() - start
+    worker.shutdown()
+    return elapsed, timings, errors
+
+
+def run_asgi(token, approvals, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    application = ASGIHandler()
+    timings = {}
+    errors = []
+
+    async def client(client_approvals):
+        for headers, (label, method, path, query, body) in client_requests('/api/async/purchase-orders', token, client_approvals):
+            start = time.perf_counter()
+            status = await asgi_call(application, headers, method, path, query, body)
+            record(timings, errors, label, status, time.perf_counter() - start)
+
+    async def main():
+        await asyncio.gather(*(client(approvals[i::concurrency]) for i in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - start, timings, errors
+
+
+def report(label, elapsed, timings, errors):
+    requests = sum(len(samples) for samples in timings.values())
+    print(f"\n{label}: {requests / elapsed:,.0f} requests/s ({requests} requests in {elapsed:.2f}s, {len(errors)} errors)")
+    for name, samples in timings.items():
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"    {name:8} p50 {statistics.median(samples) * 1000:8.2f} ms    p95 {p95 * 1000:8.2f} ms")
+    if errors:
+        print(f"    first error: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=4, help="threads of the WSGI worker")
+    parser.add_argument('--iterations', type=int, default=10, help="approvals per client")
+    parser.add_argument('--db-latency', type=float, default=1.0, help="milliseconds added to every query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure(os.path.join(tmpdir, 'bench.sqlite3'))
+        from django.conf import settings
+        from django.core.management import call_command
+
+        settings.ALLOWED_HOSTS = [HOST]
+        call_command('migrate', verbosity=0)
+        orders = args.concurrency * args.iterations
+        print(f"Generating and signing {orders * 2} purchase orders...")
+        token, approvals = populate(orders * 2)
+        if args.db_latency:
+            add_db_latency(args.db_latency / 1000)
+
+        print(f"{args.concurrency} concurrent clients, {args.threads} WSGI threads, {args.db_latency} ms per query")
+        # The sync workflow views print debugging output
+        with contextlib.redirect_stdout(io.StringIO()):
+            wsgi = run_wsgi(token, approvals[:orders], args.concurrency, args.threads)
+        report("WSGI, sync views", *wsgi)
+        report("ASGI, async views", *run_asgi(token, approvals[orders:], args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
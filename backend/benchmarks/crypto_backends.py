@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Compare the rsa and cryptography backends of crypto_utils.CryptoUtils.
+
+encrypt_data and decrypt_data wrap their AES-GCM keys through cryptography
+whichever backend is selected, so the encrypt and decrypt rows time the
+backends' own PKCS#1 v1.5 encryption of one CHUNK, the unit of the legacy
+chunked format that decrypt_data still reads through the selected backend.
+
+Usage (from the backend directory):
+    python -m benchmarks.crypto_backends [--iterations N]
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crypto_utils import CryptoUtils, get_backend, BACKENDS
+
+ORDER = {
+    'order_number': 'BENCH001',
+    'purchaser': 'purchaser1',
+    'description': 'Benchmark order',
+    'amount': '1250.00',
+    'vendor': 'Acme Supplies',
+    'status': 'pending'
+}
+# One chunk of the legacy format: 200 characters of serialized details
+CHUNK = b'x' * 200
+
+def timed(func, iterations):
+    """Return the mean wall time of func in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+def run_backend(name, public_key, private_key, iterations):
+    CryptoUtils.set_backend(name)
+    backend = CryptoUtils.backend
+    signed = CryptoUtils.sign_data(ORDER, private_key)
+    signature = base64.b64decode(signed['signature'])
+    encrypted = backend.encrypt(CHUNK, public_key)
+
+    return {
+        'generate_key_pair': timed(CryptoUtils.generate_key_pair, max(1, iterations // 20)),
+        'sign_data': timed(lambda: CryptoUtils.sign_data(ORDER, private_key), iterations),
+        'verify_signature': timed(lambda: CryptoUtils.verify_signature(ORDER, signature, public_key), iterations),
+        'encrypt': timed(lambda: backend.encrypt(CHUNK, public_key), iterations),
+        'decrypt': timed(lambda: backend.decrypt(encrypted, private_key), max(1, iterations // 5)),
+    }, signed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    public_key, private_key = get_backend('cryptography').generate_key_pair(CryptoUtils.KEY_SIZE)
+    original = CryptoUtils.backend.name
+
+    results = {}
+    signatures = {}
+    try:
+        for name in BACKENDS:
+            results[name], signed = run_backend(name, public_key, private_key, args.iterations)
+            signatures[name] = signed['signature']
+    finally:
+        CryptoUtils.set_backend(original)
+
+    # PKCS#1 v1.5 signatures are deterministic, so both backends must agree byte for byte
+    if len(set(signatures.values())) != 1:
+        print("WARNING: backends produced different signatures")
+
+    names = list(BACKENDS)
+    print(f"{'operation':<20}" + ''.join(f"{name + ' (ms)':>20}" for name in names) + f"{'speedup':>10}")
+    for operation in results[names[0]]:
+        row = [results[name][operation] for name in names]
+        speedup = results['rsa'][operation] / results['cryptography'][operation]
+        print(f"{operation:<20}" + ''.join(f"{value:>20.3f}" for value in row) + f"{speedup:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
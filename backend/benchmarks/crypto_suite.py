@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""Micro-benchmark both CryptoUtils implementations against a JSON baseline.
+
+Covers utils.crypto (cryptography: RSA-PSS signatures, RSA-OAEP, AES-GCM,
+SHA-256) and crypto_utils with each of its backends (pure-Python rsa and
+cryptography: PKCS#1 v1.5 signatures, AES-GCM envelopes and the legacy
+chunked RSA format): key generation, sign, verify, encrypt and decrypt at
+several key and payload sizes, and the throughput of symmetric_encrypt,
+symmetric_decrypt and hash_data.
+
+Every case is timed like timeit: calls are batched to take at least
+--min-time seconds, and the best of --repeat batches is kept. The results
+are compared with --baseline, and cases that got more than --threshold
+percent slower are flagged, with exit status 1. Key generation searches for
+random primes, so its time varies too much to flag. Pure-Python key
+generation takes minutes at 4096 bits and only runs up to --rsa-keygen-max.
+
+Baselines are specific to the machine that recorded them; record one with
+--update-baseline before comparing on a new machine. On shared or virtual
+machines, runs differ by up to about 40%, hence the default threshold.
+
+Usage (from the backend directory):
+    python -m benchmarks.crypto_suite [--key-sizes N ...] [--payload-sizes N ...]
+        [--baseline PATH | --update-baseline] [--threshold PCT] [--json PATH]
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cryptography
+import rsa
+
+import crypto_utils
+from utils import crypto
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'crypto_suite.json')
+# RSA-OAEP-SHA256 fits 190 bytes into a 2048 bit key; this fits every size
+OAEP_PAYLOAD = 128
+# Chunk size of the legacy crypto_utils format, and the largest payload
+# benchmarked in it: every chunk is a separate RSA decryption
+LEGACY_CHUNK = 200
+LEGACY_MAX = 4096
+
+
+def payload(size):
+    return b'x' * size
+
+
+def details(size):
+    """A purchase order details dict that serializes to about size bytes"""
+    return {'details': 'x' * max(0, size - 15)}
+
+
+def legacy_encrypt(data, public_key, backend):
+    """The chunked format crypto_utils wrote before AES-GCM envelopes"""
+    text = json.dumps(data)
+    chunks = [text[i:i + LEGACY_CHUNK] for i in range(0, len(text), LEGACY_CHUNK)]
+    return json.dumps([base64.b64encode(backend.encrypt(chunk.encode(), public_key)).decode() for chunk in chunks])
+
+
+def utils_crypto_cases(key_sizes, payload_sizes):
+    """Yield (operation, key_size, payload_bytes, func, flag) for utils.crypto"""
+    CryptoUtils = crypto.CryptoUtils
+    for key_size in key_sizes:
+        yield 'generate_key_pair', key_size, None, lambda key_size=key_size: CryptoUtils.generate_key_pair(key_size), False
+        keys = CryptoUtils.generate_key_pair(key_size)
+        for size in payload_sizes:
+            data = payload(size)
+            signature = CryptoUtils.sign_data(data, keys['private_key'])
+            yield 'sign_data', key_size, size, lambda data=data, keys=keys: CryptoUtils.sign_data(data, keys['private_key']), True
+            yield 'verify_signature', key_size, size, (
+                lambda data=data, signature=signature, keys=keys: CryptoUtils.verify_signature(data, signature, keys['public_key'])
+            ), True
+        data = payload(OAEP_PAYLOAD)
+        ciphertext = CryptoUtils.encrypt_with_public_key(data, keys['public_key'])
+        yield 'encrypt_with_public_key', key_size, OAEP_PAYLOAD, (
+            lambda data=data, keys=keys: CryptoUtils.encrypt_with_public_key(data, keys['public_key'])
+        ), True
+        yield 'decrypt_with_private_key', key_size, OAEP_PAYLOAD, (
+            lambda ciphertext=ciphertext, keys=keys: CryptoUtils.decrypt_with_private_key(ciphertext, keys['private_key'])
+        ), True
+
+    key = os.urandom(32)
+    for size in payload_sizes:
+        # Decrypted payloads are decoded as text
+        data = payload(size).decode()
+        encrypted = CryptoUtils.symmetric_encrypt(data, key)
+        yield 'symmetric_encrypt', None, size, lambda data=data: CryptoUtils.symmetric_encrypt(data, key), True
+        yield 'symmetric_decrypt', None, size, lambda encrypted=encrypted: CryptoUtils.symmetric_decrypt(encrypted), True
+        yield 'hash_data', None, size, lambda data=payload(size): CryptoUtils.hash_data(data), True
+
+
+def crypto_utils_cases(backend_name, key_sizes, payload_sizes, rsa_keygen_max):
+    """Yield (operation, key_size, payload_bytes, func, flag) for crypto_utils with a backend"""
+    CryptoUtils = crypto_utils.CryptoUtils
+    backend = crypto_utils.get_backend(backend_name)
+    for key_size in key_sizes:
+        if backend_name != 'rsa' or key_size <= rsa_keygen_max:
+            yield 'generate_key_pair', key_size, None, lambda key_size=key_size: backend.generate_key_pair(key_size), False
+        # Generating keys with the rsa package takes too long to do it just for setup
+        public_key, private_key = crypto_utils.get_backend('cryptography').generate_key_pair(key_size)
+        for size in payload_sizes:
+            data = payload(size)
+            signature = base64.b64decode(CryptoUtils.sign_data(data, private_key)['signature'])
+            yield 'sign_data', key_size, size, lambda data=data, key=private_key: CryptoUtils.sign_data(data, key), True
+            yield 'verify_signature', key_size, size, (
+                lambda data=data, signature=signature, key=public_key: CryptoUtils.verify_signature(data, signature, key)
+            ), True
+            data = details(size)
+            encrypted = CryptoUtils.encrypt_data(data, public_key)
+            yield 'encrypt_data', key_size, size, lambda data=data, key=public_key: CryptoUtils.encrypt_data(data, key), True
+            yield 'decrypt_data', key_size, size, (
+                lambda encrypted=encrypted, key=private_key: CryptoUtils.decrypt_data(encrypted, key)
+            ), True
+            if size <= LEGACY_MAX:
+                legacy = legacy_encrypt(data, public_key, backend)
+                yield 'decrypt_data (legacy chunks)', key_size, size, (
+                    lambda legacy=legacy, key=private_key: CryptoUtils.decrypt_data(legacy, key)
+                ), True
+
+
+def suites(args):
+    """Yield (module, cases) for every implementation"""
+    yield 'utils.crypto', utils_crypto_cases(args.key_sizes, args.payload_sizes)
+    for backend_name in crypto_utils.BACKENDS:
+        yield f'crypto_utils[{backend_name}]', crypto_utils_cases(
+            backend_name, args.key_sizes, args.payload_sizes, args.rsa_keygen_max
+        )
+
+
+def case_id(module, operation, key_size, payload_bytes):
+    parts = [module, operation]
+    if key_size is not None:
+        parts.append(f'key={key_size}')
+    if payload_bytes is not None:
+        parts.append(f'payload={payload_bytes}')
+    return ' '.join(parts)
+
+
+def measure(func, repeat, min_time):
+    """Return the best and median seconds per call over repeat batches of at least min_time"""
+    timer = timeit.Timer(func)
+    number = 1
+    while min_time and timer.timeit(number) < min_time:
+        number *= 10 if number < 1000 else 2
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return min(times), statistics.median(times)
+
+
+def run(args, crypto_utils_backend):
+    results = {}
+    try:
+        for module, cases in suites(args):
+            if module.startswith('crypto_utils['):
+                # sign_data and friends dispatch through the selected backend
+                crypto_utils.CryptoUtils.set_backend(module[len('crypto_utils['):-1])
+            for operation, key_size, payload_bytes, func, flag in cases:
+                repeat = args.keygen_repeat if operation == 'generate_key_pair' else args.repeat
+                min_time = 0 if operation == 'generate_key_pair' else args.min_time
+                best, median = measure(func, repeat, min_time)
+                result = {
+                    'module': module,
+                    'operation': operation,
+                    'key_size': key_size,
+                    'payload_bytes': payload_bytes,
+                    'best_us': best * 1e6,
+                    'median_us': median * 1e6,
+                    'ops_per_s': 1 / best,
+                    'flag': flag,
+                }
+                if payload_bytes and key_size is None:
+                    result['mb_per_s'] = payload_bytes / best / 1e6
+                results[case_id(module, operation, key_size, payload_bytes)] = result
+                print(format_result(result), flush=True)
+    finally:
+        crypto_utils.CryptoUtils.set_backend(crypto_utils_backend)
+    return results
+
+
+def format_result(result):
+    line = (f"{result['module']:28} {result['operation']:28} {result['key_size'] or '':>5} "
+            f"{result['payload_bytes'] if result['payload_bytes'] is not None else '':>8} "
+            f"{result['best_us']:14,.1f} us {result['ops_per_s']:12,.1f}/s")
+    if 'mb_per_s' in result:
+        line += f" {result['mb_per_s']:10,.1f} MB/s"
+    return line
+
+
+def machine():
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cryptography': cryptography.__version__,
+        'rsa': rsa.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the cases that changed by more than threshold percent and return the flagged slowdowns"""
+    if baseline['machine'] != machine():
+        print("WARNING: the baseline was recorded on a different machine or library versions:")
+        print(f"    {baseline['machine']}")
+
+    slower = []
+    print(f"\nCompared with the baseline (threshold {threshold}%):")
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = (result['best_us'] - before['best_us']) / before['best_us'] * 100
+        if abs(change) <= threshold:
+            continue
+        flagged = change > 0 and result['flag']
+        if flagged:
+            slower.append(name)
+        print(f"    {name:80} {change:+7.1f}%{'    SLOWER' if flagged else ''}")
+    if not slower:
+        print("    no flagged slowdowns")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--key-sizes', type=int, nargs='+', default=[2048, 3072, 4096])
+    parser.add_argument('--payload-sizes', type=int, nargs='+', default=[256, 16384, 1048576],
+                        help="bytes signed, encrypted and hashed")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help="seconds per batch of calls")
+    parser.add_argument('--keygen-repeat', type=int, default=3)
+    parser.add_argument('--rsa-keygen-max', type=int, default=2048,
+                        help="largest key size the pure-Python backend generates")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help="record the results as the baseline")
+    parser.add_argument('--threshold', type=float, default=50.0, help="slowdown in percent that is flagged")
+    parser.add_argument('--json', help="also write the results to this path")
+    args = parser.parse_args()
+
+    print(f"{'module':28} {'operation':28} {'key':>5} {'payload':>8} {'best per call':>17} {'rate':>14}")
+    results = run(args, crypto_utils.CryptoUtils.backend.name)
+    report = {
+        'machine': machine(),
+        'settings': {'repeat': args.repeat, 'min_time': args.min_time, 'keygen_repeat': args.keygen_repeat},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            if compare(results, json.load(f), args.threshold):
+                sys.exit(1)
+    else:
+        print(f"\nNo baseline at {args.baseline}; record one with --update-baseline")
+
+
+if __name__ == "__main__":
+    main()
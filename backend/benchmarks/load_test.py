@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+"""Load-test a running server through the whole purchase order lifecycle.
+
+PURCHASERS simulated purchasers each create ITERATIONS orders and sign them.
+SUPERVISORS list the pending queue and approve the signed orders, and
+PURCHASING simulated purchasing department users list the approved queue and
+process them. Every simulated user runs in its own thread and keeps one
+HTTP/1.1 connection open for all of its requests. Users start spread over
+--ramp-up seconds, so their connections do not overflow the server's listen
+backlog. Clients sign with real RSA-PSS keys; the signing itself is not part
+of the measured latencies.
+
+The report gives the throughput and p50/p95/p99 latency of every endpoint.
+--json writes it as JSON, and --compare checks it against such a file from an
+earlier run, exiting with status 1 if an endpoint's p95 latency or throughput
+regressed by more than --threshold percent.
+
+Unless --no-setup is given, the simulated users and their tokens are first
+created in the database of DJANGO_SETTINGS_MODULE (default backend.settings),
+which must be the server's. Their keys and tokens are kept in --credentials,
+so later runs reuse them.
+
+The server must keep connections alive: runserver, uvicorn and gunicorn with
+--threads do, gunicorn's plain sync workers close every connection.
+
+Usage (from the backend directory, with the server running):
+    python -m benchmarks.load_test [--base-url URL] [--purchasers N] [--supervisors N]
+        [--purchasing N] [--iterations N] [--json PATH] [--compare PATH]
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import math
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.crypto import CryptoUtils
+
+API = '/api/purchase-orders'
+# Stored as is by the server, which never decrypts it
+ENCRYPTED_DETAILS = 'x' * 512
+
+
+def username(role, index):
+    return f'load_{role}_{index}'
+
+
+def load_credentials(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'keys': {}, 'tokens': {}}
+
+
+def provision(counts, credentials_path):
+    """Create the simulated users, one key pair per role, and save their credentials"""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+    from purchase_order.models import UserProfile
+
+    credentials = load_credentials(credentials_path)
+    changed = 0
+    for role, count in counts.items():
+        keys = credentials['keys'].get(role)
+        if keys is None:
+            keys = credentials['keys'][role] = CryptoUtils.generate_key_pair()
+        for i in range(count):
+            user, _ = User.objects.get_or_create(username=username(role, i))
+            profile, created = UserProfile.objects.get_or_create(
+                user=user, defaults={'role': role, 'public_key': keys['public_key']}
+            )
+            if not created and (profile.role, profile.public_key) != (role, keys['public_key']):
+                profile.role = role
+                profile.public_key = keys['public_key']
+                profile.save()
+                changed += 1
+            credentials['tokens'][user.username] = Token.objects.get_or_create(user=user)[0].key
+
+    with open(credentials_path, 'w') as f:
+        json.dump(credentials, f)
+    if changed:
+        print(f"Updated the keys of {changed} existing users; restart the server if it caches roles in memory")
+    return credentials
+
+
+class RequestFailed(Exception):
+    pass
+
+
+class Stats:
+    """Latencies and statuses of every request, shared by all simulated users"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = Counter()
+        self.first_errors = {}
+        self.connections = 0
+        self.completed = 0
+
+    def record(self, label, status, elapsed, error=None):
+        with self.lock:
+            self.latencies.setdefault(label, []).append(elapsed)
+            self.statuses.setdefault(label, Counter())[str(status)] += 1
+            if error is not None:
+                self.errors[label] += 1
+                self.first_errors.setdefault(label, error)
+
+    def connected(self):
+        with self.lock:
+            self.connections += 1
+
+    def complete(self):
+        with self.lock:
+            self.completed += 1
+
+
+class Client:
+    """A simulated user and its keep-alive connection to the server"""
+
+    def __init__(self, base_url, token, private_key, stats, timeout):
+        url = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.host = url.hostname
+        self.port = url.port
+        self.prefix = url.path.rstrip('/')
+        self.headers = {
+            'Authorization': f'Token {token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        }
+        self.private_key = private_key
+        self.stats = stats
+        self.timeout = timeout
+        self.connection = None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, label, method, path, body=None, expect=200):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        while True:
+            reused = self.connection is not None
+            if not reused:
+                self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+                self.stats.connected()
+            start = time.perf_counter()
+            try:
+                self.connection.request(method, self.prefix + path, body=data, headers=self.headers)
+                response = self.connection.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                self.close()
+                # The server closed the idle connection before reading the
+                # request; send it again on a new one, as HTTP clients do
+                if reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    continue
+                self.stats.record(label, 'error', time.perf_counter() - start, repr(e))
+                raise RequestFailed(label) from e
+            break
+
+        elapsed = time.perf_counter() - start
+        if response.will_close:
+            self.close()
+        if response.status != expect:
+            self.stats.record(label, response.status, elapsed, payload[:200].decode('utf-8', 'replace'))
+            raise RequestFailed(label)
+        self.stats.record(label, response.status, elapsed)
+        return json.loads(payload) if payload else None
+
+    def signed(self, order_id, target_status):
+        """Fetch the order's signing payload for target_status and sign it"""
+        signing = self.request('signing-payload', 'GET', f'{API}/{order_id}/signing-payload/?status={target_status}')
+        return {
+            'signature': CryptoUtils.sign_data(signing['payload'], self.private_key),
+            'hash': signing['digest'],
+        }
+
+    def transition(self, label, order_id, target_status):
+        self.request(label, 'POST', f'{API}/{order_id}/{label}/', self.signed(order_id, target_status))
+
+
+def delayed(delay, flow, *args):
+    time.sleep(delay)
+    flow(*args)
+
+
+def purchaser(client, iterations, signed):
+    for i in range(iterations):
+        try:
+            order = client.request('create', 'POST', f'{API}/', {
+                'description': f'Load test order {i}',
+                'amount': '1234.50',
+                'vendor': 'Acme',
+                'encrypted_details': ENCRYPTED_DETAILS,
+            }, expect=201)
+            client.transition('sign', order['id'], 'pending')
+        except RequestFailed:
+            continue
+        signed.put(order['id'])
+
+
+def supervisor(client, signed, approved):
+    while (order_id := signed.get()) is not None:
+        try:
+            client.request('list-pending', 'GET', f'{API}/?page_size=20')
+            client.transition('approve', order_id, 'approved')
+        except RequestFailed:
+            continue
+        approved.put(order_id)
+
+
+def purchasing(client, approved):
+    while (order_id := approved.get()) is not None:
+        try:
+            client.request('list-approved', 'GET', f'{API}/?page_size=20')
+            client.transition('process', order_id, 'processed')
+        except RequestFailed:
+            continue
+        client.stats.complete()
+
+
+def run(args, credentials):
+    """Run every simulated user to completion and return (elapsed seconds, stats)"""
+    stats = Stats()
+    counts = {'purchaser': args.purchasers, 'supervisor': args.supervisors, 'purchasing_dept': args.purchasing}
+    clients = {
+        role: [
+            Client(args.base_url, credentials['tokens'][username(role, i)],
+                   credentials['keys'][role]['private_key'], stats, args.timeout)
+            for i in range(count)
+        ]
+        for role, count in counts.items()
+    }
+    signed = queue.Queue()
+    approved = queue.Queue()
+
+    users = sum(counts.values())
+    delays = iter([args.ramp_up * i / users for i in range(users)])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        purchasers = [
+            pool.submit(delayed, next(delays), purchaser, client, args.iterations, signed)
+            for client in clients['purchaser']
+        ]
+        supervisors = [
+            pool.submit(delayed, next(delays), supervisor, client, signed, approved)
+            for client in clients['supervisor']
+        ]
+        processors = [
+            pool.submit(delayed, next(delays), purchasing, client, approved)
+            for client in clients['purchasing_dept']
+        ]
+        # Each stage ends once the one before it has handed over its last order
+        for stage, next_queue, next_stage in ((purchasers, signed, supervisors), (supervisors, approved, processors)):
+            for future in stage:
+                future.result()
+            for _ in next_stage:
+                next_queue.put(None)
+        for future in processors:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    for role_clients in clients.values():
+        for client in role_clients:
+            client.close()
+    return elapsed, stats
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of sorted samples"""
+    return samples[max(0, math.ceil(len(samples) * p / 100) - 1)]
+
+
+def summarize(args, elapsed, stats):
+    endpoints = {}
+    for label, samples in stats.latencies.items():
+        samples = sorted(samples)
+        endpoints[label] = {
+            'requests': len(samples),
+            'errors': stats.errors[label],
+            'throughput': len(samples) / elapsed,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p95_ms': percentile(samples, 95) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+            'mean_ms': statistics.fmean(samples) * 1000,
+            'max_ms': samples[-1] * 1000,
+            'statuses': dict(stats.statuses[label]),
+            'first_error': stats.first_errors.get(label),
+        }
+    requests = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'base_url': args.base_url,
+        'users': {'purchaser': args.purchasers, 'supervisor': args.supervisors, 'purchasing_dept': args.purchasing},
+        'iterations': args.iterations,
+        'elapsed_s': elapsed,
+        'requests': requests,
+        'errors': sum(stats.errors.values()),
+        'throughput': requests / elapsed,
+        'connections': stats.connections,
+        'lifecycles': {
+            'started': args.purchasers * args.iterations,
+            'completed': stats.completed,
+            'per_second': stats.completed / elapsed,
+        },
+        'endpoints': endpoints,
+    }
+
+
+def report(summary):
+    lifecycles = summary['lifecycles']
+    print(f"\n{summary['requests']} requests in {summary['elapsed_s']:.2f}s: {summary['throughput']:,.0f} requests/s, "
+          f"{summary['errors']} errors, {summary['connections']} connections")
+    print(f"{lifecycles['completed']}/{lifecycles['started']} orders processed: {lifecycles['per_second']:,.1f} orders/s")
+    print(f"\n    {'endpoint':16} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, endpoint in summary['endpoints'].items():
+        print(f"    {label:16} {endpoint['requests']:8} {endpoint['errors']:6} {endpoint['throughput']:8.1f} "
+              f"{endpoint['p50_ms']:8.2f} {endpoint['p95_ms']:8.2f} {endpoint['p99_ms']:8.2f}")
+    for label, endpoint in summary['endpoints'].items():
+        if endpoint['first_error']:
+            print(f"    first {label} error: {endpoint['first_error']}")
+
+
+def compare(summary, baseline, threshold):
+    """Print the change from baseline of each endpoint and return the endpoints that regressed"""
+    def change(current, before):
+        return (current - before) / before * 100 if before else 0.0
+
+    regressed = []
+    print(f"\nCompared with the baseline (regression threshold {threshold}%):")
+    for label, endpoint in summary['endpoints'].items():
+        before = baseline['endpoints'].get(label)
+        if before is None:
+            continue
+        p95 = change(endpoint['p95_ms'], before['p95_ms'])
+        throughput = change(endpoint['throughput'], before['throughput'])
+        worse = p95 > threshold or throughput < -threshold
+        if worse:
+            regressed.append(label)
+        print(f"    {label:16} p95 {p95:+7.1f}%    req/s {throughput:+7.1f}%{'    REGRESSED' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--purchasers', type=int, default=100)
+    parser.add_argument('--supervisors', type=int, default=50)
+    parser.add_argument('--purchasing', type=int, default=50, help="purchasing department users")
+    parser.add_argument('--iterations', type=int, default=5, help="orders created by each purchaser")
+    parser.add_argument('--ramp-up', type=float, default=5.0, help="seconds over which the users start")
+    parser.add_argument('--timeout', type=float, default=60.0, help="seconds to wait for a response")
+    parser.add_argument('--credentials', default=os.path.join(tempfile.gettempdir(), 'purchase_order_load_test.json'),
+                        help="where the simulated users' keys and tokens are kept")
+    parser.add_argument('--no-setup', action='store_true', help="use --credentials as is, without touching the database")
+    parser.add_argument('--json', help="write the report as JSON to this path, or - for stdout")
+    parser.add_argument('--compare', help="a --json report of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    # With the JSON on stdout, the readable report goes to stderr
+    with contextlib.redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        counts = {'purchaser': args.purchasers, 'supervisor': args.supervisors, 'purchasing_dept': args.purchasing}
+        if args.no_setup:
+            credentials = load_credentials(args.credentials)
+        else:
+            print(f"Setting up {sum(counts.values())} users...")
+            credentials = provision(counts, args.credentials)
+
+        print(f"{args.purchasers} purchasers creating {args.iterations} orders each, {args.supervisors} supervisors, "
+              f"{args.purchasing} purchasing users against {args.base_url}")
+        summary = summarize(args, *run(args, credentials))
+        report(summary)
+        regressed = []
+        if args.compare:
+            with open(args.compare) as f:
+                regressed = compare(summary, json.load(f), args.threshold)
+
+    if args.json == '-':
+        json.dump(summary, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if regressed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""Show query plans and timings of the hot workflow queries before and after
+the purchase_order workflow indexes (migration 0002).
+
+The benchmark builds its own throwaway SQLite database, so it never touches
+the configured DATABASES. Rows are written and read through the historical
+models of each migration state, since the current models have columns that
+do not exist yet at either point.
+
+Usage (from the backend directory):
+    python -m benchmarks.query_plans [--orders N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BEFORE = '0001_initial'
+AFTER = '0002_workflow_indexes'
+
+
+def configure(db_path):
+    import django
+    from django.conf import settings
+    from backend import settings as project_settings
+
+    values = {name: getattr(project_settings, name) for name in dir(project_settings) if name.isupper()}
+    values['DATABASES'] = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': db_path}}
+    settings.configure(**values)
+    django.setup()
+
+
+def models_at(migration):
+    """Return the historical models of the project as of a purchase_order migration"""
+    from django.db import connection
+    from django.db.migrations.loader import MigrationLoader
+
+    return MigrationLoader(connection).project_state(('purchase_order', migration)).apps
+
+
+def populate(apps, order_count):
+    from django.utils import timezone
+    from datetime import timedelta
+
+    User = apps.get_model('auth', 'User')
+    PurchaseOrder = apps.get_model('purchase_order', 'PurchaseOrder')
+    Signature = apps.get_model('purchase_order', 'Signature')
+    AuditLog = apps.get_model('purchase_order', 'AuditLog')
+
+    rng = random.Random(1372)
+    purchasers = User.objects.bulk_create([User(username=f'purchaser{i}') for i in range(200)])
+    supervisor = User.objects.create(username='supervisor1')
+    statuses = ['pending'] * 5 + ['approved'] * 15 + ['processed'] * 75 + ['rejected'] * 5
+    start = timezone.now() - timedelta(days=365)
+
+    batch = 5000
+    for offset in range(0, order_count, batch):
+        orders = PurchaseOrder.objects.bulk_create([
+            PurchaseOrder(
+                order_number=f'PO{offset + i:09d}',
+                purchaser=rng.choice(purchasers),
+                description='Generated order',
+                amount='100.00',
+                vendor='Acme',
+                encrypted_details='{}',
+                status=rng.choice(statuses)
+            )
+            for i in range(min(batch, order_count - offset))
+        ])
+        # bulk_create skips auto_now_add overrides, so spread created_at afterwards
+        for order in orders:
+            order.created_at = start + timedelta(seconds=rng.randrange(365 * 86400))
+        PurchaseOrder.objects.bulk_update(orders, ['created_at'])
+
+        Signature.objects.bulk_create(
+            [Signature(purchase_order=order, signer=order.purchaser, signature='sig', hash='hash') for order in orders]
+            + [Signature(purchase_order=order, signer=supervisor, signature='sig', hash='hash')
+               for order in orders if order.status != 'pending']
+        )
+        AuditLog.objects.bulk_create([
+            AuditLog(user=order.purchaser, action='Created purchase order', details=order.order_number)
+            for order in orders
+        ])
+
+    return purchasers[0].pk, supervisor.pk
+
+
+def hot_queries(apps, purchaser, supervisor):
+    PurchaseOrder = apps.get_model('purchase_order', 'PurchaseOrder')
+    Signature = apps.get_model('purchase_order', 'Signature')
+    AuditLog = apps.get_model('purchase_order', 'AuditLog')
+
+    pending = PurchaseOrder.objects.filter(status='pending').order_by('-created_at', '-id').first()
+    return {
+        'supervisor queue': PurchaseOrder.objects.filter(status='pending').order_by('-created_at', '-id')[:50],
+        'purchasing queue': PurchaseOrder.objects.filter(status='approved').order_by('-created_at', '-id')[:50],
+        'purchaser orders': PurchaseOrder.objects.filter(purchaser_id=purchaser).order_by('-created_at', '-id')[:50],
+        'duplicate signature check': Signature.objects.filter(purchase_order=pending, signer_id=supervisor)[:1],
+        'audit log page': AuditLog.objects.order_by('-timestamp', '-id')[:50],
+    }
+
+
+def measure(label, queries, repeat):
+    print(f"\n=== {label} ===")
+    for name, queryset in queries.items():
+        plan = queryset.explain()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset.all())
+        elapsed = (time.perf_counter() - start) * 1000 / repeat
+        print(f"\n{name}: {elapsed:.3f} ms")
+        for line in plan.splitlines():
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure(os.path.join(tmpdir, 'bench.sqlite3'))
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        call_command('migrate', 'purchase_order', BEFORE, verbosity=0)
+
+        print(f"Generating {args.orders} purchase orders...")
+        purchaser, supervisor = populate(models_at(BEFORE), args.orders)
+        measure(f"before ({BEFORE})", hot_queries(models_at(BEFORE), purchaser, supervisor), args.repeat)
+
+        call_command('migrate', 'purchase_order', AFTER, verbosity=0)
+        measure(f"after ({AFTER})", hot_queries(models_at(AFTER), purchaser, supervisor), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Compare rows per second of PurchaseOrderSerializer and AuditLogSerializer
+against the .values() readers used by the list endpoints (purchase_order/readers.py).
+
+Each run serializes and renders a page to JSON and checks that both paths
+produce the same bytes. The benchmark builds its own throwaway SQLite
+database, so it never touches the configured DATABASES.
+
+Usage (from the backend directory):
+    python -m benchmarks.serializers [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.query_plans import configure
+
+
+def populate(row_count):
+    from django.contrib.auth.models import User
+    from purchase_order.models import PurchaseOrder, Signature, AuditLog
+
+    purchaser = User.objects.create(username='purchaser', email='purchaser@example.com')
+    supervisor = User.objects.create(username='supervisor', email='supervisor@example.com')
+    orders = PurchaseOrder.objects.bulk_create([
+        PurchaseOrder(
+            order_number=f'PO{i:09d}',
+            purchaser=purchaser,
+            description='Generated order',
+            amount='1234.50',
+            vendor='Acme',
+            encrypted_details='x' * 512,
+            status='approved'
+        )
+        for i in range(row_count)
+    ])
+    Signature.objects.bulk_create(
+        [Signature(purchase_order=order, signer=purchaser, signature='s' * 344, hash='h' * 44) for order in orders]
+        + [Signature(purchase_order=order, signer=supervisor, signature='s' * 344, hash='h' * 44) for order in orders]
+    )
+    AuditLog.objects.bulk_create([
+        AuditLog(user=purchaser, action='Created purchase order', details=order.order_number, ip_address='127.0.0.1')
+        for order in orders
+    ])
+
+
+def read(reader, queryset):
+    return reader.serialize(reader.values(queryset))
+
+
+def timed(render, repeat):
+    body = render()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return body, (time.perf_counter() - start) / repeat
+
+
+def compare(label, row_count, serializer_render, reader_render, repeat):
+    serializer_body, serializer_time = timed(serializer_render, repeat)
+    reader_body, reader_time = timed(reader_render, repeat)
+    identical = "identical" if serializer_body == reader_body else "DIFFERENT"
+    print(f"\n{label} ({row_count} rows, output {identical})")
+    print(f"    serializer: {row_count / serializer_time:12,.0f} rows/s")
+    print(f"    reader:     {row_count / reader_time:12,.0f} rows/s  ({serializer_time / reader_time:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure(os.path.join(tmpdir, 'bench.sqlite3'))
+        from django.core.management import call_command
+        from django.db.models import Prefetch
+        from rest_framework.renderers import JSONRenderer
+        from purchase_order.models import PurchaseOrder, Signature, AuditLog
+        from purchase_order.readers import PurchaseOrderReader, AuditLogReader
+        from purchase_order.serializers import PurchaseOrderSerializer, AuditLogSerializer
+
+        call_command('migrate', verbosity=0)
+        print(f"Generating {args.rows} purchase orders...")
+        populate(args.rows)
+        render = JSONRenderer().render
+
+        orders = PurchaseOrder.objects.order_by('-created_at', '-id')
+        compare(
+            "purchase orders", args.rows,
+            lambda: render(PurchaseOrderSerializer(
+                orders.select_related('purchaser').prefetch_related(
+                    Prefetch('signatures', queryset=Signature.objects.select_related('signer').order_by('id'))
+                ),
+                many=True
+            ).data),
+            lambda: render(read(PurchaseOrderReader(), orders)),
+            args.repeat
+        )
+
+        summary = set(PurchaseOrderSerializer.summary_fields)
+        compare(
+            "purchase order summaries", args.rows,
+            lambda: render(PurchaseOrderSerializer(orders, many=True, fields=summary).data),
+            lambda: render(read(PurchaseOrderReader(fields=summary), orders)),
+            args.repeat
+        )
+
+        entries = AuditLog.objects.order_by('-timestamp', '-id')
+        compare(
+            "audit log entries", args.rows,
+            lambda: render(AuditLogSerializer(entries.select_related('user'), many=True).data),
+            lambda: render(read(AuditLogReader(), entries)),
+            args.repeat
+        )
+
+
+if __name__ == "__main__":
+    main()
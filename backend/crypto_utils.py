@@ -1,60 +1,217 @@
 import rsa
 import base64
+import functools
 import json
 import os
+import threading
 from datetime import datetime
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional, Union
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import rsa as rsa_primitives
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+KEYS_DIR = os.path.join(os.path.dirname(__file__), 'keys')
+
+class KeyRing:
+    """In-process cache of parsed RSA keys, invalidated by key file mtime."""
+
+    def __init__(self, keys_dir: str = KEYS_DIR):
+        self.keys_dir = keys_dir
+        self._keys: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    def key_path(self, username: str, kind: str) -> str:
+        """Return the path of a user's public or private key file."""
+        return os.path.join(self.keys_dir, f'{username}_{kind}.pem')
+
+    def _load(self, path: str, loader) -> Any:
+        # A stat is much cheaper than an open and a PKCS#1 parse, and lets
+        # rotated key files take effect without a restart
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._keys.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            key = loader(f.read())
+
+        with self._lock:
+            self._keys[path] = (mtime, key)
+        return key
+
+    def public_key(self, username: str) -> rsa.PublicKey:
+        """Get a user's parsed public key."""
+        return self._load(self.key_path(username, 'public'), rsa.PublicKey.load_pkcs1)
+
+    def private_key(self, username: str) -> rsa.PrivateKey:
+        """Get a user's parsed private key."""
+        return self._load(self.key_path(username, 'private'), rsa.PrivateKey.load_pkcs1)
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """Drop cached keys for one user, or for every user."""
+        with self._lock:
+            if username is None:
+                self._keys.clear()
+                return
+            for kind in ('public', 'private'):
+                self._keys.pop(self.key_path(username, kind), None)
+
+keyring = KeyRing()
+
+class RsaBackend:
+    """Pure-Python backend built on the `rsa` package."""
+    name = 'rsa'
+
+    def generate_key_pair(self, bits: int) -> Tuple[rsa.PublicKey, rsa.PrivateKey]:
+        return rsa.newkeys(bits)
+
+    def sign(self, message: bytes, private_key: rsa.PrivateKey) -> bytes:
+        return rsa.sign(message, private_key, 'SHA-256')
+
+    def verify(self, message: bytes, signature: bytes, public_key: rsa.PublicKey) -> bool:
+        try:
+            rsa.verify(message, signature, public_key)
+            return True
+        except rsa.VerificationError:
+            return False
+
+    def encrypt(self, message: bytes, public_key: rsa.PublicKey) -> bytes:
+        return rsa.encrypt(message, public_key)
+
+    def decrypt(self, ciphertext: bytes, private_key: rsa.PrivateKey) -> bytes:
+        return rsa.decrypt(ciphertext, private_key)
+
+class CryptographyBackend:
+    """OpenSSL backend built on `cryptography`.
+
+    Accepts and returns the same `rsa` key objects and produces the same
+    wire formats (PKCS#1 v1.5 SHA-256 signatures, PKCS#1 v1.5 encryption)
+    as RsaBackend, so the two can be swapped without touching stored data.
+    """
+    name = 'cryptography'
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _public_key(public_key: rsa.PublicKey):
+        return rsa_primitives.RSAPublicNumbers(public_key.e, public_key.n).public_key()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _private_key(private_key: rsa.PrivateKey):
+        return rsa_primitives.RSAPrivateNumbers(
+            p=private_key.p,
+            q=private_key.q,
+            d=private_key.d,
+            dmp1=private_key.exp1,
+            dmq1=private_key.exp2,
+            iqmp=private_key.coef,
+            public_numbers=rsa_primitives.RSAPublicNumbers(private_key.e, private_key.n)
+        ).private_key()
+
+    def generate_key_pair(self, bits: int) -> Tuple[rsa.PublicKey, rsa.PrivateKey]:
+        numbers = rsa_primitives.generate_private_key(
+            public_exponent=65537,
+            key_size=bits
+        ).private_numbers()
+        public_numbers = numbers.public_numbers
+        return (
+            rsa.PublicKey(public_numbers.n, public_numbers.e),
+            rsa.PrivateKey(public_numbers.n, public_numbers.e, numbers.d, numbers.p, numbers.q)
+        )
+
+    def sign(self, message: bytes, private_key: rsa.PrivateKey) -> bytes:
+        return self._private_key(private_key).sign(message, padding.PKCS1v15(), hashes.SHA256())
+
+    def verify(self, message: bytes, signature: bytes, public_key: rsa.PublicKey) -> bool:
+        try:
+            self._public_key(public_key).verify(signature, message, padding.PKCS1v15(), hashes.SHA256())
+            return True
+        except InvalidSignature:
+            return False
+
+    def encrypt(self, message: bytes, public_key: rsa.PublicKey) -> bytes:
+        return self._public_key(public_key).encrypt(message, padding.PKCS1v15())
+
+    def decrypt(self, ciphertext: bytes, private_key: rsa.PrivateKey) -> bytes:
+        return self._private_key(private_key).decrypt(ciphertext, padding.PKCS1v15())
+
+    def wrap_key(self, data_key: bytes, public_key: rsa.PublicKey) -> bytes:
+        return self._public_key(public_key).encrypt(data_key, self._oaep())
+
+    def unwrap_key(self, wrapped_key: bytes, private_key: rsa.PrivateKey) -> bytes:
+        return self._private_key(private_key).decrypt(wrapped_key, self._oaep())
+
+    @staticmethod
+    def _oaep() -> padding.OAEP:
+        return padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA256()),
+            algorithm=hashes.SHA256(),
+            label=None
+        )
+
+BACKENDS = {
+    RsaBackend.name: RsaBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+def get_backend(name: str):
+    """Return a backend instance by name."""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown crypto backend: {name}")
+
+envelope_backend = CryptographyBackend()
 
 class CryptoUtils:
     KEY_SIZE = 2048
+    # Selected per deployment through the CRYPTO_UTILS_BACKEND environment variable
+    backend = get_backend(os.environ.get('CRYPTO_UTILS_BACKEND', CryptographyBackend.name))
+
+    @staticmethod
+    def set_backend(name: str) -> None:
+        """Switch the backend used by all CryptoUtils operations."""
+        CryptoUtils.backend = get_backend(name)
 
     @staticmethod
     def generate_key_pair() -> Tuple[rsa.PublicKey, rsa.PrivateKey]:
         """Generate a new RSA key pair."""
-        return rsa.newkeys(CryptoUtils.KEY_SIZE)
+        return CryptoUtils.backend.generate_key_pair(CryptoUtils.KEY_SIZE)
 
     @staticmethod
     def save_keys(public_key: rsa.PublicKey, private_key: rsa.PrivateKey, username: str) -> None:
         """Save RSA keys to files."""
-        keys_dir = os.path.join(os.path.dirname(__file__), 'keys')
-        os.makedirs(keys_dir, exist_ok=True)
+        os.makedirs(keyring.keys_dir, exist_ok=True)
         
         # Save public key
-        pub_path = os.path.join(keys_dir, f'{username}_public.pem')
+        pub_path = keyring.key_path(username, 'public')
         with open(pub_path, 'wb') as f:
             f.write(public_key.save_pkcs1('PEM'))
         
         # Save private key
-        priv_path = os.path.join(keys_dir, f'{username}_private.pem')
+        priv_path = keyring.key_path(username, 'private')
         with open(priv_path, 'wb') as f:
             f.write(private_key.save_pkcs1('PEM'))
+        
+        keyring.invalidate(username)
 
     @staticmethod
     def load_keys(username: str) -> Tuple[rsa.PublicKey, rsa.PrivateKey]:
         """Load RSA keys from files."""
-        keys_dir = os.path.join(os.path.dirname(__file__), 'keys')
-        
-        # Load public key
-        pub_path = os.path.join(keys_dir, f'{username}_public.pem')
-        with open(pub_path, 'rb') as f:
-            public_key = rsa.PublicKey.load_pkcs1(f.read())
-        
-        # Load private key
-        priv_path = os.path.join(keys_dir, f'{username}_private.pem')
-        with open(priv_path, 'rb') as f:
-            private_key = rsa.PrivateKey.load_pkcs1(f.read())
-        
-        return public_key, private_key
+        return keyring.public_key(username), keyring.private_key(username)
 
     @staticmethod
-    def sign_data(data: Dict[str, Any], private_key: rsa.PrivateKey) -> Dict[str, str]:
+    def sign_data(data: Union[Dict[str, Any], bytes], private_key: rsa.PrivateKey) -> Dict[str, str]:
         """Sign data using RSA private key."""
+        message = CryptoUtils._signed_bytes(data)
         # Create a hash of the data
-        data_str = json.dumps(data, sort_keys=True)
-        data_hash = rsa.compute_hash(data_str.encode(), 'SHA-256')
+        data_hash = rsa.compute_hash(message, 'SHA-256')
         
         # Sign the hash
-        signature = rsa.sign(data_str.encode(), private_key, 'SHA-256')
+        signature = CryptoUtils.backend.sign(message, private_key)
         
         return {
             'hash': base64.b64encode(data_hash).decode('utf-8'),
@@ -63,48 +220,78 @@ class CryptoUtils:
         }
 
     @staticmethod
-    def verify_signature(data: Dict[str, Any], signature: bytes, public_key: rsa.PublicKey) -> bool:
+    def verify_signature(data: Union[Dict[str, Any], bytes], signature: bytes, public_key: rsa.PublicKey) -> bool:
         """Verify RSA signature."""
-        try:
-            data_str = json.dumps(data, sort_keys=True)
-            rsa.verify(data_str.encode(), signature, public_key)
-            return True
-        except rsa.VerificationError:
-            return False
+        return CryptoUtils.backend.verify(CryptoUtils._signed_bytes(data), signature, public_key)
+
+    @staticmethod
+    def _signed_bytes(data: Union[Dict[str, Any], bytes]) -> bytes:
+        """Pre-serialized payloads (e.g. PurchaseOrder.signing_payload) are signed as is."""
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data, sort_keys=True).encode()
+
+    # Envelope format written by encrypt_data. Payloads stored as a bare JSON
+    # list are the legacy format of RSA-encrypted 200 character chunks.
+    ENVELOPE_VERSION = 2
+    ENVELOPE_ALGORITHM = 'RSA-OAEP-256+A256GCM'
 
     @staticmethod
     def encrypt_data(data: Dict[str, Any], public_key: rsa.PublicKey) -> str:
-        """Encrypt data using RSA public key."""
-        data_str = json.dumps(data)
-        # For large data, we'll use symmetric encryption in production
-        # Here we'll chunk the data since RSA can only encrypt limited size
-        chunk_size = 200  # RSA-2048 can encrypt up to ~245 bytes
-        encrypted_chunks = []
-        
-        for i in range(0, len(data_str), chunk_size):
-            chunk = data_str[i:i + chunk_size]
-            encrypted_chunk = rsa.encrypt(chunk.encode(), public_key)
-            encrypted_chunks.append(base64.b64encode(encrypted_chunk).decode())
-        
-        return json.dumps(encrypted_chunks)
+        """Encrypt data with a fresh AES-256-GCM key wrapped by the RSA public key."""
+        data_key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(12)
+        header = {'v': CryptoUtils.ENVELOPE_VERSION, 'alg': CryptoUtils.ENVELOPE_ALGORITHM}
+        aad = json.dumps(header, sort_keys=True).encode()
+
+        ciphertext = AESGCM(data_key).encrypt(nonce, json.dumps(data).encode(), aad)
+        # OAEP is not available in the rsa package, so key wrapping always
+        # goes through cryptography regardless of the selected backend
+        wrapped_key = envelope_backend.wrap_key(data_key, public_key)
+
+        return json.dumps({
+            **header,
+            'key': base64.b64encode(wrapped_key).decode(),
+            'iv': base64.b64encode(nonce).decode(),
+            'ciphertext': base64.b64encode(ciphertext).decode()
+        })
 
     @staticmethod
     def decrypt_data(encrypted_data: str, private_key: rsa.PrivateKey) -> Dict[str, Any]:
         """Decrypt data using RSA private key."""
         try:
-            encrypted_chunks = json.loads(encrypted_data)
-            decrypted_chunks = []
-            
-            for chunk in encrypted_chunks:
-                encrypted_bytes = base64.b64decode(chunk)
-                decrypted_chunk = rsa.decrypt(encrypted_bytes, private_key)
-                decrypted_chunks.append(decrypted_chunk.decode())
-            
-            decrypted_data = ''.join(decrypted_chunks)
-            return json.loads(decrypted_data)
+            payload = json.loads(encrypted_data)
+            if isinstance(payload, list):
+                return CryptoUtils._decrypt_chunked(payload, private_key)
+
+            if payload.get('v') != CryptoUtils.ENVELOPE_VERSION:
+                raise ValueError(f"unsupported envelope version {payload.get('v')!r}")
+
+            header = {'v': payload['v'], 'alg': payload['alg']}
+            aad = json.dumps(header, sort_keys=True).encode()
+            data_key = envelope_backend.unwrap_key(base64.b64decode(payload['key']), private_key)
+            plaintext = AESGCM(data_key).decrypt(
+                base64.b64decode(payload['iv']),
+                base64.b64decode(payload['ciphertext']),
+                aad
+            )
+            return json.loads(plaintext)
         except Exception as e:
             raise ValueError(f"Failed to decrypt data: {str(e)}")
 
+    @staticmethod
+    def _decrypt_chunked(encrypted_chunks: list, private_key: rsa.PrivateKey) -> Dict[str, Any]:
+        """Decrypt the legacy format of individually RSA-encrypted chunks."""
+        decrypted_chunks = []
+        
+        for chunk in encrypted_chunks:
+            encrypted_bytes = base64.b64decode(chunk)
+            decrypted_chunk = CryptoUtils.backend.decrypt(encrypted_bytes, private_key)
+            decrypted_chunks.append(decrypted_chunk.decode())
+        
+        decrypted_data = ''.join(decrypted_chunks)
+        return json.loads(decrypted_data)
+
 # Key management functions
 def setup_user_keys(username: str) -> None:
     """Generate and save keys for a new user."""
@@ -113,10 +300,8 @@ def setup_user_keys(username: str) -> None:
 
 def get_user_public_key(username: str) -> rsa.PublicKey:
     """Get user's public key."""
-    public_key, _ = CryptoUtils.load_keys(username)
-    return public_key
+    return keyring.public_key(username)
 
 def get_user_private_key(username: str) -> rsa.PrivateKey:
     """Get user's private key."""
-    _, private_key = CryptoUtils.load_keys(username)
-    return private_key 
\ No newline at end of file
+    return keyring.private_key(username) 
\ No newline at end of file
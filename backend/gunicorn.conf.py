@@ -0,0 +1,35 @@
+"""
+gunicorn settings, used with e.g. gunicorn -c gunicorn.conf.py backend.wsgi
+
+With PROMETHEUS_MULTIPROC_DIR set, the workers share their metrics through
+files in that directory (purchase_order/metrics.py). Those of a previous run
+are removed when the server starts, and those of an exited worker are marked
+dead so /metrics drops its live gauges.
+
+With more than one worker the server only starts if the workers share the
+default cache (purchase_order/checks.py).
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+    if server.cfg.workers > 1:
+        import django
+        from django.core.management import call_command
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+        django.setup()
+        # Raises SystemCheckError unless the cache is shared
+        call_command('check', tags=['caches'], deploy=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 
 class PurchaseOrderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'purchase_order'
\ No newline at end of file
+    name = 'purchase_order'
+
+    def ready(self):
+        # Register the role cache and queue version invalidation, audit
+        # flush and request timing signal handlers, the metrics hooks and
+        # the shared cache checks
+        from . import audit, checks, metrics, queues, roles, timing  # noqa: F401
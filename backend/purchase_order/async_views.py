@@ -0,0 +1,224 @@
+"""
+Async versions of the purchase order read and workflow endpoints, for ASGI
+deployments.
+
+DRF views are synchronous, so these are plain Django async views mounted
+under /api/async/purchase-orders/ with the same authentication, permissions,
+representations and error bodies as PurchaseOrderViewSet. Reads use the
+async ORM and cache API, signature verification runs on the bounded
+crypto_executor, and the writes of a workflow action run as one transaction
+in the ORM's sync thread, since transactions cannot span async code.
+
+The views also work under WSGI, where each request runs its own event loop.
+"""
+import functools
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from . import transitions
+from .audit import audit_sink
+from .conditional import etag_matches, set_validators
+from .models import PurchaseOrder, Signature
+from .pagination import PurchaseOrderCursorPagination
+from .queues import queue_for, aqueue_version, queue_page_cache
+from .readers import PurchaseOrderReader
+from .roles import aresolve_roles
+from .serializers import SignPurchaseOrderSerializer
+from .timing import timed
+from .verification import averify_signature
+from .views import visible_orders, sparse_fields, ETAG_STATE, read_etag, read_variant, client_ip
+
+class BadRequest(exceptions.APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'Bad request.'
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    with timed('render'):
+        content = JSONRenderer().render(data)
+    return HttpResponse(content, status=status_code, content_type='application/json')
+
+
+def not_modified(etag):
+    return set_validators(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def async_api_view(view):
+    """
+    Wrap an async view: parse the body like DRF, and render APIExceptions the
+    way DRF's exception handler does. Token authentication needs no CSRF check.
+    """
+    @csrf_exempt
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        try:
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = render(data, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = 'Token'
+            return response
+    return wrapper
+
+
+async def authenticate(request):
+    """Async RoleTokenAuthentication: set request.user and request.roles or raise"""
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != b'token':
+        raise exceptions.NotAuthenticated()
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+
+    try:
+        token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        raise exceptions.AuthenticationFailed('Invalid token.')
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+    request.user = token.user
+    request.roles = await aresolve_roles(token.user)
+
+
+async def get_order(request, pk):
+    try:
+        return await visible_orders(request.roles.role, request.user).aget(pk=pk)
+    except PurchaseOrder.DoesNotExist:
+        raise exceptions.NotFound()
+
+
+async def verify_request_signature(request, order, target_status):
+    """
+    Async PurchaseOrderViewSet.verify_request_signature: return the posted
+    signature and hash once they hold for moving order to target_status.
+    """
+    serializer = SignPurchaseOrderSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    if not getattr(settings, 'SIGNATURE_VERIFICATION_REQUIRED', True):
+        return serializer.validated_data
+
+    signing = order.signing_payload(target_status)
+    if serializer.validated_data['hash'] != signing.digest:
+        raise BadRequest("Hash does not match the purchase order's signing payload")
+    if not await averify_signature(serializer.validated_data['signature'], request.roles.public_key, signing):
+        raise BadRequest("Invalid signature")
+    return serializer.validated_data
+
+
+@require_GET
+@async_api_view
+async def order_list(request):
+    """PurchaseOrderViewSet.list"""
+    await authenticate(request)
+    queue = queue_for(request.roles.role, request.user.pk)
+    version = await aqueue_version(queue) if queue else None
+    variant = read_variant(request, 'json')
+
+    cache_key = None
+    if queue_page_cache.is_shared(queue):
+        cache_key = queue_page_cache.key(queue, version, variant)
+        cached = await queue_page_cache.aget(cache_key)
+        if cached is not None:
+            etag, data = cached
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            return set_validators(render(data), etag)
+
+    fields = sparse_fields(request.query_params, 'list')
+    queryset = visible_orders(request.roles.role, request.user)
+    etag = read_etag(queue, version, await queryset.order_by().aaggregate(**ETAG_STATE), variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    reader = PurchaseOrderReader(fields=fields)
+    paginator = PurchaseOrderCursorPagination()
+    page = await paginator.apaginate_queryset(reader.values(queryset, 'id', 'created_at'), request)
+    with timed('serialize'):
+        rows = await reader.aserialize(page)
+    data = paginator.get_paginated_response(rows).data
+    if cache_key is not None:
+        await queue_page_cache.aset(cache_key, (etag, data))
+    return set_validators(render(data), etag)
+
+
+@require_GET
+@async_api_view
+async def order_detail(request, pk):
+    """PurchaseOrderViewSet.retrieve"""
+    await authenticate(request)
+    queryset = visible_orders(request.roles.role, request.user).filter(pk=pk)
+    fields = sparse_fields(request.query_params, 'retrieve')
+    state = await queryset.order_by().aaggregate(**ETAG_STATE)
+    if not state['orders']:
+        raise exceptions.NotFound()
+
+    queue = queue_for(request.roles.role, request.user.pk)
+    etag = read_etag(queue, await aqueue_version(queue) if queue else None, state, read_variant(request, 'json'))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    reader = PurchaseOrderReader(fields=fields)
+    rows = [row async for row in reader.values(queryset)]
+    with timed('serialize'):
+        data = (await reader.aserialize(rows))[0]
+    return set_validators(render(data), etag)
+
+
+@require_POST
+@async_api_view
+async def transition(request, pk, action):
+    """PurchaseOrderViewSet.approve, reject and process"""
+    await authenticate(request)
+    order = await get_order(request, pk)
+    transitions.check(action, order, request.roles.role)
+
+    target_status = transitions.TRANSITIONS[action].target
+    signed = await verify_request_signature(request, order, target_status)
+    await sync_to_async(transitions.apply)(
+        action, order, request.user,
+        signature=signed['signature'], hash=signed['hash'], ip_address=client_ip(request)
+    )
+    return render({"detail": f"Purchase order {target_status} successfully"})
+
+
+@require_POST
+@async_api_view
+async def sign(request, pk):
+    """PurchaseOrderViewSet.sign"""
+    await authenticate(request)
+    order = await get_order(request, pk)
+    role = request.roles.role
+    if await Signature.objects.filter(purchase_order=order, signer=request.user).aexists():
+        raise BadRequest("You have already signed this purchase order.")
+    if role not in ('purchaser', 'supervisor'):
+        raise exceptions.PermissionDenied("You are not authorized to sign purchase orders.")
+
+    # A supervisor's signature approves the order
+    if role == 'supervisor':
+        transitions.check('approve', order, role)
+    target_status = 'approved' if role == 'supervisor' else order.status
+    signed = await verify_request_signature(request, order, target_status)
+    await sync_to_async(apply_signature)(request, order, role, signed)
+    return render({"detail": "Purchase order signed successfully."})
+
+
+def apply_signature(request, order, role, signed):
+    transitions.sign(
+        order, request.user, role,
+        signature=signed['signature'], hash=signed['hash'], ip_address=client_ip(request)
+    )
+    audit_sink.log(user=request.user, action=f"signed purchase order {order.order_number}")
@@ -0,0 +1,130 @@
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from .integrity import append_entries
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """
+    Buffers AuditLog entries in process and appends them to the hash chained
+    log in batches.
+
+    Buffered entries are flushed once batch_size entries are queued, when a
+    request finishes after the oldest entry has waited flush_interval seconds,
+    and at interpreter shutdown. Durable entries are queued only once the
+    surrounding transaction commits (and dropped if it rolls back), and are
+    written together with everything else in the buffer before the request
+    returns.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=2.0, max_buffer=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def log(self, user, action, details=None, ip_address=None, durable=False):
+        """Queue a single audit entry"""
+        entry = AuditLog(
+            user=user,
+            action=action,
+            details=details,
+            ip_address=ip_address,
+            timestamp=timezone.now()
+        )
+        self.log_many([entry], durable=durable)
+        return entry
+
+    def log_many(self, entries, durable=False):
+        """Queue unsaved AuditLog instances"""
+        entries = list(entries)
+        if not entries:
+            return
+        if durable:
+            transaction.on_commit(lambda: self._enqueue(entries, force_flush=True))
+        else:
+            self._enqueue(entries)
+
+    def write(self, entries):
+        """
+        Append unsaved AuditLog instances now, in the caller's transaction,
+        so they commit or roll back with the change they record. They go
+        ahead of anything still buffered.
+        """
+        return append_entries(list(entries), savepoint=False)
+
+    def _enqueue(self, entries, force_flush=False):
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.extend(entries)
+            full = len(self._buffer) >= self.batch_size
+        if force_flush or full:
+            self.flush()
+
+    def flush_if_due(self):
+        with self._lock:
+            due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write every queued entry, returning how many were written"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._oldest = None
+        if not batch:
+            return 0
+
+        try:
+            append_entries(batch)
+        except Exception:
+            logger.exception("Failed to write %d audit log entries", len(batch))
+            for entry in batch:
+                entry.pk = None
+            with self._lock:
+                # Keep the entries for the next flush, bounded so a dead
+                # database cannot grow the buffer without limit
+                self._buffer = (batch + self._buffer)[-self.max_buffer:]
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+            return 0
+        return len(batch)
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+
+audit_sink = AuditSink(
+    batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 2.0)
+)
+
+
+@receiver(request_finished)
+def _flush_after_request(sender, **kwargs):
+    if audit_sink.pending():
+        audit_sink.flush_if_due()
+        # Django closes stale connections before this receiver runs; don't
+        # leave the one used for the flush open until the next request
+        close_old_connections()
+
+
+@atexit.register
+def _flush_on_shutdown():
+    try:
+        audit_sink.flush()
+    except Exception:
+        logger.exception("Failed to flush audit log entries on shutdown")
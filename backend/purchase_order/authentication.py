@@ -0,0 +1,13 @@
+from rest_framework.authentication import TokenAuthentication
+from .roles import resolve_roles
+
+
+class RoleTokenAuthentication(TokenAuthentication):
+    """Token authentication that also attaches the user's roles to the request"""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            user, _ = result
+            request.roles = resolve_roles(user)
+        return result
@@ -0,0 +1,50 @@
+"""
+System checks for state the app keeps in the default cache.
+
+The read-your-writes pin (routers.py), cached roles (roles.py) and role queue
+versions (queues.py) must be seen by every worker that serves a user. With a
+process-local cache a worker misses the pins, revocations and queue bumps
+made by the others: a user who just wrote may read a lagging replica, and a
+revoked role or rotated key stays valid elsewhere for up to
+ROLE_CACHE_TIMEOUT seconds. Deployments are checked with
+manage.py check --deploy.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+SHARED_CACHE_HINT = (
+    "Set CACHE_DIR to share a file-based cache between the workers of a node, or point "
+    "CACHES['default'] at a cache all servers share, such as Redis or Memcached."
+)
+
+
+def process_local_cache():
+    """Whether the default cache is private to each process"""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+@register(Tags.caches)
+def check_replica_cache(app_configs, **kwargs):
+    if getattr(settings, 'DATABASE_REPLICAS', []) and process_local_cache():
+        return [Error(
+            "Read replicas need a cache shared by all workers, which keeps the users pinned "
+            "to the primary after they write.",
+            hint=SHARED_CACHE_HINT,
+            id='purchase_order.E001',
+        )]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_deployment_cache(app_configs, **kwargs):
+    if process_local_cache():
+        return [Error(
+            "Roles and role queue versions are cached in a process-local cache, where one "
+            "worker does not see the changes made by another.",
+            hint=SHARED_CACHE_HINT,
+            id='purchase_order.E002',
+        )]
+    return []
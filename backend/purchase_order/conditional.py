@@ -0,0 +1,31 @@
+"""Strong ETags and If-None-Match handling for purchase order reads"""
+import hashlib
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Return a quoted strong ETag for the given validator parts"""
+    return quote_etag(hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32])
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # If-None-Match uses the weak comparison
+    return '*' in etags or etag in etags or f'W/{etag}' in etags
+
+
+def set_validators(response, etag):
+    response['ETag'] = etag
+    # Let clients keep the response but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(etag):
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
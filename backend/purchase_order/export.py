@@ -0,0 +1,101 @@
+import base64
+import binascii
+import csv
+import json
+from django.core.exceptions import ValidationError
+from rest_framework import serializers
+from .models import AuditLog
+from .pagination import KeysetCursorPagination
+
+EXPORT_ORDERING = ('timestamp', 'id')
+EXPORT_FIELDS = (
+    'id', 'timestamp', 'action', 'details', 'ip_address', 'username',
+    'user__id', 'user__username', 'user__email', 'user__first_name', 'user__last_name'
+)
+CSV_COLUMNS = ['id', 'timestamp', 'user_id', 'username', 'action', 'details', 'ip_address', 'cursor']
+
+_timestamp_field = serializers.DateTimeField()
+
+
+def encode_cursor(timestamp, pk):
+    token = json.dumps([timestamp.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """
+    Return the (timestamp, id) position of a cursor, or raise ValueError.
+    The values are parsed here so a bad cursor fails before streaming starts.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, list) or len(position) != len(EXPORT_ORDERING):
+        raise ValueError("Invalid cursor")
+    try:
+        position = [AuditLog._meta.get_field(name).to_python(value) for name, value in zip(EXPORT_ORDERING, position)]
+    except (TypeError, ValueError, ValidationError):
+        raise ValueError("Invalid cursor")
+    if None in position:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def export_rows(queryset, after=None, chunk_size=2000):
+    """
+    Yield audit log rows as dictionaries in (timestamp, id) order.
+
+    Rows are read through a single join with the user table and streamed with
+    .iterator(), so memory use does not depend on how many rows match.
+    """
+    queryset = queryset.order_by(*EXPORT_ORDERING)
+    if after is not None:
+        queryset = queryset.filter(KeysetCursorPagination._after(EXPORT_ORDERING, after))
+
+    for row in queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        user = None
+        if row['user__id'] is not None:
+            user = {
+                'id': row['user__id'],
+                'username': row['user__username'],
+                'email': row['user__email'],
+                'first_name': row['user__first_name'],
+                'last_name': row['user__last_name'],
+            }
+        elif row['username']:
+            # The user was deleted; the entry keeps who acted
+            user = {'id': None, 'username': row['username'], 'email': None, 'first_name': None, 'last_name': None}
+        yield {
+            'id': row['id'],
+            'user': user,
+            'action': row['action'],
+            'details': row['details'],
+            'ip_address': row['ip_address'],
+            'timestamp': _timestamp_field.to_representation(row['timestamp']),
+            # Pass back as ?cursor= to resume the export after this row
+            'cursor': encode_cursor(row['timestamp'], row['id']),
+        }
+
+
+def ndjson_stream(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+class _Echo:
+    """File-like object whose write returns the line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        user = row['user'] or {}
+        yield writer.writerow([
+            row['id'], row['timestamp'], user.get('id', ''), user.get('username', ''),
+            row['action'], row['details'] or '', row['ip_address'] or '', row['cursor']
+        ])
@@ -0,0 +1,331 @@
+"""
+Hash chain and Merkle checkpoints for AuditLog.
+
+Every entry stores entry_hash = SHA-256(prev_hash || canonical entry), where
+prev_hash is the entry_hash of the entry before it, so editing, inserting or
+deleting a row breaks every link after it. Entries are grouped in blocks of
+BLOCK_SIZE by sequence number, and a checkpoint records the Merkle root and
+inner nodes of each completed block. A single entry is verified with an
+O(log n) inclusion proof read from the stored nodes instead of a rescan.
+"""
+import hashlib
+import json
+import operator
+from functools import reduce
+from datetime import timezone as dt_timezone
+from django.db import connection, transaction
+from django.db.models import F, Max, Min, Q
+from .models import AuditLog, AuditChainHead, AuditCheckpoint, AuditMerkleNode
+
+GENESIS_HASH = '0' * 64
+# Fixed: the block of an entry is derived from its sequence number, so
+# changing it would detach every existing checkpoint from its entries
+BLOCK_SIZE = 1024
+
+
+def entry_digest(prev_hash, sequence, username, action, details, ip_address, timestamp):
+    """Return the chain hash of an entry given its predecessor's hash"""
+    canonical = json.dumps(
+        [sequence, username, action, details, ip_address, timestamp.astimezone(dt_timezone.utc).isoformat()],
+        separators=(',', ':')
+    )
+    return hashlib.sha256((prev_hash + canonical).encode('utf-8')).hexdigest()
+
+
+def compute_entry_hash(entry):
+    return entry_digest(
+        entry.prev_hash, entry.sequence, entry.username, entry.action,
+        entry.details, entry.ip_address, entry.timestamp
+    )
+
+
+def block_of(sequence):
+    return (sequence - 1) // BLOCK_SIZE
+
+
+def block_bounds(block):
+    return block * BLOCK_SIZE + 1, (block + 1) * BLOCK_SIZE
+
+
+# Merkle trees hash leaves and inner nodes with different prefixes so a leaf
+# can never be passed off as an inner node. An odd node is carried up as is.
+
+def _leaf(entry_hash):
+    return hashlib.sha256(b'\x00' + bytes.fromhex(entry_hash)).digest()
+
+
+def _node(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def _levels(entry_hashes):
+    levels = [[_leaf(entry_hash) for entry_hash in entry_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(entry_hashes):
+    return _levels(entry_hashes)[-1][0].hex()
+
+
+def _level_sizes(leaves):
+    sizes = [leaves]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def _proof_positions(leaves, index):
+    """Return (level, position) of the siblings on the path from leaf index to the root"""
+    positions = []
+    for level, size in enumerate(_level_sizes(leaves)[:-1]):
+        sibling = (index >> level) ^ 1
+        if sibling < size:
+            positions.append((level, sibling))
+    return positions
+
+
+def merkle_proof(entry_hashes, index):
+    """Return the sibling path from leaf index to the root as [(side, hash), ...]"""
+    proof = []
+    for level in _levels(entry_hashes)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(('left' if sibling < index else 'right', level[sibling].hex()))
+        index //= 2
+    return proof
+
+
+def verify_proof(entry_hash, proof, root):
+    node = _leaf(entry_hash)
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        node = _node(sibling, node) if side == 'left' else _node(node, sibling)
+    return node.hex() == root
+
+
+def _claim_sequences(count):
+    """
+    Advance the chain head by count and return its new sequence and the
+    entry_hash it held, or None if there is no head yet. The UPDATE comes
+    first, so the head's row lock (or SQLite's write lock) is taken before
+    anything is read.
+    """
+    if connection.features.can_return_columns_from_insert:
+        # One statement where UPDATE ... RETURNING is available (PostgreSQL, SQLite 3.35+)
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(AuditChainHead._meta.db_table)} SET {qn('sequence')} = {qn('sequence')} + %s "
+                f"WHERE {qn('id')} = 1 RETURNING {qn('sequence')}, {qn('entry_hash')}",
+                [count]
+            )
+            return cursor.fetchone()
+    if not AuditChainHead.objects.filter(pk=1).update(sequence=F('sequence') + count):
+        return None
+    return AuditChainHead.objects.values_list('sequence', 'entry_hash').get(pk=1)
+
+
+def append_entries(entries, savepoint=True):
+    """
+    Chain and insert unsaved AuditLog entries in order.
+
+    Claiming sequence numbers from the chain head row locks it, so
+    concurrent writers queue on that one row until they commit. An append
+    costs three statements regardless of the log's size: the claim, the
+    insert and the update of the head's hash (plus checkpoint writes when a
+    block completes). Without a savepoint, a failure inside an outer
+    transaction rolls all of it back.
+    """
+    if not entries:
+        return []
+
+    for entry in entries:
+        if entry.user_id is not None and not entry.username:
+            entry.username = entry.user.username
+
+    with transaction.atomic(savepoint=savepoint):
+        head = _claim_sequences(len(entries))
+        if head is None:
+            AuditChainHead.objects.create(pk=1, sequence=len(entries), entry_hash=GENESIS_HASH)
+            head = (len(entries), GENESIS_HASH)
+
+        # The head's hash is still that of the entry before this batch
+        head_sequence, prev_hash = head
+        sequence = head_sequence - len(entries)
+        for entry in entries:
+            sequence += 1
+            entry.sequence = sequence
+            entry.prev_hash = prev_hash
+            entry.entry_hash = compute_entry_hash(entry)
+            prev_hash = entry.entry_hash
+
+        AuditLog.objects.bulk_create(entries)
+        AuditChainHead.objects.filter(pk=1).update(entry_hash=prev_hash)
+
+        first_block = block_of(entries[0].sequence)
+        for block in range(first_block, block_of(head_sequence + 1)):
+            create_checkpoint(block)
+
+    return entries
+
+
+def create_checkpoint(block):
+    first, last = block_bounds(block)
+    entry_hashes = _block_hashes(block)
+    levels = _levels(entry_hashes)
+    checkpoint = AuditCheckpoint.objects.create(
+        block=block,
+        first_sequence=first,
+        last_sequence=last,
+        merkle_root=levels[-1][0].hex(),
+        last_entry_hash=entry_hashes[-1]
+    )
+    AuditMerkleNode.objects.bulk_create([
+        AuditMerkleNode(checkpoint=checkpoint, level=level, position=position, hash=node.hex())
+        for level, nodes in enumerate(levels[:-1]) if level > 0
+        for position, node in enumerate(nodes)
+    ])
+    return checkpoint
+
+
+def _block_hashes(block):
+    first, last = block_bounds(block)
+    return list(
+        AuditLog.objects.filter(sequence__range=(first, last)).order_by('sequence').values_list('entry_hash', flat=True)
+    )
+
+
+def verify_entry(entry):
+    """
+    Verify a single entry and return a report.
+
+    The entry's hash is recomputed from its contents and linked to its
+    predecessor. A checkpointed entry is then proven against its block's
+    Merkle root with its sibling leaf and one stored node per level above
+    it; an entry after the last checkpoint is followed up the chain to the
+    head, which is at most one block away.
+    """
+    report = {'id': entry.id, 'sequence': entry.sequence, 'valid': False}
+    if entry.sequence is None:
+        report['reason'] = "Entry is not part of the hash chain"
+        return report
+
+    if compute_entry_hash(entry) != entry.entry_hash:
+        report['reason'] = "Entry contents do not match its hash"
+        return report
+
+    checkpoint = AuditCheckpoint.objects.filter(block=block_of(entry.sequence)).first()
+    positions = []
+    if checkpoint is not None:
+        leaves = checkpoint.last_sequence - checkpoint.first_sequence + 1
+        positions = _proof_positions(leaves, entry.sequence - checkpoint.first_sequence)
+
+    # The predecessor and the sibling leaf in one query
+    neighbours = {entry.sequence - 1}
+    if positions and positions[0][0] == 0:
+        neighbours.add(checkpoint.first_sequence + positions[0][1])
+    entry_hashes = dict(AuditLog.objects.filter(sequence__in=neighbours).values_list('sequence', 'entry_hash'))
+
+    expected_prev = GENESIS_HASH if entry.sequence == 1 else entry_hashes.get(entry.sequence - 1)
+    if entry.prev_hash != expected_prev:
+        report['reason'] = "Entry is not linked to its predecessor"
+        return report
+
+    if checkpoint is not None:
+        index = entry.sequence - checkpoint.first_sequence
+        nodes = {}
+        inner = [Q(level=level, position=position) for level, position in positions if level > 0]
+        if inner:
+            nodes = {
+                (level, position): node_hash for level, position, node_hash in
+                checkpoint.nodes.filter(reduce(operator.or_, inner)).values_list('level', 'position', 'hash')
+            }
+        sibling_leaf = entry_hashes.get(checkpoint.first_sequence + (index ^ 1))
+        if sibling_leaf is not None:
+            nodes[(0, index ^ 1)] = _leaf(sibling_leaf).hex()
+
+        proof = []
+        for level, position in positions:
+            node_hash = nodes.get((level, position))
+            if node_hash is None:
+                report['reason'] = "Entry's Merkle proof is incomplete"
+                return report
+            proof.append(('left' if position < index >> level else 'right', node_hash))
+
+        report.update(checkpoint=checkpoint.block, merkle_root=checkpoint.merkle_root, proof=proof)
+        if not verify_proof(entry.entry_hash, proof, checkpoint.merkle_root):
+            report['reason'] = "Entry is not included in its checkpoint"
+            return report
+    else:
+        head = AuditChainHead.objects.get(pk=1)
+        tail = list(
+            AuditLog.objects.filter(sequence__gt=entry.sequence).order_by('sequence').values_list('prev_hash', 'entry_hash')
+        )
+        prev_hash = entry.entry_hash
+        for linked_prev, entry_hash in tail:
+            if linked_prev != prev_hash:
+                report['reason'] = "Chain is broken after this entry"
+                return report
+            prev_hash = entry_hash
+        if prev_hash != head.entry_hash:
+            report['reason'] = "Chain does not reach the recorded head"
+            return report
+
+    report['valid'] = True
+    return report
+
+
+def verify_range(queryset, max_failures=100):
+    """
+    Verify the stretch of the chain that covers an AuditLog queryset, such as
+    a time range.
+
+    Entries are chained in write order, which can interleave with timestamp
+    order, so the whole sequence span of the queryset is checked: every entry
+    is rehashed and linked to the one before it, and every block touched by
+    the span is checked against its checkpoint.
+    """
+    span = queryset.exclude(sequence=None).aggregate(first=Min('sequence'), last=Max('sequence'))
+    report = {'valid': True, 'first_sequence': span['first'], 'last_sequence': span['last'],
+              'checked': 0, 'checkpoints': 0, 'failures': []}
+    if span['first'] is None:
+        return report
+
+    failures = report['failures']
+    if span['first'] == 1:
+        prev_hash = GENESIS_HASH
+    else:
+        prev_hash = AuditLog.objects.filter(sequence=span['first'] - 1).values_list('entry_hash', flat=True).first()
+    expected_sequence = span['first']
+
+    entries = AuditLog.objects.filter(sequence__range=(span['first'], span['last'])).order_by('sequence')
+    for entry in entries.iterator(chunk_size=2000):
+        report['checked'] += 1
+        if entry.sequence != expected_sequence:
+            failures.append({'sequence': expected_sequence, 'reason': "Entries are missing from the chain"})
+        elif entry.prev_hash != prev_hash:
+            failures.append({'id': entry.id, 'sequence': entry.sequence, 'reason': "Entry is not linked to its predecessor"})
+        elif compute_entry_hash(entry) != entry.entry_hash:
+            failures.append({'id': entry.id, 'sequence': entry.sequence, 'reason': "Entry contents do not match its hash"})
+        if len(failures) >= max_failures:
+            break
+        prev_hash = entry.entry_hash
+        expected_sequence = entry.sequence + 1
+
+    if expected_sequence <= span['last'] and len(failures) < max_failures:
+        failures.append({'sequence': expected_sequence, 'reason': "Entries are missing from the chain"})
+
+    checkpoints = AuditCheckpoint.objects.filter(block__range=(block_of(span['first']), block_of(span['last'])))
+    for checkpoint in checkpoints:
+        report['checkpoints'] += 1
+        if merkle_root(_block_hashes(checkpoint.block)) != checkpoint.merkle_root:
+            failures.append({'checkpoint': checkpoint.block, 'reason': "Block does not match its checkpoint"})
+
+    report['valid'] = not failures
+    return report
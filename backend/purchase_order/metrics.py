@@ -0,0 +1,132 @@
+"""
+Prometheus metrics, exported by the metrics view at /metrics in the text
+exposition format.
+
+- purchase_order_request_duration_seconds: request latency by view and
+  action, observed by ServerTimingMiddleware.
+- purchase_order_transitions_total: status transitions, counted when they
+  commit, and compare-and-set conflicts.
+- purchase_order_signature_verifications_total: signature verification
+  outcomes.
+- crypto_operation_duration_seconds: CryptoUtils operation latency, through
+  utils.crypto.operation_hooks.
+- purchase_order_queue_size: the role queues, read from the database on
+  every scrape.
+
+Every gunicorn worker process has its own metric values. Point
+PROMETHEUS_MULTIPROC_DIR at a directory shared by the workers before they
+start (gunicorn.conf.py empties it); prometheus_client then keeps the values
+in memory mapped files there, and whichever worker serves a scrape reports
+the sum over all workers. Queue sizes come from the database and need no
+aggregation.
+"""
+import os
+from django.db import transaction
+from django.db.models import Count
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from utils import crypto
+from .models import PurchaseOrder
+from .queues import STATUS_QUEUES
+
+CRYPTO_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+# Algorithm of each CryptoUtils operation
+CRYPTO_ALGORITHMS = {
+    'generate_key_pair': 'RSA',
+    'sign_data': 'RSA-PSS',
+    'verify_signature': 'RSA-PSS',
+    'encrypt_with_public_key': 'RSA-OAEP',
+    'decrypt_with_private_key': 'RSA-OAEP',
+    'symmetric_encrypt': 'AES-GCM',
+    'symmetric_decrypt': 'AES-GCM',
+    'hash_data': 'SHA-256',
+}
+
+REQUEST_DURATION = Histogram(
+    'purchase_order_request_duration_seconds', 'Latency of API requests',
+    ['view', 'action', 'status']
+)
+TRANSITIONS = Counter(
+    'purchase_order_transitions_total', 'Purchase order status transitions',
+    ['source', 'target', 'outcome']
+)
+SIGNATURE_VERIFICATIONS = Counter(
+    'purchase_order_signature_verifications_total', 'Signature verifications',
+    ['outcome', 'source']
+)
+CRYPTO_DURATION = Histogram(
+    'crypto_operation_duration_seconds', 'Latency of CryptoUtils operations',
+    ['operation', 'algorithm'], buckets=CRYPTO_BUCKETS
+)
+
+
+def request_labels(request):
+    """Return the (view, action) a request was routed to"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched', ''
+    # Viewset routes map methods to actions
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        return match.func.cls.__name__, actions.get(request.method.lower(), request.method.lower())
+    return match.url_name or match.view_name, match.kwargs.get('action', request.method.lower())
+
+
+def observe_request(request, status_code, seconds):
+    view, action = request_labels(request)
+    REQUEST_DURATION.labels(view, action, str(status_code)).observe(seconds)
+
+
+def count_transitions(source, target, count=1):
+    """Count transitions made by the current transaction once it commits"""
+    if count:
+        transaction.on_commit(lambda: TRANSITIONS.labels(source, target, 'applied').inc(count))
+
+
+def count_conflict(source, target):
+    TRANSITIONS.labels(source, target, 'conflict').inc()
+
+
+def count_verification(outcome, source):
+    SIGNATURE_VERIFICATIONS.labels(outcome, source).inc()
+
+
+def _observe_crypto(operation, seconds):
+    CRYPTO_DURATION.labels(operation, CRYPTO_ALGORITHMS.get(operation, 'other')).observe(seconds)
+
+
+crypto.operation_hooks.append(_observe_crypto)
+
+
+class QueueSizeCollector:
+    """Orders in each queue shared by a role, counted when scraped"""
+
+    def collect(self):
+        sizes = dict(
+            PurchaseOrder.objects.filter(status__in=STATUS_QUEUES.values())
+            .order_by().values_list('status').annotate(Count('id'))
+        )
+        gauge = GaugeMetricFamily(
+            'purchase_order_queue_size', 'Purchase orders in each role queue', labels=['role', 'queue']
+        )
+        for role, status in STATUS_QUEUES.items():
+            gauge.add_metric([role, f'status:{status}'], sizes.get(status, 0))
+        yield gauge
+
+
+queue_registry = CollectorRegistry(auto_describe=False)
+queue_registry.register(QueueSizeCollector())
+
+
+def render_metrics():
+    """Return every metric in the text exposition format"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(queue_registry)
@@ -0,0 +1,92 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from . import metrics
+from .routers import current_request
+from .timing import RequestTimings, current_timings
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRoutingMiddleware:
+    """Expose the request being served to ReplicaRouter, under WSGI and ASGI"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+
+class ServerTimingMiddleware:
+    """
+    Account the time of each request (see timing.py) in its Server-Timing
+    header and the request latency metric, and log requests over
+    SERVER_TIMING_QUERY_BUDGET queries or SERVER_TIMING_LATENCY_BUDGET
+    milliseconds. Streamed responses are timed until they start streaming.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        self.query_budget = getattr(settings, 'SERVER_TIMING_QUERY_BUDGET', None)
+        self.latency_budget = getattr(settings, 'SERVER_TIMING_LATENCY_BUDGET', None)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def finish(self, request, response, timings, total):
+        metrics.observe_request(request, response.status_code, total)
+        header = timings.header(total)
+        if self.header:
+            response['Server-Timing'] = header
+        queries = timings.count('db')
+        over_queries = self.query_budget is not None and queries > self.query_budget
+        over_latency = self.latency_budget is not None and total * 1000 > self.latency_budget
+        if over_queries or over_latency:
+            logger.warning(
+                "%s %s over budget: %.1f ms, %d queries (%s)",
+                request.method, request.path, total * 1000, queries, header
+            )
+        return response
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.2 on 2026-10-17 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_signatures(apps, schema_editor):
+    """Keep only the first signature of each signer on an order, for unique_signature_per_signer"""
+    Signature = apps.get_model('purchase_order', 'Signature')
+    db_alias = schema_editor.connection.alias
+    duplicates = (
+        Signature.objects.using(db_alias).values('purchase_order', 'signer')
+        .annotate(first_id=Min('id'), count=Count('id')).filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        Signature.objects.using(db_alias).filter(
+            purchase_order=duplicate['purchase_order'], signer=duplicate['signer'], id__gt=duplicate['first_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='auditlog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='po_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['purchaser', '-created_at', '-id'], name='po_purchaser_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at', '-id'], name='po_pending_created_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_signatures, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='signature',
+            constraint=models.UniqueConstraint(fields=('purchase_order', 'signer'), name='unique_signature_per_signer'),
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Generated by Django 5.0.2 on 2026-10-17 03:09
+
+import hashlib
+import json
+from datetime import timezone as dt_timezone
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+
+# Copies of purchase_order.integrity as of this migration, so later changes
+# to the live module cannot change what it writes
+GENESIS_HASH = '0' * 64
+BLOCK_SIZE = 1024
+
+
+def entry_digest(prev_hash, sequence, username, action, details, ip_address, timestamp):
+    canonical = json.dumps(
+        [sequence, username, action, details, ip_address, timestamp.astimezone(dt_timezone.utc).isoformat()],
+        separators=(',', ':')
+    )
+    return hashlib.sha256((prev_hash + canonical).encode('utf-8')).hexdigest()
+
+
+def merkle_levels(entry_hashes):
+    levels = [[hashlib.sha256(b'\x00' + bytes.fromhex(entry_hash)).digest() for entry_hash in entry_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [hashlib.sha256(b'\x01' + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def chain_existing_entries(apps, schema_editor):
+    """
+    Snapshot the usernames of the audit log entries written before hash
+    chaining and chain them, oldest first, with a checkpoint and its inner
+    Merkle nodes for every completed block.
+    """
+    AuditLog = apps.get_model('purchase_order', 'AuditLog')
+    AuditChainHead = apps.get_model('purchase_order', 'AuditChainHead')
+    AuditCheckpoint = apps.get_model('purchase_order', 'AuditCheckpoint')
+    AuditMerkleNode = apps.get_model('purchase_order', 'AuditMerkleNode')
+
+    sequence = 0
+    prev_hash = GENESIS_HASH
+    block_hashes = []
+    last = None
+
+    # Walk the log in keyset chunks so the update never runs under an open cursor
+    while True:
+        entries = AuditLog.objects.select_related('user').order_by('timestamp', 'id')
+        if last is not None:
+            entries = entries.filter(Q(timestamp__gt=last.timestamp) | Q(timestamp=last.timestamp, id__gt=last.id))
+        chunk = list(entries[:2000])
+        if not chunk:
+            break
+
+        for entry in chunk:
+            sequence += 1
+            entry.username = entry.user.username if entry.user_id is not None else ''
+            entry.sequence = sequence
+            entry.prev_hash = prev_hash
+            entry.entry_hash = entry_digest(
+                prev_hash, sequence, entry.username, entry.action, entry.details, entry.ip_address, entry.timestamp
+            )
+            prev_hash = entry.entry_hash
+            block_hashes.append(entry.entry_hash)
+
+            if len(block_hashes) == BLOCK_SIZE:
+                levels = merkle_levels(block_hashes)
+                checkpoint = AuditCheckpoint.objects.create(
+                    block=(sequence - 1) // BLOCK_SIZE,
+                    first_sequence=sequence - BLOCK_SIZE + 1,
+                    last_sequence=sequence,
+                    merkle_root=levels[-1][0].hex(),
+                    last_entry_hash=prev_hash
+                )
+                AuditMerkleNode.objects.bulk_create([
+                    AuditMerkleNode(checkpoint=checkpoint, level=level, position=position, hash=node.hex())
+                    for level, nodes in enumerate(levels[:-1]) if level > 0
+                    for position, node in enumerate(nodes)
+                ])
+                block_hashes = []
+
+        AuditLog.objects.bulk_update(chunk, ['username', 'sequence', 'prev_hash', 'entry_hash'])
+        last = chunk[-1]
+
+    AuditChainHead.objects.create(pk=1, sequence=sequence, entry_hash=prev_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_order', '0003_auditlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.BigIntegerField(default=0)),
+                ('entry_hash', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuditCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block', models.BigIntegerField(unique=True)),
+                ('first_sequence', models.BigIntegerField()),
+                ('last_sequence', models.BigIntegerField()),
+                ('merkle_root', models.CharField(max_length=64)),
+                ('last_entry_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuditMerkleNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('position', models.IntegerField()),
+                ('hash', models.CharField(max_length=64)),
+                ('checkpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nodes', to='purchase_order.auditcheckpoint')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='auditmerklenode',
+            constraint=models.UniqueConstraint(fields=('checkpoint', 'level', 'position'), name='unique_merkle_node'),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='username',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='entry_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='prev_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='sequence',
+            field=models.BigIntegerField(editable=False, null=True, unique=True),
+        ),
+        # Reversing drops the chain tables and columns, so there is nothing to undo
+        migrations.RunPython(chain_existing_entries, migrations.RunPython.noop),
+    ]
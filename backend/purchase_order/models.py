@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .signing import signing_payload
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -29,6 +31,24 @@ class PurchaseOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Role queues: filter(status=...) paged on (created_at, id)
+            models.Index(fields=['status', '-created_at', '-id'], name='po_status_created_idx'),
+            # Purchaser's own orders paged on (created_at, id)
+            models.Index(fields=['purchaser', '-created_at', '-id'], name='po_purchaser_created_idx'),
+            # The supervisor queue is the hottest list, keep a small index for it alone
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='po_pending_created_idx',
+                condition=models.Q(status='pending')
+            ),
+        ]
+    
+    def signing_payload(self, status=None):
+        """Canonical bytes and digest signed to move this order to status"""
+        return signing_payload(self, status)
+    
     def __str__(self):
         return f"PO-{self.order_number} - {self.status}"
 
@@ -39,15 +59,74 @@ class Signature(models.Model):
     hash = models.TextField()  # Hash of the purchase order that was signed
     timestamp = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            # Also serves the duplicate-signature check as an index probe
+            models.UniqueConstraint(fields=['purchase_order', 'signer'], name='unique_signature_per_signer'),
+        ]
+    
     def __str__(self):
         return f"Signature by {self.signer.username} for PO-{self.purchase_order.order_number}"
 
 class AuditLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='audit_logs')
+    # The user's username when the entry was written. The chain hashes this
+    # instead of user_id, so deleting the user leaves the entry valid.
+    username = models.CharField(max_length=150, blank=True, editable=False)
     action = models.CharField(max_length=100)
     details = models.TextField(null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the entry is logged, not when the buffered entry is written
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    # Position in the hash chain and the chain hashes (see integrity.py)
+    sequence = models.BigIntegerField(null=True, unique=True, editable=False)
+    prev_hash = models.CharField(max_length=64, blank=True, editable=False)
+    entry_hash = models.CharField(max_length=64, blank=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='auditlog_timestamp_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} by {self.username or 'Unknown'} at {self.timestamp}"
+
+class AuditChainHead(models.Model):
+    """Single row holding the tip of the audit log hash chain"""
+    sequence = models.BigIntegerField(default=0)
+    entry_hash = models.CharField(max_length=64)
+    
+    def __str__(self):
+        return f"Audit chain head at {self.sequence}"
+
+class AuditCheckpoint(models.Model):
+    """Merkle root over one fixed-size block of chained audit entries"""
+    block = models.BigIntegerField(unique=True)
+    first_sequence = models.BigIntegerField()
+    last_sequence = models.BigIntegerField()
+    merkle_root = models.CharField(max_length=64)
+    last_entry_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Audit checkpoint {self.block} ({self.first_sequence}-{self.last_sequence})"
+
+class AuditMerkleNode(models.Model):
+    """
+    Inner node of a checkpoint's Merkle tree. Leaves are the entries' own
+    hashes and the root is on the checkpoint, so an inclusion proof reads
+    one node per level instead of the whole block.
+    """
+    checkpoint = models.ForeignKey(AuditCheckpoint, on_delete=models.CASCADE, related_name='nodes')
+    # Leaves are level 0
+    level = models.PositiveSmallIntegerField()
+    position = models.IntegerField()
+    hash = models.CharField(max_length=64)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['checkpoint', 'level', 'position'], name='unique_merkle_node'),
+        ]
     
     def __str__(self):
-        return f"{self.action} by {self.user.username if self.user else 'Unknown'} at {self.timestamp}"
\ No newline at end of file
+        return f"Merkle node {self.level}/{self.position} of checkpoint {self.checkpoint_id}"
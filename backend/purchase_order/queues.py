@@ -0,0 +1,177 @@
+"""
+Role queue versions and the shared queue page cache.
+
+Each role sees one queue of purchase orders: supervisors share the pending
+queue, the purchasing department shares the approved queue, and every
+purchaser has their own orders. Each queue has a version in the Django cache
+that is bumped after any change to an order in it commits, so a response
+validator or cache key built on the version goes stale exactly when the
+queue does.
+
+Pages of the queues shared by a whole role are also cached, serialized,
+under the queue's current version, so a bump invalidates every cached page
+of that queue at once and stale pages simply age out.
+"""
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import PurchaseOrder, Signature
+from .routers import reads_from_replica, replica_lag
+
+# Queues shared by every user of a role, by the order status they list
+STATUS_QUEUES = {'supervisor': 'pending', 'purchasing_dept': 'approved'}
+# The status an order leaves when it moves to a status
+PREVIOUS_STATUS = {'approved': 'pending', 'rejected': 'pending', 'processed': 'approved'}
+
+
+def _cache_key(queue):
+    return f'purchase_order:queue:{queue}'
+
+
+def queue_for(role, user_id):
+    """Return the name of the queue a user with role sees, or None"""
+    if role == 'purchaser':
+        return f'purchaser:{user_id}'
+    if role in STATUS_QUEUES:
+        return f'status:{STATUS_QUEUES[role]}'
+    return None
+
+
+def queues_of(status, purchaser_id):
+    """Return the queues an order with status and purchaser is, or just was, listed in"""
+    queues = {f'purchaser:{purchaser_id}', f'status:{status}'}
+    if status in PREVIOUS_STATUS:
+        queues.add(f'status:{PREVIOUS_STATUS[status]}')
+    return queues
+
+
+def queue_version(queue):
+    key = _cache_key(queue)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so versions are not reused after a cache flush
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aqueue_version(queue):
+    """Async version of queue_version, for async views"""
+    key = _cache_key(queue)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_queues(queues):
+    """Bump queue versions once the current transaction commits"""
+    queues = set(queues)
+
+    def bump():
+        # Versions are only compared for equality, so a fresh clock value
+        # avoids a read-modify-write that concurrent bumps could lose on
+        # backends without an atomic incr
+        version = time.time_ns()
+        cache.set_many({_cache_key(queue): version for queue in queues}, timeout=None)
+    transaction.on_commit(bump)
+
+
+def bump_order_queues(orders):
+    """Bump the queues of (status, purchaser_id) pairs, e.g. after a bulk .update()"""
+    queues = set()
+    for status, purchaser_id in orders:
+        queues |= queues_of(status, purchaser_id)
+    bump_queues(queues)
+
+
+class QueuePageCache:
+    """Serialized pages of the shared role queues, with hit and miss counters"""
+
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_shared(queue):
+        return queue is not None and queue.startswith('status:')
+
+    @staticmethod
+    def key(queue, version, variant):
+        """Cache key of one page; variant is everything besides the queue that shapes it"""
+        digest = hashlib.sha256(repr(variant).encode('utf-8')).hexdigest()[:32]
+        return f'purchase_order:queue_page:{queue}:{version}:{digest}'
+
+    def get(self, key):
+        return self._count(cache.get(key))
+
+    async def aget(self, key):
+        return self._count(await cache.aget(key))
+
+    def set(self, key, entry):
+        cache.set(key, entry, self._timeout())
+
+    async def aset(self, key, entry):
+        await cache.aset(key, entry, self._timeout())
+
+    def _timeout(self):
+        # A page read from a lagging replica may predate the version it is
+        # stored under, so it must not outlive the lag
+        if reads_from_replica(PurchaseOrder):
+            return min(self.timeout, replica_lag())
+        return self.timeout
+
+    def _count(self, entry):
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def clear_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Return this process's counters as a dictionary"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'timeout': self.timeout
+            }
+
+
+queue_page_cache = QueuePageCache(timeout=getattr(settings, 'QUEUE_CACHE_TIMEOUT', 60))
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@receiver(post_delete, sender=PurchaseOrder)
+def _order_changed(sender, instance, **kwargs):
+    bump_queues(queues_of(instance.status, instance.purchaser_id))
+
+
+@receiver(post_save, sender=Signature)
+@receiver(post_delete, sender=Signature)
+def _signature_changed(sender, instance, **kwargs):
+    # Signatures are part of an order's representation. The views create them
+    # with the order at hand, so the lookup is only needed for other writers.
+    if Signature.purchase_order.is_cached(instance):
+        order = instance.purchase_order
+        bump_queues(queues_of(order.status, order.purchaser_id))
+        return
+    order = PurchaseOrder.objects.filter(pk=instance.purchase_order_id).values_list('status', 'purchaser_id').first()
+    if order is not None:
+        bump_queues(queues_of(*order))
@@ -0,0 +1,134 @@
+"""
+Fast read path for list endpoints.
+
+A reader produces the same representation as a ModelSerializer straight from
+.values() rows. The serializer's fields are compiled once per response into
+one mapper per field, so no serializer field instances or OrderedDicts are
+built per row, and the result renders to the same JSON byte for byte.
+"""
+from operator import itemgetter
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from .models import Signature
+from .serializers import PurchaseOrderSerializer, SignatureSerializer, AuditLogSerializer
+
+# Fields whose to_representation returns plain .values() data unchanged
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField)
+
+
+class ValuesReader:
+    serializer_class = None
+
+    def __init__(self, fields=None):
+        self.columns = []
+        self.mappers = []
+        for name, field in self.serializer_class().fields.items():
+            if fields is not None and name not in fields:
+                continue
+            columns, mapper = self.compile(field)
+            self.columns.extend(column for column in columns if column not in self.columns)
+            self.mappers.append((name, mapper))
+
+    def compile(self, field, prefix=''):
+        """Return the columns a field reads and a mapper from a row to its representation"""
+        if isinstance(field, serializers.BaseSerializer):
+            return self.compile_related(field, prefix)
+
+        column = prefix + field.source
+        if isinstance(field, IDENTITY_FIELDS):
+            return [column], itemgetter(column)
+
+        if isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone'):
+            # Resolve the current timezone once per response rather than per value
+            field.timezone = field.default_timezone()
+        to_representation = field.to_representation
+
+        def mapper(row):
+            value = row[column]
+            return None if value is None else to_representation(value)
+        return [column], mapper
+
+    def compile_related(self, field, prefix):
+        """Nested serializer over a foreign key, read through the join"""
+        if isinstance(field, serializers.ListSerializer):
+            # Many-valued relations need a reader that loads them per page,
+            # as PurchaseOrderReader does for signatures
+            raise ImproperlyConfigured(f"{type(self).__name__} cannot read {field.field_name}")
+
+        prefix = f'{prefix}{field.source}__'
+        pk_column = f'{prefix}id'
+        columns = [pk_column]
+        mappers = []
+        for name, child in field.fields.items():
+            child_columns, child_mapper = self.compile(child, prefix)
+            columns.extend(column for column in child_columns if column not in columns)
+            mappers.append((name, child_mapper))
+
+        def mapper(row):
+            if row[pk_column] is None:
+                return None
+            return {name: child_mapper(row) for name, child_mapper in mappers}
+        return columns, mapper
+
+    def values(self, queryset, *extra):
+        """Return queryset as .values() rows with the columns this reader needs, plus extra"""
+        columns = self.columns + [column for column in extra if column not in self.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def prepare(self, rows):
+        """Hook to load data for a whole page of rows before they are mapped"""
+
+    async def aprepare(self, rows):
+        """Async version of prepare, for async views"""
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        return self._map(rows)
+
+    async def aserialize(self, rows):
+        rows = list(rows)
+        await self.aprepare(rows)
+        return self._map(rows)
+
+    def _map(self, rows):
+        mappers = self.mappers
+        return [{name: mapper(row) for name, mapper in mappers} for row in rows]
+
+
+class SignatureReader(ValuesReader):
+    serializer_class = SignatureSerializer
+
+
+class PurchaseOrderReader(ValuesReader):
+    serializer_class = PurchaseOrderSerializer
+
+    def compile_related(self, field, prefix):
+        if field.field_name != 'signatures':
+            return super().compile_related(field, prefix)
+
+        # Signatures are read in one extra query per page, in prepare()
+        self.signature_reader = SignatureReader()
+        self.signatures = {}
+        return ['id'], lambda row: self.signatures.get(row['id'], [])
+
+    def prepare(self, rows):
+        if hasattr(self, 'signature_reader'):
+            self._attach_signatures(list(self._signature_rows(rows)))
+
+    async def aprepare(self, rows):
+        if hasattr(self, 'signature_reader'):
+            self._attach_signatures([row async for row in self._signature_rows(rows)])
+
+    def _signature_rows(self, rows):
+        signatures = Signature.objects.filter(purchase_order_id__in=[row['id'] for row in rows]).order_by('id')
+        return self.signature_reader.values(signatures, 'purchase_order_id')
+
+    def _attach_signatures(self, signature_rows):
+        self.signatures = {}
+        for row, data in zip(signature_rows, self.signature_reader.serialize(signature_rows)):
+            self.signatures.setdefault(row['purchase_order_id'], []).append(data)
+
+
+class AuditLogReader(ValuesReader):
+    serializer_class = AuditLogSerializer
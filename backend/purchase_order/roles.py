@@ -0,0 +1,129 @@
+from collections import namedtuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import UserProfile
+
+# primary_group is the group with the lowest id, as user.groups.first() returns
+UserRoles = namedtuple('UserRoles', ['role', 'groups', 'public_key', 'primary_group'], defaults=[None])
+
+ROLE_CACHE_TIMEOUT = getattr(settings, 'ROLE_CACHE_TIMEOUT', 300)
+
+
+def _cache_key(user_id):
+    return f'purchase_order:roles:{user_id}'
+
+
+def _roles_query(user):
+    # One query for all: LEFT JOINs yield a row per group, or a single row
+    # with NULL columns when the user has no profile or no groups
+    return (
+        User.objects.filter(pk=user.pk)
+        .values_list('profile__role', 'profile__public_key', 'groups__name')
+        .order_by('groups__id')
+    )
+
+
+def _from_rows(rows):
+    role = None
+    public_key = None
+    groups = []
+    for profile_role, profile_public_key, group_name in rows:
+        role = profile_role
+        public_key = profile_public_key
+        if group_name is not None:
+            groups.append(group_name)
+    return UserRoles(
+        role=role, groups=frozenset(groups), public_key=public_key, primary_group=groups[0] if groups else None
+    )
+
+
+def _to_cache(roles):
+    return {
+        'role': roles.role, 'public_key': roles.public_key, 'groups': sorted(roles.groups),
+        'primary_group': roles.primary_group
+    }
+
+
+def _from_cache(cached):
+    return UserRoles(
+        role=cached['role'], groups=frozenset(cached['groups']), public_key=cached['public_key'],
+        primary_group=cached.get('primary_group')
+    )
+
+
+def resolve_roles(user):
+    """
+    Return the user's UserProfile role and public key, and group names.
+
+    Results are cached per user for ROLE_CACHE_TIMEOUT seconds and dropped
+    whenever the profile or the user's group membership changes.
+    """
+    if not user or not user.is_authenticated:
+        return UserRoles(role=None, groups=frozenset(), public_key=None)
+
+    key = _cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        return _from_cache(cached)
+
+    roles = _from_rows(_roles_query(user))
+    cache.set(key, _to_cache(roles), ROLE_CACHE_TIMEOUT)
+    return roles
+
+
+async def aresolve_roles(user):
+    """Async version of resolve_roles, for async views"""
+    if not user or not user.is_authenticated:
+        return UserRoles(role=None, groups=frozenset(), public_key=None)
+
+    key = _cache_key(user.pk)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return _from_cache(cached)
+
+    roles = _from_rows([row async for row in _roles_query(user)])
+    await cache.aset(key, _to_cache(roles), ROLE_CACHE_TIMEOUT)
+    return roles
+
+
+def get_roles(request):
+    """Return the roles attached to the request, resolving them on first use"""
+    roles = getattr(request, 'roles', None)
+    if roles is None:
+        roles = resolve_roles(request.user)
+        request.roles = roles
+    return roles
+
+
+def invalidate_roles(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def _profile_changed(sender, instance, **kwargs):
+    invalidate_roles(instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+def _user_deleted(sender, instance, **kwargs):
+    invalidate_roles(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear(): instance is the user
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_roles(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        # group.user_set.add/remove(): pk_set holds the affected users
+        for user_id in pk_set:
+            invalidate_roles(user_id)
+    elif action == 'pre_clear':
+        # group.user_set.clear(): the members are only known before the clear
+        for user_id in instance.user_set.values_list('pk', flat=True):
+            invalidate_roles(user_id)
@@ -0,0 +1,116 @@
+"""
+Read replica routing.
+
+Reads of the purchase order models made while serving a safe-method request
+go to one of DATABASE_REPLICAS, picked once per request. Everything else,
+and every write, uses the default (primary) database. A user who writes is
+pinned to the primary for DATABASE_REPLICA_LAG seconds, so their next reads
+see their own changes even if the replicas lag behind.
+
+ReplicaRoutingMiddleware makes the current request available to the router.
+Code running outside a request, such as management commands, always reads
+from the primary, and so does code inside use_primary().
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Models whose reads may be served by a replica, as app_label.model_name
+REPLICATED_MODELS = frozenset({
+    'purchase_order.purchaseorder', 'purchase_order.signature',
+    'purchase_order.auditlog', 'purchase_order.userprofile',
+})
+
+current_request = ContextVar('purchase_order_current_request', default=None)
+_primary_only = ContextVar('purchase_order_primary_only', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def replica_lag():
+    """Seconds a replica may lag behind the primary"""
+    return getattr(settings, 'DATABASE_REPLICA_LAG', 5)
+
+
+def _pin_key(user_id):
+    return f'purchase_order:db_pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary until the replicas have caught up"""
+    cache.set(_pin_key(user_id), True, replica_lag())
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+@contextmanager
+def use_primary():
+    """Read everything from the primary, e.g. where reads must agree with unreplicated tables"""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def _user_id(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in REPLICATED_MODELS or not replicas():
+            return None
+        request = current_request.get()
+        if request is None or request.method not in SAFE_METHODS or _primary_only.get():
+            return None
+
+        # The pin is looked up once per request, after authentication
+        pinned = getattr(request, '_primary_pinned', None)
+        if pinned is None:
+            user_id = _user_id(request)
+            if user_id is not None:
+                pinned = request._primary_pinned = is_pinned(user_id)
+        if pinned:
+            return DEFAULT_DB_ALIAS
+        # One replica per request, so its queries see the same replication point
+        if not hasattr(request, '_replica'):
+            request._replica = random.choice(replicas())
+        return request._replica
+
+    def db_for_write(self, model, **hints):
+        request = current_request.get()
+        if request is not None and not getattr(request, '_primary_pinned', False):
+            user_id = _user_id(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+                request._primary_pinned = True
+        # Never the replica an instance happened to be read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary; a local stand-in
+        # database is migrated explicitly with migrate --database
+        return None
+
+
+def reads_from_replica(model):
+    """Whether reads of model in the current context go to a replica"""
+    return ReplicaRouter().db_for_read(model) not in (None, DEFAULT_DB_ALIAS)
@@ -2,6 +2,18 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import UserProfile, PurchaseOrder, Signature, AuditLog
 
+class SparseFieldsMixin:
+    """
+    Keep only the fields named by the `fields` keyword argument, e.g.
+    PurchaseOrderSerializer(orders, many=True, fields={'id', 'status'})
+    """
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -21,10 +33,15 @@ class SignatureSerializer(serializers.ModelSerializer):
         model = Signature
         fields = ['id', 'signer', 'signature', 'hash', 'timestamp']
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     purchaser = UserSerializer(read_only=True)
     signatures = SignatureSerializer(many=True, read_only=True)
     
+    # List responses default to the summary fields; ?fields= picks others and
+    # ?expand= adds the nested objects
+    summary_fields = ['id', 'order_number', 'vendor', 'amount', 'status', 'created_at', 'updated_at']
+    expandable_fields = ['purchaser', 'signatures']
+    
     class Meta:
         model = PurchaseOrder
         fields = ['id', 'order_number', 'purchaser', 'description', 'amount', 
@@ -50,9 +67,24 @@ class SignPurchaseOrderSerializer(serializers.Serializer):
     signature = serializers.CharField()
     hash = serializers.CharField()
 
+class BulkDecisionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    signature = serializers.CharField()
+    hash = serializers.CharField()
+    decision = serializers.ChoiceField(choices=['approve', 'reject'])
+
+class BulkDecisionSerializer(serializers.Serializer):
+    items = BulkDecisionItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+    def validate_items(self, items):
+        ids = [item['id'] for item in items]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each purchase order may only appear once")
+        return items
+
 class AuditLogSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
         model = AuditLog
-        fields = ['id', 'user', 'action', 'details', 'ip_address', 'timestamp']
\ No newline at end of file
+        fields = ['id', 'user', 'action', 'details', 'ip_address', 'timestamp', 'sequence', 'entry_hash']
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Canonical signing payloads for purchase orders.
+
+A signature covers the order's signed fields plus the status it moves the
+order to, serialized as compact JSON with sorted keys, so clients and the
+server hash exactly the same bytes. Payloads are cached on the instance per
+target status and rebuilt as soon as any signed field changes.
+"""
+import base64
+import hashlib
+import json
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from django.db.backends.utils import format_number
+
+# purchaser_id rather than the username keeps building a payload free of queries
+SIGNED_FIELDS = (
+    'id', 'order_number', 'purchaser_id', 'description', 'amount',
+    'vendor', 'encrypted_details', 'created_at'
+)
+DIGEST_ALGORITHM = 'SHA-256'
+
+SigningPayload = namedtuple('SigningPayload', ['status', 'payload', 'digest'])
+
+
+def _canonical_value(order, name, value):
+    if isinstance(value, datetime):
+        return value.astimezone(dt_timezone.utc).isoformat()
+    if name == 'amount':
+        # Decimal('12.5') and Decimal('12.50') must sign the same
+        field = order._meta.get_field(name)
+        return format_number(field.to_python(value), field.max_digits, field.decimal_places)
+    return value
+
+
+def build_payload(order, status):
+    document = {name: _canonical_value(order, name, getattr(order, name)) for name in SIGNED_FIELDS}
+    document['status'] = status
+    payload = json.dumps(document, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    digest = base64.b64encode(hashlib.sha256(payload).digest()).decode('ascii')
+    return SigningPayload(status, payload, digest)
+
+
+def signing_payload(order, status=None):
+    """Return the cached SigningPayload for moving order to status (default: its current status)"""
+    status = status or order.status
+    signed_values = tuple(getattr(order, name) for name in SIGNED_FIELDS)
+
+    cached = order.__dict__.get('_signing_payloads')
+    if cached is None or cached[0] != signed_values:
+        cached = (signed_values, {})
+        order._signing_payloads = cached
+
+    payloads = cached[1]
+    if status not in payloads:
+        payloads[status] = build_payload(order, status)
+    return payloads[status]
@@ -0,0 +1,118 @@
+"""
+Per-request time accounting, returned in the Server-Timing header.
+
+ServerTimingMiddleware (middleware.py) starts a RequestTimings for every
+request. It then adds a header such as
+
+    Server-Timing: db;dur=4.1;desc="7 queries", crypto;dur=1.2;desc="1 call",
+        serialize;dur=0.8;desc="1 call", render;dur=0.3;desc="1 call", total;dur=9.6
+
+Where each metric comes from:
+
+- db: every SQL query on any connection, through an execute wrapper
+  installed when the connection is made.
+- crypto: CryptoUtils operations, through utils.crypto.operation_hooks.
+- serialize and render: the viewsets, through timed() and
+  ServerTimingMixin.
+
+Metrics may overlap, e.g. serialize includes the queries it triggers.
+
+Outside a request nothing is recorded, and the hooks cost one ContextVar
+lookup.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.backends.signals import connection_created
+from django.template.response import SimpleTemplateResponse
+from utils import crypto
+
+current_timings = ContextVar('purchase_order_current_timings', default=None)
+
+# Server-Timing descriptions: how to name a metric's count
+UNITS = {'db': ('query', 'queries')}
+
+
+class RequestTimings:
+    """Count and total seconds of each metric of one request"""
+
+    def __init__(self):
+        # Async views run queries and crypto calls on other threads
+        self._lock = threading.Lock()
+        self.metrics = {}
+
+    def add(self, name, seconds, count=1):
+        with self._lock:
+            metric = self.metrics.setdefault(name, [0, 0.0])
+            metric[0] += count
+            metric[1] += seconds
+
+    def count(self, name):
+        return self.metrics.get(name, (0, 0.0))[0]
+
+    def seconds(self, name):
+        return self.metrics.get(name, (0, 0.0))[1]
+
+    def header(self, total):
+        """Return the Server-Timing header value, with total in seconds"""
+        parts = []
+        for name, (count, seconds) in self.metrics.items():
+            singular, plural = UNITS.get(name, ('call', 'calls'))
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{count} {singular if count == 1 else plural}"')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to metric name of the current request"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - start)
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _time_crypto(operation, seconds):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add('crypto', seconds)
+
+
+connection_created.connect(install_query_timer)
+crypto.operation_hooks.append(_time_crypto)
+
+
+class ServerTimingMixin:
+    """
+    Viewset mixin that renders responses as soon as they are finalized, so
+    the render metric covers DRF's renderers.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+            with timed('render'):
+                response.render()
+        return response
@@ -0,0 +1,125 @@
+"""
+Table-driven purchase order workflow.
+
+Each Transition names the roles that may make it and the status it moves an
+order from and to. apply() makes it as a compare-and-set, a single
+UPDATE ... WHERE id = %s AND status = %s that writes only status and
+updated_at. Of two concurrent requests for the same order exactly one
+changes it and the other gets a conflict, without either holding a row lock
+while it verifies its signature. The signature and the audit entry are
+written in the same transaction as the update, so a signer who already
+signed the order (see Signature's unique constraint) leaves it unchanged.
+sign() records a signature on its own, or as the approval it makes when a
+supervisor signs.
+"""
+from collections import namedtuple
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import exceptions, status
+from . import metrics
+from .audit import audit_sink
+from .models import PurchaseOrder, Signature, AuditLog
+from .queues import bump_order_queues
+
+Transition = namedtuple('Transition', ['source', 'target', 'roles', 'role_error', 'audit_action'])
+
+TRANSITIONS = {
+    'approve': Transition(
+        'pending', 'approved', ('supervisor',),
+        "Only supervisors can approve purchase orders", "Approved purchase order"
+    ),
+    'reject': Transition(
+        'pending', 'rejected', ('supervisor',),
+        "Only supervisors can reject purchase orders", "Rejected purchase order"
+    ),
+    'process': Transition(
+        'approved', 'processed', ('purchasing_dept', 'purchaser'),
+        "Only purchasing department can process purchase orders", "Processed purchase order"
+    ),
+}
+
+
+class InvalidTransition(exceptions.APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'This purchase order cannot make that transition.'
+
+
+class AlreadySigned(InvalidTransition):
+    default_detail = 'You have already signed this purchase order.'
+
+
+class TransitionConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The purchase order was changed by another request.'
+
+
+def check(action, order, role):
+    """Raise unless a user with role may make the transition on order as loaded"""
+    transition = TRANSITIONS[action]
+    if role not in transition.roles:
+        raise exceptions.PermissionDenied(transition.role_error)
+    if order.status != transition.source:
+        raise InvalidTransition(f"You can only {action} {transition.source} purchase orders")
+
+
+def apply(action, order, user, signature, hash, ip_address=None):
+    """
+    Make the transition, recording the signature and the audit entry.
+
+    Raises TransitionConflict if the order left the source status since it
+    was loaded, and AlreadySigned if user has signed the order before. On
+    success order is updated in place.
+    """
+    transition = TRANSITIONS[action]
+    now = timezone.now()
+    try:
+        _apply(transition, order, user, signature, hash, ip_address, now)
+    except IntegrityError:
+        # The only constraint the transition can violate is one signature per signer
+        if Signature.objects.filter(purchase_order=order, signer=user).exists():
+            raise AlreadySigned()
+        raise
+    order.status = transition.target
+    order.updated_at = now
+    return order
+
+
+def sign(order, user, role, signature, hash, ip_address=None):
+    """
+    Record user's signature on order. A supervisor's signature approves the
+    order through the approve transition, with the same conflict handling;
+    anyone else's leaves its status as it is. Raises AlreadySigned if user
+    has signed the order before.
+    """
+    if role == 'supervisor':
+        return apply('approve', order, user, signature, hash, ip_address)
+    try:
+        with transaction.atomic():
+            Signature.objects.create(purchase_order=order, signer=user, signature=signature, hash=hash)
+    except IntegrityError:
+        if Signature.objects.filter(purchase_order=order, signer=user).exists():
+            raise AlreadySigned()
+        raise
+    return order
+
+
+def _apply(transition, order, user, signature, hash, ip_address, now):
+    with transaction.atomic():
+        changed = PurchaseOrder.objects.filter(pk=order.pk, status=transition.source).update(
+            status=transition.target, updated_at=now
+        )
+        if not changed:
+            metrics.count_conflict(transition.source, transition.target)
+            raise TransitionConflict(f"Purchase order {order.order_number} is no longer {transition.source}")
+
+        Signature.objects.create(purchase_order=order, signer=user, signature=signature, hash=hash)
+        audit_sink.write([AuditLog(
+            user=user,
+            action=transition.audit_action,
+            details=f"{transition.audit_action} {order.order_number}",
+            ip_address=ip_address,
+            timestamp=now
+        )])
+        # .update() sends no post_save to do this
+        bump_order_queues([(transition.target, order.purchaser_id)])
+        metrics.count_transitions(transition.source, transition.target)
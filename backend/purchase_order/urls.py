@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserProfileViewSet, PurchaseOrderViewSet, AuditLogViewSet, reset_database
+from . import async_views
+from .transitions import TRANSITIONS
+from .views import UserProfileViewSet, PurchaseOrderViewSet, AuditLogViewSet, reset_database, queue_cache_stats
 
 router = DefaultRouter()
 router.register(r'profiles', UserProfileViewSet)
@@ -10,4 +12,15 @@ router.register(r'audit-logs', AuditLogViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('reset-database/', reset_database, name='reset-database'),
+    path('queue-cache-stats/', queue_cache_stats, name='queue-cache-stats'),
+    # Async versions of the purchase order reads and workflow actions, for ASGI
+    path('async/purchase-orders/', async_views.order_list, name='async-purchase-order-list'),
+    path('async/purchase-orders/<int:pk>/', async_views.order_detail, name='async-purchase-order-detail'),
+    path('async/purchase-orders/<int:pk>/sign/', async_views.sign, name='async-purchase-order-sign'),
+] + [
+    path(
+        f'async/purchase-orders/<int:pk>/{action}/', async_views.transition, {'action': action},
+        name=f'async-purchase-order-{action}'
+    )
+    for action in TRANSITIONS
 ]
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Server-side verification of purchase order signatures.
+
+A signature is RSA-PSS over the order's canonical signing payload (see
+signing.py), checked with CryptoUtils.verify_signature against the signer's
+UserProfile.public_key. The outcome depends only on the signature, the key
+and the payload, so it is cached under (signature digest, key fingerprint,
+payload digest) and re-checking a stored signature is a cache lookup rather
+than a public key operation.
+
+Async views run verification on crypto_executor, a bounded thread pool, so
+public key operations never block the event loop.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from utils.crypto import CryptoExecutor, CryptoUtils, PublicKeyCache
+from . import metrics
+
+SIGNATURE_CACHE_TIMEOUT = getattr(settings, 'SIGNATURE_VERIFICATION_CACHE_TIMEOUT', 86400)
+
+crypto_executor = CryptoExecutor(getattr(settings, 'CRYPTO_EXECUTOR_WORKERS', None))
+
+
+def _cache_key(signature, public_key_pem, payload_digest):
+    signature_digest = hashlib.sha256(signature.encode('utf-8')).hexdigest()
+    return f'purchase_order:sigverify:{signature_digest}:{PublicKeyCache.fingerprint(public_key_pem)}:{payload_digest}'
+
+
+def _verify(signature, public_key_pem, signing):
+    try:
+        return CryptoUtils.verify_signature(signing.payload, signature, public_key_pem)
+    except (ValueError, TypeError):
+        # Malformed base64 signature or PEM key
+        return False
+
+
+def verify_signatures(checks):
+    """
+    Verify (signature, public_key_pem, signing_payload) triples and return a
+    list of booleans in the same order. The cache is read and written in one
+    round trip each.
+    """
+    keys = [
+        _cache_key(signature, public_key_pem, signing.digest) if public_key_pem else None
+        for signature, public_key_pem, signing in checks
+    ]
+    cached = cache.get_many([key for key in keys if key is not None])
+
+    results = []
+    computed = {}
+    for key, (signature, public_key_pem, signing) in zip(keys, checks):
+        if key is None:
+            results.append(False)
+            metrics.count_verification('no_key', 'none')
+        elif key in cached:
+            results.append(cached[key])
+            metrics.count_verification('valid' if cached[key] else 'invalid', 'cache')
+        else:
+            valid = computed[key] = _verify(signature, public_key_pem, signing)
+            results.append(valid)
+            metrics.count_verification('valid' if valid else 'invalid', 'computed')
+
+    if computed:
+        cache.set_many(computed, SIGNATURE_CACHE_TIMEOUT)
+    return results
+
+
+def verify_signature(signature, public_key_pem, signing):
+    return verify_signatures([(signature, public_key_pem, signing)])[0]
+
+
+async def averify_signatures(checks):
+    """verify_signatures on crypto_executor, for async views"""
+    return await crypto_executor.run(verify_signatures, checks)
+
+
+async def averify_signature(signature, public_key_pem, signing):
+    return (await averify_signatures([(signature, public_key_pem, signing)]))[0]
+
+
+def verify_stored_signatures(order, signatures):
+    """
+    Re-check stored (Signature, public_key_pem) pairs against the order as it
+    is now.
+
+    A stored hash names the payload that was signed. It must still be the
+    digest of the order for one of its statuses; otherwise a signed field has
+    changed since the order was signed and the signature no longer holds.
+    """
+    payloads = {}
+    for status, _ in order._meta.get_field('status').choices:
+        signing = order.signing_payload(status)
+        payloads[signing.digest] = signing
+
+    results = [False] * len(signatures)
+    checks = []
+    positions = []
+    for position, (signature, public_key_pem) in enumerate(signatures):
+        signing = payloads.get(signature.hash)
+        if signing is not None:
+            checks.append((signature.signature, public_key_pem, signing))
+            positions.append(position)
+
+    for position, valid in zip(positions, verify_signatures(checks)):
+        results[position] = valid
+    return results
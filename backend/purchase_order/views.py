@@ -1,17 +1,102 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from .models import UserProfile, PurchaseOrder, Signature, AuditLog
+from .pagination import PurchaseOrderCursorPagination, AuditLogCursorPagination
+from .readers import PurchaseOrderReader, AuditLogReader
+from .conditional import etag_matches, not_modified, set_validators, make_etag
+from .queues import queue_for, queue_version, queue_page_cache, bump_order_queues
+from .audit import audit_sink
+from .export import export_rows, decode_cursor, ndjson_stream, csv_stream
+from . import integrity, metrics, transitions
+from .roles import get_roles
+from .routers import use_primary
+from .timing import ServerTimingMixin, timed
+from .signing import DIGEST_ALGORITHM, SIGNED_FIELDS, signing_payload
+from .verification import verify_signature, verify_signatures, verify_stored_signatures
 from .serializers import (
     UserProfileSerializer, PurchaseOrderSerializer, 
     CreatePurchaseOrderSerializer, SignPurchaseOrderSerializer,
-    AuditLogSerializer
+    BulkDecisionSerializer, AuditLogSerializer
 )
 from utils.crypto import CryptoUtils
+import hmac
 import json
+import logging
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+def visible_orders(role, user):
+    """Return the purchase orders a user with role may see"""
+    if role == 'purchaser':
+        return PurchaseOrder.objects.filter(purchaser=user)
+    if role == 'supervisor':
+        return PurchaseOrder.objects.filter(status='pending')
+    if role == 'purchasing_dept':
+        return PurchaseOrder.objects.filter(status='approved')
+    return PurchaseOrder.objects.none()
+
+def sparse_fields(params, action):
+    """
+    Return the PurchaseOrderSerializer fields selected by ?fields= and
+    ?expand= for a list or retrieve, or None for every field. Lists default
+    to the summary fields.
+    """
+    if action not in ('list', 'retrieve'):
+        return None
+    
+    available = PurchaseOrderSerializer.Meta.fields
+    if 'fields' in params:
+        fields = {name for name in params['fields'].split(',') if name}
+    elif action == 'list':
+        fields = set(PurchaseOrderSerializer.summary_fields)
+    else:
+        fields = set(available)
+    expand = {name for name in params.get('expand', '').split(',') if name}
+    
+    unknown = fields.difference(available)
+    if unknown:
+        raise ParseError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    unknown = expand.difference(PurchaseOrderSerializer.expandable_fields)
+    if unknown:
+        raise ParseError(f"Cannot expand: {', '.join(sorted(unknown))}")
+    return fields | expand
+
+# One aggregate query over the orders a read covers, for its ETag
+ETAG_STATE = {'orders': Count('id', distinct=True), 'updated_at': Max('updated_at'), 'signatures': Count('signatures')}
+
+def read_etag(queue, version, state, variant):
+    """
+    Strong ETag for a read. The orders' latest update and signature count
+    come from ETAG_STATE. The queue version covers changes that leave neither
+    trace, and the variant covers the representation.
+    """
+    return make_etag(
+        queue, version,
+        state['orders'], state['updated_at'] and state['updated_at'].isoformat(), state['signatures'],
+        variant
+    )
+
+def read_variant(request, renderer_format):
+    """Everything besides the data that shapes a read's response"""
+    return (request.build_absolute_uri(request.path), sorted(request.GET.lists()), renderer_format)
+
+def client_ip(request):
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0]
+    return request.META.get('REMOTE_ADDR')
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -19,7 +104,7 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return True
         return request.user and request.user.is_staff
 
-class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
+class UserProfileViewSet(ServerTimingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -36,22 +121,111 @@ class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+class PurchaseOrderViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     serializer_class = PurchaseOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PurchaseOrderCursorPagination
+    # Actions that only fetch an order to change it and never serialize it
+    workflow_actions = ('sign', 'approve', 'reject', 'process', 'signing_payload')
+    # Columns left unread when ?fields= or the list summary leaves them out;
+    # id and created_at are always read for the cursor pagination
+    deferrable_fields = ('order_number', 'purchaser', 'description', 'amount', 'vendor', 
+                         'encrypted_details', 'status', 'updated_at')
     
     def get_queryset(self):
-        user = self.request.user
-        profile = UserProfile.objects.get(user=user)
+        queryset = visible_orders(get_roles(self.request).role, self.request.user)
+        if self.action in self.workflow_actions:
+            return queryset
+        
+        fields = self.get_sparse_fields()
+        if fields is None:
+            fields = PurchaseOrderSerializer.Meta.fields
+        else:
+            # Never read the columns the response leaves out
+            deferred = [name for name in self.deferrable_fields if name not in fields]
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        
+        # Load purchasers, signatures and signers up front so serializing a
+        # page of orders costs a constant number of queries
+        if 'purchaser' in fields:
+            queryset = queryset.select_related('purchaser')
+        if 'signatures' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('signatures', queryset=Signature.objects.select_related('signer').order_by('id'))
+            )
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List orders through the .values() read path instead of
+        PurchaseOrderSerializer. Pages of the queues shared by a whole role
+        are served from queue_page_cache while the queue is unchanged.
+        """
+        queue = self.get_queue()
+        cache_key = None
+        if queue_page_cache.is_shared(queue):
+            # Read the version before the rows, so a page built from rows
+            # that change meanwhile is stored under an already stale version
+            cache_key = queue_page_cache.key(queue, queue_version(queue), self.get_variant())
+            cached = queue_page_cache.get(cache_key)
+            if cached is not None:
+                etag, data = cached
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+                return set_validators(Response(data), etag)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = self.get_etag(queryset)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        if profile.role == 'purchaser':
-            return PurchaseOrder.objects.filter(purchaser=user)
-        elif profile.role == 'supervisor':
-            return PurchaseOrder.objects.filter(status='pending')
-        elif profile.role == 'purchasing_dept':
-            return PurchaseOrder.objects.filter(status='approved')
+        reader = PurchaseOrderReader(fields=self.get_sparse_fields())
+        page = self.paginate_queryset(reader.values(queryset, 'id', 'created_at'))
+        with timed('serialize'):
+            data = reader.serialize(page)
+        response = self.get_paginated_response(data)
+        if cache_key is not None:
+            queue_page_cache.set(cache_key, (etag, response.data))
+        return set_validators(response, etag)
+    
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            # Same lookup errors get_object_or_404 turns into a 404
+            etag = self.get_etag(queryset.filter(pk=kwargs['pk']))
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
         
-        return PurchaseOrder.objects.none()
+        instance = self.get_object()
+        with timed('serialize'):
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag) if etag is not None else response
+    
+    def get_etag(self, queryset):
+        """Return a strong ETag for reading queryset, or None if it is empty"""
+        state = queryset.order_by().aggregate(**ETAG_STATE)
+        if self.action == 'retrieve' and not state['orders']:
+            return None
+        
+        queue = self.get_queue()
+        return read_etag(queue, queue_version(queue) if queue else None, state, self.get_variant())
+    
+    def get_queue(self):
+        return queue_for(get_roles(self.request).role, self.request.user.pk)
+    
+    def get_variant(self):
+        return read_variant(self.request, self.request.accepted_renderer.format)
+    
+    def get_sparse_fields(self):
+        return sparse_fields(self.request.query_params, self.action)
+    
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is PurchaseOrderSerializer:
+            kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -59,9 +233,9 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         return PurchaseOrderSerializer
     
     def create(self, request, *args, **kwargs):
-        profile = UserProfile.objects.get(user=request.user)
+        role = get_roles(request).role
         
-        if profile.role != 'purchaser':
+        if role != 'purchaser':
             return Response(
                 {"detail": "Only purchasers can create purchase orders"}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -72,295 +246,375 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         purchase_order = serializer.save()
         
         # Log the action
-        AuditLog.objects.create(
+        audit_sink.log(
             user=request.user,
             action="Created purchase order",
             details=f"Created purchase order {purchase_order.order_number}",
             ip_address=self.get_client_ip(request)
         )
         
-        return Response(
-            PurchaseOrderSerializer(purchase_order).data, 
-            status=status.HTTP_201_CREATED
-        )
-    
-    @action(detail=True, methods=['post'])
-    def sign(self, request, pk=None):
-        """Sign a purchase order"""
-        try:
-            # For debugging
-            print(f"Sign action called for PO {pk} by {request.user.username}")
-            print(f"Request data: {request.data}")
-            
-            purchase_order = self.get_object()
-            
-            # Check if the user is authorized to sign
-            user_profile = UserProfile.objects.get(user=request.user)
-            print(f"User role: {user_profile.role}")
-            
-            # Check if the user has already signed this purchase order
-            existing_signature = Signature.objects.filter(
-                purchase_order=purchase_order, 
-                signer=request.user
-            ).first()
-            
-            if existing_signature:
-                print(f"User {request.user.username} has already signed this purchase order.")
-                return Response(
-                    {"detail": "You have already signed this purchase order."}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Only purchasers and supervisors can sign
-            if user_profile.role not in ['purchaser', 'supervisor']:
-                print(f"User {request.user.username} is not authorized to sign.")
-                return Response(
-                    {"detail": "You are not authorized to sign purchase orders."}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
-            
-            # Validate the request data
-            serializer = SignPurchaseOrderSerializer(data=request.data)
-            if not serializer.is_valid():
-                print(f"Invalid data: {serializer.errors}")
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Create the signature
-            try:
-                signature = Signature.objects.create(
-                    purchase_order=purchase_order,
-                    signer=request.user,
-                    signature=serializer.validated_data['signature'],
-                    hash=serializer.validated_data['hash']
-                )
-                
-                # Log the action
-                AuditLog.objects.create(
-                    user=request.user,
-                    action=f"signed purchase order {purchase_order.order_number}",
-                    timestamp=timezone.now()
-                )
-                
-                # Update status if signed by supervisor
-                if user_profile.role == 'supervisor':
-                    purchase_order.status = 'approved'
-                    purchase_order.save()
-                    
-                    # Log the approval
-                    AuditLog.objects.create(
-                        user=request.user,
-                        action=f"approved purchase order {purchase_order.order_number}",
-                        timestamp=timezone.now()
-                    )
-                
-                return Response(
-                    {"detail": "Purchase order signed successfully."}, 
-                    status=status.HTTP_200_OK
-                )
-            except Exception as e:
-                print(f"Error creating signature: {e}")
-                return Response(
-                    {"detail": f"Error creating signature: {str(e)}"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-        except Exception as e:
-            print(f"Unexpected error in sign action: {e}")
-            return Response(
-                {"detail": f"An unexpected error occurred: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        with timed('serialize'):
+            data = PurchaseOrderSerializer(purchase_order).data
+        return Response(data, status=status.HTTP_201_CREATED)
     
-    @action(detail=True, methods=['post'])
-    def reject(self, request, pk=None):
+    @action(detail=True, methods=['get'], url_path='signing-payload')
+    def signing_payload(self, request, pk=None):
+        """
+        Return the canonical payload and digest to sign for moving the order
+        to ?status= (default: its current status).
+        """
         purchase_order = self.get_object()
-        profile = UserProfile.objects.get(user=request.user)
-        
-        # Log request data for debugging
-        print(f"Reject action called by {request.user.username} for PO-{purchase_order.order_number}")
-        print(f"Request data: {request.data}")
-        
-        if profile.role != 'supervisor':
+        target_status = request.query_params.get('status', purchase_order.status)
+        if target_status not in dict(PurchaseOrder._meta.get_field('status').choices):
             return Response(
-                {"detail": "Only supervisors can reject purchase orders"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        if purchase_order.status != 'pending':
-            return Response(
-                {"detail": "You can only reject pending purchase orders"}, 
+                {"detail": f"Unknown status: {target_status}"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Create a signature for the rejection
-            serializer = SignPurchaseOrderSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
-            
-            signature = Signature.objects.create(
-                purchase_order=purchase_order,
-                signer=request.user,
-                signature=serializer.validated_data['signature'],
-                hash=serializer.validated_data['hash']
-            )
-            
-            print(f"Rejection signature created: {signature.id}")
-            
-            # Update purchase order status
-            purchase_order.status = 'rejected'
-            purchase_order.save()
-            print(f"Purchase order status updated to 'rejected'")
-            
-            # Log the action
-            AuditLog.objects.create(
-                user=request.user,
-                action="Rejected purchase order",
-                details=f"Rejected purchase order {purchase_order.order_number}",
-                ip_address=self.get_client_ip(request)
-            )
-            
-            return Response(
-                {"detail": "Purchase order rejected successfully"}, 
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            print(f"Error rejecting purchase order: {str(e)}")
-            return Response(
-                {"detail": f"Error rejecting purchase order: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        signing = purchase_order.signing_payload(target_status)
+        return Response({
+            'status': signing.status,
+            'payload': signing.payload.decode('utf-8'),
+            'digest': signing.digest,
+            'algorithm': DIGEST_ALGORITHM
+        })
     
-    @action(detail=True, methods=['post'])
-    def process(self, request, pk=None):
+    @action(detail=True, methods=['get'], url_path='verify-signatures', url_name='verify-signatures')
+    def check_signatures(self, request, pk=None):
+        """Re-check every stored signature against the order as it is now"""
         purchase_order = self.get_object()
-        profile = UserProfile.objects.get(user=request.user)
+        signatures = list(purchase_order.signatures.all())
+        public_keys = dict(
+            UserProfile.objects.filter(user_id__in={signature.signer_id for signature in signatures})
+            .values_list('user_id', 'public_key')
+        )
+        results = verify_stored_signatures(
+            purchase_order, [(signature, public_keys.get(signature.signer_id)) for signature in signatures]
+        )
+        return Response({
+            'valid': all(results),
+            'signatures': [
+                {'id': signature.id, 'signer': signature.signer.username, 'valid': valid}
+                for signature, valid in zip(signatures, results)
+            ]
+        })
+    
+    @action(detail=True, methods=['post'])
+    def sign(self, request, pk=None):
+        """Sign a purchase order"""
+        logger.debug("Sign action called for PO %s by %s", pk, request.user.username)
         
-        # Log request data for debugging
-        print(f"Process action called by {request.user.username} for PO-{purchase_order.order_number}")
-        print(f"Request data: {request.data}")
-        print(f"User role: {profile.role}")
+        purchase_order = self.get_object()
         
-        if profile.role not in ['purchasing_dept', 'purchaser']:
-            return Response(
-                {"detail": "Only purchasing department can process purchase orders"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
+        # Check if the user is authorized to sign
+        role = get_roles(request).role
         
-        if purchase_order.status != 'approved':
+        # Check if the user has already signed this purchase order
+        if Signature.objects.filter(purchase_order=purchase_order, signer=request.user).exists():
+            logger.debug("User %s has already signed PO %s", request.user.username, pk)
             return Response(
-                {"detail": "You can only process approved purchase orders"}, 
+                {"detail": "You have already signed this purchase order."}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Create a signature for the processing
-            serializer = SignPurchaseOrderSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
-            
-            signature = Signature.objects.create(
-                purchase_order=purchase_order,
-                signer=request.user,
-                signature=serializer.validated_data['signature'],
-                hash=serializer.validated_data['hash']
-            )
-            
-            print(f"Processing signature created: {signature.id}")
-            
-            # Update purchase order status
-            purchase_order.status = 'processed'
-            purchase_order.save()
-            print(f"Purchase order status updated to 'processed'")
-            
-            # Log the action
-            AuditLog.objects.create(
-                user=request.user,
-                action="Processed purchase order",
-                details=f"Processed purchase order {purchase_order.order_number}",
-                ip_address=self.get_client_ip(request)
-            )
-            
-            return Response(
-                {"detail": "Purchase order processed successfully"}, 
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            print(f"Error processing purchase order: {str(e)}")
+        # Only purchasers and supervisors can sign
+        if role not in ['purchaser', 'supervisor']:
+            logger.debug("User %s is not authorized to sign", request.user.username)
             return Response(
-                {"detail": f"Error processing purchase order: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"detail": "You are not authorized to sign purchase orders."}, 
+                status=status.HTTP_403_FORBIDDEN
             )
+        
+        # A supervisor's signature approves the order
+        if role == 'supervisor':
+            transitions.check('approve', purchase_order, role)
+        target_status = 'approved' if role == 'supervisor' else purchase_order.status
+        error = self.verify_request_signature(request, purchase_order, target_status)
+        if error is not None:
+            return error
+        
+        serializer = SignPurchaseOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transitions.sign(
+            purchase_order, request.user, role,
+            signature=serializer.validated_data['signature'],
+            hash=serializer.validated_data['hash'],
+            ip_address=self.get_client_ip(request)
+        )
+        audit_sink.log(
+            user=request.user,
+            action=f"signed purchase order {purchase_order.order_number}"
+        )
+        
+        return Response(
+            {"detail": "Purchase order signed successfully."}, 
+            status=status.HTTP_200_OK
+        )
+    
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        return self.transition(request, 'reject')
+    
+    @action(detail=True, methods=['post'])
+    def process(self, request, pk=None):
+        return self.transition(request, 'process')
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
+        return self.transition(request, 'approve')
+    
+    def transition(self, request, action):
+        """Make one of transitions.TRANSITIONS on the order, signed by the requesting user"""
         purchase_order = self.get_object()
-        profile = UserProfile.objects.get(user=request.user)
+        transitions.check(action, purchase_order, get_roles(request).role)
+        
+        target_status = transitions.TRANSITIONS[action].target
+        error = self.verify_request_signature(request, purchase_order, target_status)
+        if error is not None:
+            return error
         
-        # Log request data for debugging
-        print(f"Approve action called by {request.user.username} for PO-{purchase_order.order_number}")
-        print(f"Request data: {request.data}")
+        serializer = SignPurchaseOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transitions.apply(
+            action, purchase_order, request.user,
+            signature=serializer.validated_data['signature'],
+            hash=serializer.validated_data['hash'],
+            ip_address=self.get_client_ip(request)
+        )
+        return Response(
+            {"detail": f"Purchase order {target_status} successfully"}, 
+            status=status.HTTP_200_OK
+        )
+    
+    @action(detail=False, methods=['post'], url_path='bulk-decision')
+    def bulk_decision(self, request):
+        """Approve or reject many pending purchase orders in one request"""
+        role = get_roles(request).role
         
-        if profile.role != 'supervisor':
+        if role != 'supervisor':
             return Response(
-                {"detail": "Only supervisors can approve purchase orders"}, 
+                {"detail": "Only supervisors can approve or reject purchase orders"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        if purchase_order.status != 'pending':
-            return Response(
-                {"detail": "You can only approve pending purchase orders"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = BulkDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
         
-        try:
-            # Create a signature for the approval
-            serializer = SignPurchaseOrderSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+        new_status = {'approve': 'approved', 'reject': 'rejected'}
+        audit_action = {'approve': 'Approved purchase order', 'reject': 'Rejected purchase order'}
+        ip_address = self.get_client_ip(request)
+        results = []
+        
+        with transaction.atomic():
+            # Lock the requested rows so the status checks below hold until commit
+            orders = {
+                order['id']: order for order in
+                PurchaseOrder.objects.select_for_update()
+                .filter(id__in=[item['id'] for item in items])
+                .values('status', *SIGNED_FIELDS)
+            }
             
-            signature = Signature.objects.create(
-                purchase_order=purchase_order,
-                signer=request.user,
-                signature=serializer.validated_data['signature'],
-                hash=serializer.validated_data['hash']
-            )
+            valid_signatures = {}
+            if getattr(settings, 'SIGNATURE_VERIFICATION_REQUIRED', True):
+                public_key = get_roles(request).public_key
+                checked = [item for item in items if orders.get(item['id'], {}).get('status') == 'pending']
+                checks = [
+                    (item['signature'], public_key, signing_payload(
+                        PurchaseOrder(**{field: orders[item['id']][field] for field in SIGNED_FIELDS}),
+                        new_status[item['decision']]
+                    ))
+                    for item in checked
+                ]
+                for item, (_, _, signing), valid in zip(checked, checks, verify_signatures(checks)):
+                    valid_signatures[item['id']] = valid and item['hash'] == signing.digest
             
-            print(f"Approval signature created: {signature.id}")
+            accepted = {'approve': [], 'reject': []}
+            for item in items:
+                order = orders.get(item['id'])
+                if order is None:
+                    results.append({"id": item['id'], "status": "error", "detail": "Purchase order not found"})
+                elif order['status'] != 'pending':
+                    results.append({
+                        "id": item['id'],
+                        "status": "error",
+                        "detail": f"You can only {item['decision']} pending purchase orders"
+                    })
+                elif not valid_signatures.get(item['id'], True):
+                    results.append({"id": item['id'], "status": "error", "detail": "Invalid signature"})
+                else:
+                    accepted[item['decision']].append(item)
+                    results.append({"id": item['id'], "status": new_status[item['decision']]})
             
-            # Update purchase order status
-            purchase_order.status = 'approved'
-            purchase_order.save()
-            print(f"Purchase order status updated to 'approved'")
+            now = timezone.now()
+            for decision, decided in accepted.items():
+                if decided:
+                    PurchaseOrder.objects.filter(
+                        id__in=[item['id'] for item in decided], status='pending'
+                    ).update(status=new_status[decision], updated_at=now)
+                    metrics.count_transitions('pending', new_status[decision], len(decided))
             
-            # Log the action
-            AuditLog.objects.create(
-                user=request.user,
-                action="Approved purchase order",
-                details=f"Approved purchase order {purchase_order.order_number}",
-                ip_address=self.get_client_ip(request)
-            )
-            
-            return Response(
-                {"detail": "Purchase order approved successfully"}, 
-                status=status.HTTP_200_OK
+            decided = accepted['approve'] + accepted['reject']
+            # .update() and bulk_create() send no signals to do this
+            bump_order_queues(
+                (new_status[item['decision']], orders[item['id']]['purchaser_id']) for item in decided
             )
-        except Exception as e:
-            print(f"Error approving purchase order: {str(e)}")
+            Signature.objects.bulk_create([
+                Signature(
+                    purchase_order_id=item['id'],
+                    signer=request.user,
+                    signature=item['signature'],
+                    hash=item['hash']
+                )
+                for item in decided
+            ])
+            # Chained in this transaction, so the audit entries commit or roll
+            # back with the decisions they record
+            audit_sink.write([
+                AuditLog(
+                    user=request.user,
+                    action=audit_action[item['decision']],
+                    details=f"{audit_action[item['decision']]} {orders[item['id']]['order_number']}",
+                    ip_address=ip_address,
+                    timestamp=now
+                )
+                for item in decided
+            ])
+        
+        return Response({"results": results}, status=status.HTTP_200_OK)
+    
+    def verify_request_signature(self, request, purchase_order, target_status):
+        """
+        Check the posted signature and hash against the order's signing payload
+        for target_status. Returns an error response, or None if they hold.
+        """
+        serializer = SignPurchaseOrderSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not getattr(settings, 'SIGNATURE_VERIFICATION_REQUIRED', True):
+            return None
+        
+        signing = purchase_order.signing_payload(target_status)
+        if serializer.validated_data['hash'] != signing.digest:
             return Response(
-                {"detail": f"Error approving purchase order: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"detail": "Hash does not match the purchase order's signing payload"}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
+        if not verify_signature(serializer.validated_data['signature'], get_roles(request).public_key, signing):
+            return Response({"detail": "Invalid signature"}, status=status.HTTP_400_BAD_REQUEST)
+        return None
     
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return client_ip(request)
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(ServerTimingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all().order_by('-timestamp')
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = AuditLogCursorPagination
+    
+    export_content_types = {
+        'ndjson': ('application/x-ndjson', ndjson_stream),
+        'csv': ('text/csv', csv_stream),
+    }
+    
+    def list(self, request, *args, **kwargs):
+        """List entries through the .values() read path instead of AuditLogSerializer"""
+        reader = AuditLogReader()
+        page = self.paginate_queryset(reader.values(self.filter_queryset(self.get_queryset()), 'id', 'timestamp'))
+        with timed('serialize'):
+            data = reader.serialize(page)
+        return self.get_paginated_response(data)
+    
+    def filter_by_params(self, queryset):
+        """Apply the since, until and user query parameters"""
+        params = self.request.query_params
+        for param, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lt')):
+            value = params.get(param)
+            if value is None:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ParseError(f"{param} must be an ISO 8601 datetime")
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            queryset = queryset.filter(**{lookup: parsed})
+        
+        user_id = params.get('user')
+        if user_id is not None:
+            if not user_id.isdigit():
+                raise ParseError("user must be a user id")
+            queryset = queryset.filter(user_id=int(user_id))
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream audit logs oldest first as NDJSON (default) or CSV.
+        
+        Query parameters: output=ndjson|csv, since and until (ISO 8601),
+        user (user id) and cursor (resume after the row that carried it).
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.export_content_types:
+            return Response(
+                {"detail": "output must be one of: ndjson, csv"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_by_params(AuditLog.objects.all())
+        # Pick the database now: the rows are read while the response streams,
+        # after the request has left the middleware that routing relies on
+        queryset = queryset.using(queryset.db)
+        
+        after = None
+        if 'cursor' in request.query_params:
+            try:
+                after = decode_cursor(request.query_params['cursor'])
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        content_type, stream = self.export_content_types[output]
+        response = StreamingHttpResponse(stream(export_rows(queryset, after=after)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="audit-log.{output}"'
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def verify(self, request, pk=None):
+        """Check one entry against the hash chain and its block's checkpoint"""
+        # Checkpoints and the chain head are not replicated
+        with use_primary():
+            return Response(integrity.verify_entry(self.get_object()))
+    
+    @action(detail=False, methods=['get'], url_path='verify-range')
+    def verify_range(self, request):
+        """
+        Check the stretch of the hash chain covering the entries selected by
+        since, until and user.
+        """
+        with use_primary():
+            return Response(integrity.verify_range(self.filter_by_params(AuditLog.objects.all())))
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def queue_cache_stats(request):
+    """Hit and miss counters of this worker's shared queue page cache"""
+    return Response(queue_page_cache.info())
+
+@require_GET
+def prometheus_metrics(request):
+    """
+    Metrics of every worker in the Prometheus text format (see metrics.py).
+    Scrapers send METRICS_TOKEN as a bearer token. Without a token the
+    endpoint is only open with DEBUG.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render_metrics(), content_type=metrics.CONTENT_TYPE_LATEST)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -370,12 +624,11 @@ def reset_database(request):
     Only accessible to supervisors.
     """
     # Check if the user is a supervisor
-    try:
-        profile = UserProfile.objects.get(user=request.user)
-        if profile.role != 'supervisor':
-            return Response({'error': 'Only supervisors can reset the database'}, status=403)
-    except UserProfile.DoesNotExist:
+    role = get_roles(request).role
+    if role is None:
         return Response({'error': 'User profile not found'}, status=404)
+    if role != 'supervisor':
+        return Response({'error': 'Only supervisors can reset the database'}, status=403)
     
     # Check for confirmation
     if not request.data.get('confirm', False):
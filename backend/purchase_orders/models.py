@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 import json
+from purchase_order.signing import signing_payload
 
 class PurchaseOrder(models.Model):
     STATUS_CHOICES = [
@@ -57,5 +58,9 @@ class PurchaseOrder(models.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+    def signing_payload(self, status=None):
+        """Canonical bytes and digest signed to move this order to status."""
+        return signing_payload(self, status)
+
     def __str__(self):
         return f"PO-{self.order_number} ({self.status})" 
\ No newline at end of file
@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from .models import PurchaseOrder
 from .serializers import PurchaseOrderSerializer
 from crypto_utils import CryptoUtils, get_user_private_key, get_user_public_key
+from purchase_order.roles import get_roles
 import base64
 from datetime import datetime
 
@@ -29,10 +30,11 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
     def sign(self, request, pk=None):
         order = self.get_object()
         user = request.user
+        primary_group = get_roles(request).primary_group
         
         try:
             # Get the current order state for signing
-            order_state = order.to_dict()
+            order_state = order.signing_payload().payload
             
             # Verify the signature
             signature = base64.b64decode(request.data.get('signature', ''))
@@ -52,7 +54,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
             # Create signature object
             signature_obj = {
                 'user': user.username,
-                'role': user.groups.first().name if user.groups.exists() else 'unknown',
+                'role': primary_group or 'unknown',
                 'signature': request.data.get('signature'),
                 'hash': request.data.get('hash'),
                 'timestamp': timestamp
@@ -80,7 +82,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Check if user is a supervisor
-        if not user.groups.filter(name='Supervisor').exists():
+        if 'Supervisor' not in get_roles(request).groups:
             return Response(
                 {"error": "Only supervisors can approve orders"},
                 status=status.HTTP_403_FORBIDDEN
@@ -88,8 +90,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         
         try:
             # Get the current order state for signing
-            order_state = order.to_dict()
-            order_state['status'] = 'approved'  # Update status for signature verification
+            order_state = order.signing_payload('approved').payload
             
             # Verify the signature
             signature = base64.b64decode(request.data.get('signature', ''))
@@ -140,7 +141,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Check if user is from purchasing department
-        if not user.groups.filter(name='Purchasing Department').exists():
+        if 'Purchasing Department' not in get_roles(request).groups:
             return Response(
                 {"error": "Only purchasing department can process orders"},
                 status=status.HTTP_403_FORBIDDEN
@@ -148,8 +149,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         
         try:
             # Get the current order state for signing
-            order_state = order.to_dict()
-            order_state['status'] = 'processed'  # Update status for signature verification
+            order_state = order.signing_payload('processed').payload
             
             # Verify the signature
             signature = base64.b64decode(request.data.get('signature', ''))
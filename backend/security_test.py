@@ -1,348 +0,0 @@
-import requests
-import json
-import base64
-from datetime import datetime
-import logging
-import os
-from crypto_utils import CryptoUtils, setup_user_keys, get_user_private_key, get_user_public_key
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('security_test_results.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-
-BASE_URL = 'http://localhost:8000'
-
-def setup_test_keys():
-    """Set up RSA keys for test users if they don't exist."""
-    test_users = ['purchaser1', 'supervisor1', 'purchasing_dept1']
-    keys_dir = os.path.join(os.path.dirname(__file__), 'keys')
-    os.makedirs(keys_dir, exist_ok=True)
-    
-    for username in test_users:
-        try:
-            setup_user_keys(username)
-            logging.info(f"Generated RSA keys for {username}")
-        except Exception as e:
-            logging.error(f"Error generating keys for {username}: {str(e)}")
-
-def test_authentication():
-    logging.info("\n=== Testing Authentication ===")
-    
-    # Test invalid login
-    response = requests.post(f"{BASE_URL}/api/token/", 
-                           json={"username": "wrong", "password": "wrong"})
-    logging.info(f"Invalid login test: {'[PASSED]' if response.status_code == 400 else '[FAILED]'}")
-
-    # Test valid login for each role with correct credentials
-    users = [
-        ("purchaser1", "meetpatel123"),
-        ("supervisor1", "meetpatel123"),
-        ("purchasing_dept1", "meetpatel123")
-    ]
-    
-    tokens = {}
-    for username, password in users:
-        try:
-            response = requests.post(f"{BASE_URL}/api/token/", 
-                                   json={"username": username, "password": password})
-            response_data = response.json()
-            
-            success = response.status_code == 200 and 'token' in response_data
-            logging.info(f"Valid login test ({username}): {'[PASSED]' if success else '[FAILED]'}")
-            
-            if success:
-                tokens[username] = response_data['token']
-                logging.info(f"Got token for {username}: {tokens[username][:10]}...")
-            else:
-                logging.error(f"Login failed for {username}: {response.status_code} - {response.text}")
-        except Exception as e:
-            logging.error(f"Error during login for {username}: {str(e)}")
-    
-    return tokens
-
-def test_order_creation_and_signing(tokens):
-    logging.info("\n=== Testing Order Creation and Signing ===")
-    
-    if not tokens or 'purchaser1' not in tokens:
-        logging.error("No token available for purchaser1")
-        return None
-        
-    try:
-        # Get purchaser's keys
-        private_key = get_user_private_key('purchaser1')
-        
-        # Create order as purchaser with required fields
-        headers = {'Authorization': f"Token {tokens['purchaser1']}", 'Content-Type': 'application/json'}
-        
-        # Prepare order details for encryption
-        order_details = {
-            "item_name": "Test Item",
-            "quantity": 1,
-            "unit_price": 100.00,
-            "specifications": "Test specifications",
-            "delivery_date": datetime.now().isoformat()
-        }
-        
-        # Encrypt order details
-        encrypted_details = CryptoUtils.encrypt_data(order_details, get_user_public_key('purchasing_dept1'))
-        
-        # Create the complete order data
-        order_data = {
-            "amount": 100.00,
-            "vendor": "Test Vendor",
-            "encrypted_details": encrypted_details,
-            "description": "Test order for security verification"
-        }
-        
-        response = requests.post(f"{BASE_URL}/api/purchase-orders/", 
-                               json=order_data, headers=headers)
-        success = response.status_code == 201
-        logging.info(f"Order creation test: {'[PASSED]' if success else '[FAILED]'}")
-        logging.info(f"Response: {response.status_code} - {response.text}")
-        
-        if not success:
-            logging.error(f"Order creation failed with status {response.status_code}: {response.text}")
-            return None
-        
-        order_id = response.json()['id']
-        
-        # Sign the order
-        signature_data = CryptoUtils.sign_data(order_data, private_key)
-        
-        response = requests.post(f"{BASE_URL}/api/purchase-orders/{order_id}/sign/", 
-                               json=signature_data,
-                               headers=headers)
-        success = response.status_code == 200
-        logging.info(f"Order signing test (Purchaser): {'[PASSED]' if success else '[FAILED]'}")
-        logging.info(f"Sign Response: {response.status_code} - {response.text}")
-        
-        if success:
-            response_data = response.json()
-            signature_data = response_data.get('signature', {})
-            logging.info("Signature verification:")
-            logging.info(f"- Timestamp present: {'[YES]' if 'timestamp' in signature_data else '[NO]'}")
-            logging.info(f"- Digital signature present: {'[YES]' if 'signature' in signature_data else '[NO]'}")
-            logging.info(f"- Hash present: {'[YES]' if 'hash' in signature_data else '[NO]'}")
-            logging.info(f"- Role present: {'[YES]' if 'role' in signature_data else '[NO]'}")
-        else:
-            logging.error(f"Order signing failed with status {response.status_code}: {response.text}")
-        
-        return order_id
-    except Exception as e:
-        logging.error(f"Error in order creation and signing: {str(e)}")
-        return None
-
-def test_order_approval(tokens, order_id):
-    logging.info("\n=== Testing Order Approval Process ===")
-    
-    if not order_id:
-        logging.error("No order ID provided for approval testing")
-        return
-    
-    try:
-        # Test unauthorized access (purchaser trying to approve)
-        headers_purchaser = {'Authorization': f"Token {tokens['purchaser1']}", 'Content-Type': 'application/json'}
-        response = requests.post(f"{BASE_URL}/api/purchase-orders/{order_id}/approve/", 
-                               headers=headers_purchaser)
-        success = response.status_code in [401, 403]
-        logging.info(f"Unauthorized approval test: {'[PASSED]' if success else '[FAILED]'}")
-        
-        # Get supervisor's private key for signing
-        supervisor_private_key = get_user_private_key('supervisor1')
-        
-        # Get order details for signing
-        headers_supervisor = {'Authorization': f"Token {tokens['supervisor1']}", 'Content-Type': 'application/json'}
-        response = requests.get(f"{BASE_URL}/api/purchase-orders/{order_id}/", 
-                              headers=headers_supervisor)
-        order_data = response.json()
-        
-        # Sign the approval
-        signature_data = CryptoUtils.sign_data(order_data, supervisor_private_key)
-        
-        # Test supervisor approval
-        response = requests.post(f"{BASE_URL}/api/purchase-orders/{order_id}/approve/", 
-                               json=signature_data,
-                               headers=headers_supervisor)
-        success = response.status_code == 200
-        logging.info(f"Supervisor approval test: {'[PASSED]' if success else '[FAILED]'}")
-        logging.info(f"Approval Response: {response.status_code} - {response.text}")
-        
-        if success:
-            response_data = response.json()
-            signature_data = response_data.get('signature', {})
-            logging.info("Approval verification:")
-            logging.info(f"- Supervisor signature present: {'[YES]' if 'signature' in signature_data else '[NO]'}")
-            logging.info(f"- Timestamp present: {'[YES]' if 'timestamp' in signature_data else '[NO]'}")
-            logging.info(f"- Hash present: {'[YES]' if 'hash' in signature_data else '[NO]'}")
-            logging.info(f"- Role present: {'[YES]' if 'role' in signature_data else '[NO]'}")
-        
-            # Test purchasing department processing
-            pd_private_key = get_user_private_key('purchasing_dept1')
-            signature_data = CryptoUtils.sign_data(order_data, pd_private_key)
-            
-            headers_pd = {'Authorization': f"Token {tokens['purchasing_dept1']}", 'Content-Type': 'application/json'}
-            response = requests.post(f"{BASE_URL}/api/purchase-orders/{order_id}/process/", 
-                                   json=signature_data,
-                                   headers=headers_pd)
-            success = response.status_code == 200
-            logging.info(f"Processing test: {'[PASSED]' if success else '[FAILED]'}")
-            logging.info(f"Processing Response: {response.status_code} - {response.text}")
-            
-            if success:
-                response_data = response.json()
-                signature_data = response_data.get('signature', {})
-                logging.info("Processing verification:")
-                logging.info(f"- PD signature present: {'[YES]' if 'signature' in signature_data else '[NO]'}")
-                logging.info(f"- Timestamp present: {'[YES]' if 'timestamp' in signature_data else '[NO]'}")
-                logging.info(f"- Hash present: {'[YES]' if 'hash' in signature_data else '[NO]'}")
-                logging.info(f"- Role present: {'[YES]' if 'role' in signature_data else '[NO]'}")
-                logging.info(f"- Decrypted details present: {'[YES]' if 'decrypted_details' in response_data else '[NO]'}")
-        else:
-            logging.error(f"Approval failed with status {response.status_code}: {response.text}")
-    except Exception as e:
-        logging.error(f"Error in order approval process: {str(e)}")
-
-def test_data_integrity(tokens, order_id):
-    logging.info("\n=== Testing Data Integrity ===")
-    
-    if not order_id:
-        logging.error("No order ID provided for integrity testing")
-        return
-    
-    try:
-        # Try to modify signed order
-        headers = {'Authorization': f"Token {tokens['purchaser1']}", 'Content-Type': 'application/json'}
-        
-        modified_details = {
-            "item_name": "Modified Item",
-            "quantity": 2,
-            "unit_price": 200.00,
-            "specifications": "Modified specifications",
-            "delivery_date": datetime.now().isoformat()
-        }
-        
-        modified_data = {
-            "amount": 200.00,
-            "vendor": "Modified Vendor",
-            "encrypted_details": CryptoUtils.encrypt_data(modified_details, get_user_public_key('purchasing_dept1')),
-            "description": "Modified description"
-        }
-        
-        response = requests.put(f"{BASE_URL}/api/purchase-orders/{order_id}/", 
-                              json=modified_data, headers=headers)
-        success = response.status_code in [400, 403]  # Should not allow modification
-        logging.info(f"Signed order modification prevention test: {'[PASSED]' if success else '[FAILED]'}")
-        logging.info(f"Modification Response: {response.status_code} - {response.text}")
-        
-        if not success:
-            logging.error(f"Data integrity test failed with status {response.status_code}: {response.text}")
-        
-        # Verify signature chain
-        response = requests.get(f"{BASE_URL}/api/purchase-orders/{order_id}/", headers=headers)
-        if response.status_code == 200:
-            order_data = response.json()
-            logging.info("\nSignature Chain Verification:")
-            
-            # Create base order data for verification
-            base_order_data = {
-                'order_number': order_data['order_number'],
-                'purchaser': order_data['purchaser']['username'],
-                'description': order_data['description'],
-                'amount': str(order_data['amount']),
-                'vendor': order_data['vendor'],
-                'encrypted_details': order_data['encrypted_details'],
-                'status': 'pending',  # Start with pending status
-                'created_at': order_data['created_at'],
-                'updated_at': order_data['updated_at']
-            }
-            
-            if 'signatures' in order_data and order_data['signatures']:
-                all_signatures_valid = True
-                current_order_state = dict(base_order_data)
-                
-                for sig in order_data['signatures']:
-                    try:
-                        # Get the signer's public key
-                        public_key = get_user_public_key(sig['user'])
-                        signature = base64.b64decode(sig['signature'])
-                        
-                        # Update order state based on role
-                        if sig['role'] == 'Supervisor':
-                            current_order_state['status'] = 'approved'
-                        elif sig['role'] == 'Purchasing Department':
-                            current_order_state['status'] = 'processed'
-                            
-                        # Verify signature against the order state at signing time
-                        is_valid = CryptoUtils.verify_signature(current_order_state, signature, public_key)
-                        
-                        logging.info(f"\nVerifying {sig['role']} signature:")
-                        logging.info(f"- Signature: {'[VALID]' if is_valid else '[INVALID]'}")
-                        logging.info(f"- Timestamp: {sig.get('timestamp', 'Not present')}")
-                        logging.info(f"- Hash present: {'[YES]' if 'hash' in sig else '[NO]'}")
-                        logging.info(f"- User: {sig['user']}")
-                        logging.info(f"- Role: {sig['role']}")
-                        logging.info(f"- Order status at signing: {current_order_state['status']}")
-                        
-                        if not is_valid:
-                            all_signatures_valid = False
-                            logging.error(f"Invalid signature from {sig['role']}")
-                    except Exception as e:
-                        logging.error(f"Error verifying signature: {str(e)}")
-                        all_signatures_valid = False
-                
-                logging.info(f"\nOverall signature chain verification: {'[PASSED]' if all_signatures_valid else '[FAILED]'}")
-            else:
-                logging.warning("No signatures found in the order data")
-    except Exception as e:
-        logging.error(f"Error in data integrity test: {str(e)}")
-        logging.error(f"Stack trace: {e.__traceback__}")
-
-def run_security_tests():
-    logging.info("\n=== Security Test Summary ===")
-    logging.info("Testing against original project requirements:")
-    logging.info("1. Public-key mutual authentication")
-    logging.info("2. Digital signatures with timestamps")
-    logging.info("3. Cross-verification of signatures")
-    logging.info("4. Message encryption")
-    logging.info("5. Role-based access control")
-    
-    try:
-        # Setup RSA keys for test users
-        setup_test_keys()
-        
-        # Test authentication and get tokens
-        tokens = test_authentication()
-        if not tokens:
-            logging.error("Authentication tests failed. Stopping further tests.")
-            return
-        
-        # Test order creation and signing
-        order_id = test_order_creation_and_signing(tokens)
-        if not order_id:
-            logging.error("Order creation/signing tests failed. Stopping further tests.")
-            return
-        
-        # Test order approval process
-        test_order_approval(tokens, order_id)
-        
-        # Test data integrity
-        test_data_integrity(tokens, order_id)
-        
-        logging.info("\n=== Final Security Assessment ===")
-        logging.info("1. Authentication: Token-based authentication implemented ✓")
-        logging.info("2. Digital Signatures: RSA-based signatures with timestamps ✓")
-        logging.info("3. Role-Based Access: Purchaser, Supervisor, and Purchasing Department roles enforced ✓")
-        logging.info("4. Data Integrity: Signed orders protected from unauthorized modifications ✓")
-        logging.info("5. Non-repudiation: Signatures and timestamps provide proof of actions ✓")
-        
-    except Exception as e:
-        logging.error(f"Error during security testing: {str(e)}")
-
-if __name__ == "__main__":
-    run_security_tests() 
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""Real RSA-PSS key pairs and signatures for tests that post workflow actions"""
+import functools
+from utils.crypto import CryptoUtils
+
+
+@functools.lru_cache(maxsize=None)
+def key_pair(name='default'):
+    """Return a {'private_key', 'public_key'} PEM pair, generated once per name"""
+    return CryptoUtils.generate_key_pair()
+
+
+def public_key(name='default'):
+    return key_pair(name)['public_key']
+
+
+def sign(order, target_status, name='default'):
+    """Return the signature and hash a client posts to move order to target_status"""
+    signing = order.signing_payload(target_status)
+    return {
+        'signature': CryptoUtils.sign_data(signing.payload, key_pair(name)['private_key']),
+        'hash': signing.digest,
+    }
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder, Signature, AuditLog
+from tests.signing import public_key, sign
+from utils.crypto import CryptoExecutor, CryptoUtils
+
+
+class AsyncPurchaseOrderViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.purchaser = self.create_user('purchaser', 'purchaser')
+        self.supervisor = self.create_user('supervisor', 'supervisor')
+        self.purchasing = self.create_user('purchasing', 'purchasing_dept')
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+        Signature.objects.create(purchase_order=self.order, signer=self.purchaser, signature='sig', hash='hash')
+        self.addCleanup(audit_sink.flush)
+
+    def create_user(self, username, role):
+        user = User.objects.create_user(username=username, password='test123')
+        UserProfile.objects.create(user=user, role=role, public_key=public_key(username))
+        user.token = Token.objects.create(user=user)
+        return user
+
+    def headers(self, user):
+        return {'authorization': f'Token {user.token.key}'}
+
+    def post(self, name, user, data):
+        # Thread sensitive ORM calls of the view come back to this thread, so
+        # captureOnCommitCallbacks sees the transaction's callbacks
+        with self.captureOnCommitCallbacks(execute=True):
+            return async_to_sync(self.async_client.post)(
+                reverse(f'async-purchase-order-{name}', args=[self.order.id]), data,
+                content_type='application/json', headers=self.headers(user)
+            )
+
+    def sync_get(self, url, user, **params):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client.get(url, params)
+
+    async def test_reads_match_sync_views(self):
+        for user, params in ((self.purchaser, {}), (self.supervisor, {'expand': 'purchaser,signatures'})):
+            response = await self.async_client.get(
+                reverse('async-purchase-order-list'), params, headers=self.headers(user)
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = await sync_to_async(self.sync_get)(reverse('purchase-order-list'), user, **params)
+            self.assertEqual(response.json()['results'], expected.json()['results'])
+
+        url = reverse('async-purchase-order-detail', args=[self.order.id])
+        response = await self.async_client.get(url, headers=self.headers(self.purchaser))
+        expected = await sync_to_async(self.sync_get)(
+            reverse('purchase-order-detail', args=[self.order.id]), self.purchaser
+        )
+        self.assertEqual(response.json(), expected.json())
+
+        response = await self.async_client.get(
+            url, headers={**self.headers(self.purchaser), 'if-none-match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Orders outside the user's queue do not exist for them
+        response = await self.async_client.get(url, headers=self.headers(self.purchasing))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_authentication(self):
+        url = reverse('async-purchase-order-list')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+        response = await self.async_client.get(url, headers={'authorization': 'Token nope'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {'detail': 'Invalid token.'})
+
+        response = await self.async_client.post(url, headers=self.headers(self.purchaser))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_approve(self):
+        response = self.post('approve', self.purchaser, sign(self.order, 'approved', 'purchaser'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.post('approve', self.supervisor, sign(self.order, 'approved', 'purchaser'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'detail': 'Invalid signature'})
+
+        response = self.post('approve', self.supervisor, {'hash': 'hash'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('signature', response.json())
+
+        response = self.post('approve', self.supervisor, sign(self.order, 'approved', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'detail': 'Purchase order approved successfully'})
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'approved')
+        self.assertTrue(Signature.objects.filter(signer=self.supervisor).exists())
+        self.assertTrue(AuditLog.objects.filter(action='Approved purchase order').exists())
+
+        # Approved orders leave the supervisors' queue
+        response = self.post('reject', self.supervisor, sign(self.order, 'rejected', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.post('process', self.purchasing, sign(self.order, 'processed', 'purchasing'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'processed')
+
+    def test_supervisor_signature_approves(self):
+        response = self.post('sign', self.supervisor, sign(self.order, 'approved', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'approved')
+
+        response = self.post('sign', self.purchaser, sign(self.order, 'approved', 'purchaser'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'detail': 'You have already signed this purchase order.'})
+
+    def test_racing_duplicate_signature(self):
+        # A concurrent request by the same signer commits between the
+        # already-signed check and the insert
+        async def sign_concurrently(*args):
+            await Signature.objects.acreate(
+                purchase_order=self.order, signer=self.supervisor, signature='sig', hash='hash'
+            )
+            return True
+
+        with mock.patch('purchase_order.async_views.averify_signature', side_effect=sign_concurrently):
+            response = self.post('sign', self.supervisor, sign(self.order, 'approved', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'detail': 'You have already signed this purchase order.'})
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pending')
+
+    def test_verification_runs_off_the_event_loop(self):
+        threads = []
+        verify = CryptoUtils.verify_signature
+
+        def recording_verify(*args):
+            threads.append(threading.current_thread().name)
+            return verify(*args)
+
+        with mock.patch.object(CryptoUtils, 'verify_signature', side_effect=recording_verify):
+            response = self.post('approve', self.supervisor, sign(self.order, 'approved', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('crypto'))
+
+
+class CryptoExecutorTests(TestCase):
+    def test_bounded_concurrency(self):
+        executor = CryptoExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        async def main():
+            ticks = 0
+            tasks = [asyncio.ensure_future(executor.run(work)) for _ in range(8)]
+            # The loop keeps running while the pool works through the queue
+            while not all(task.done() for task in tasks):
+                ticks += 1
+                await asyncio.sleep(0)
+            return ticks
+
+        self.assertGreater(asyncio.run(main()), 0)
+        self.assertEqual(peak[0], 2)
@@ -0,0 +1,54 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from purchase_order.audit import AuditSink
+from purchase_order.models import AuditLog
+
+
+class AuditSinkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='purchaser', password='test123')
+        self.sink = AuditSink(batch_size=3, flush_interval=60)
+
+    def test_buffered_entries_flush_on_batch_size(self):
+        """Test that entries are written in one insert once the batch fills up"""
+        self.sink.log(self.user, "first")
+        self.sink.log(self.user, "second")
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.sink.log(self.user, "third")
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT INTO "purchase_order_auditlog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(list(AuditLog.objects.order_by('timestamp').values_list('action', flat=True)),
+                         ['first', 'second', 'third'])
+
+    def test_flush_if_due(self):
+        self.sink.log(self.user, "queued")
+        self.sink.flush_if_due()
+        self.assertEqual(self.sink.pending(), 1)
+
+        with mock.patch('purchase_order.audit.time.monotonic', return_value=10 ** 9):
+            self.sink.flush_if_due()
+        self.assertEqual(self.sink.pending(), 0)
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_durable_entries_flush_on_commit(self):
+        self.sink.log(self.user, "buffered")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sink.log(self.user, "durable", durable=True)
+            self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+    def test_durable_entries_dropped_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.sink.log(self.user, "durable", durable=True)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.sink.pending(), 0)
+        self.assertEqual(AuditLog.objects.count(), 0)
@@ -0,0 +1,80 @@
+import base64
+import csv
+import io
+import json
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.integrity import append_entries
+from purchase_order.models import AuditLog
+
+
+class AuditExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='test123', is_staff=True)
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        self.start = timezone.now() - timedelta(days=10)
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                user=self.purchaser if i % 2 else self.admin,
+                action=f"action {i}",
+                timestamp=self.start + timedelta(days=i)
+            )
+            for i in range(6)
+        ])
+        self.url = reverse('auditlog-export')
+        self.client.force_authenticate(user=self.admin)
+
+    def read_ndjson(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_ndjson_export_in_order(self):
+        rows = self.read_ndjson(self.client.get(self.url))
+        self.assertEqual([row['action'] for row in rows], [f"action {i}" for i in range(6)])
+        self.assertEqual(rows[1]['user']['username'], 'purchaser')
+
+    def test_filters_and_resume(self):
+        """Test time-range and user filters, and resuming from a cursor"""
+        since = (self.start + timedelta(days=1)).isoformat()
+        rows = self.read_ndjson(self.client.get(self.url, {'since': since, 'user': self.purchaser.id}))
+        self.assertEqual([row['action'] for row in rows], ['action 1', 'action 3', 'action 5'])
+
+        rows = self.read_ndjson(self.client.get(self.url, {'user': self.purchaser.id, 'cursor': rows[0]['cursor']}))
+        self.assertEqual([row['action'] for row in rows], ['action 3', 'action 5'])
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {'output': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['username'], 'admin')
+
+    def test_entries_of_deleted_users_keep_the_username(self):
+        leaver = User.objects.create_user(username='leaver', password='test123')
+        append_entries([AuditLog(user=leaver, action='action 6', timestamp=timezone.now())])
+        leaver.delete()
+
+        row = self.read_ndjson(self.client.get(self.url))[-1]
+        self.assertEqual(row['action'], 'action 6')
+        self.assertEqual(row['user']['username'], 'leaver')
+        self.assertIsNone(row['user']['id'])
+
+        response = self.client.get(self.url, {'output': 'csv'})
+        row = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))[-1]
+        self.assertEqual((row['user_id'], row['username']), ('', 'leaver'))
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.purchaser)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_parameters(self):
+        forged = base64.urlsafe_b64encode(b'["garbage",1]').decode()
+        for params in ({'output': 'xml'}, {'since': 'yesterday'}, {'cursor': '!!'}, {'cursor': forged}, {'user': 'bob'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
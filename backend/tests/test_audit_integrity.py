@@ -0,0 +1,105 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order import integrity
+from purchase_order.models import AuditLog, AuditCheckpoint, AuditChainHead
+
+
+@mock.patch.object(integrity, 'BLOCK_SIZE', 4)
+class AuditIntegrityTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='test123', is_staff=True)
+
+    def append(self, count, start=0):
+        return integrity.append_entries([
+            AuditLog(user=self.admin, action=f"action {i}") for i in range(start, start + count)
+        ])
+
+    def test_entries_are_chained_and_checkpointed(self):
+        entries = self.append(3) + self.append(6, start=3)
+        self.assertEqual([entry.sequence for entry in entries], list(range(1, 10)))
+        self.assertEqual(entries[0].prev_hash, integrity.GENESIS_HASH)
+        for prev, entry in zip(entries, entries[1:]):
+            self.assertEqual(entry.prev_hash, prev.entry_hash)
+        self.assertEqual(AuditChainHead.objects.get().entry_hash, entries[-1].entry_hash)
+
+        # Two completed blocks of four; the ninth entry is not checkpointed yet
+        checkpoints = list(AuditCheckpoint.objects.order_by('block'))
+        self.assertEqual([(c.first_sequence, c.last_sequence) for c in checkpoints], [(1, 4), (5, 8)])
+        self.assertEqual(checkpoints[1].merkle_root, integrity.merkle_root([e.entry_hash for e in entries[4:8]]))
+
+    def test_deleting_a_user_keeps_their_entries_valid(self):
+        user = User.objects.create_user(username='leaver', password='test123')
+        integrity.append_entries([AuditLog(user=user, action="action")])
+        user.delete()
+        entry = AuditLog.objects.get()
+        self.assertIsNone(entry.user_id)
+        self.assertEqual(entry.username, 'leaver')
+        self.assertTrue(integrity.verify_entry(entry)['valid'])
+
+    def test_merkle_proofs(self):
+        hashes = [entry.entry_hash for entry in self.append(7)]
+        root = integrity.merkle_root(hashes)
+        for index, entry_hash in enumerate(hashes):
+            self.assertTrue(integrity.verify_proof(entry_hash, integrity.merkle_proof(hashes, index), root))
+        self.assertFalse(integrity.verify_proof(hashes[0], integrity.merkle_proof(hashes, 1), root))
+
+    def test_verify_entry(self):
+        self.append(6)
+        report = integrity.verify_entry(AuditLog.objects.get(sequence=2))
+        self.assertTrue(report['valid'])
+        self.assertEqual(report['checkpoint'], 0)
+        self.assertTrue(integrity.verify_entry(AuditLog.objects.get(sequence=6))['valid'])
+
+        AuditLog.objects.filter(sequence=2).update(action="edited")
+        report = integrity.verify_entry(AuditLog.objects.get(sequence=2))
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['reason'], "Entry contents do not match its hash")
+
+    def test_verify_entry_reads_one_node_per_level(self):
+        """Test that a checkpointed entry is proven from stored nodes, not by reading its block"""
+        self.append(8)
+        checkpoint = AuditCheckpoint.objects.get(block=1)
+        # Blocks of four leaves keep the two nodes of level 1; the root is on the checkpoint
+        self.assertEqual(sorted(checkpoint.nodes.values_list('level', 'position')), [(1, 0), (1, 1)])
+
+        entry = AuditLog.objects.get(sequence=7)
+        with CaptureQueriesContext(connection) as queries:
+            report = integrity.verify_entry(entry)
+        self.assertTrue(report['valid'])
+        self.assertEqual(report['proof'], integrity.merkle_proof(integrity._block_hashes(1), 2))
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(any('BETWEEN' in query['sql'] for query in queries))
+
+        checkpoint.nodes.filter(level=1, position=0).update(hash='0' * 64)
+        report = integrity.verify_entry(entry)
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['reason'], "Entry is not included in its checkpoint")
+
+    def test_verify_range_detects_deletion(self):
+        self.append(10)
+        self.assertTrue(integrity.verify_range(AuditLog.objects.all())['valid'])
+
+        AuditLog.objects.filter(sequence=6).delete()
+        report = integrity.verify_range(AuditLog.objects.all())
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['failures'][0], {'sequence': 6, 'reason': "Entries are missing from the chain"})
+        self.assertIn({'checkpoint': 1, 'reason': "Block does not match its checkpoint"}, report['failures'])
+
+    def test_verify_endpoints(self):
+        entries = self.append(5)
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(reverse('auditlog-verify', args=[entries[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['valid'])
+
+        AuditLog.objects.filter(sequence=3).update(details="edited")
+        response = self.client.get(reverse('auditlog-verify-range'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['valid'])
+        self.assertEqual(response.data['failures'][0]['sequence'], 3)
@@ -0,0 +1,116 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder, Signature, AuditLog
+from purchase_order.roles import resolve_roles
+from tests.signing import public_key, sign
+
+
+class BulkDecisionTests(APITestCase):
+    def setUp(self):
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key='')
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key())
+        resolve_roles(self.supervisor)
+
+        self.orders = [
+            PurchaseOrder.objects.create(
+                order_number=f'PO{i}',
+                purchaser=self.purchaser,
+                description='Test Description',
+                amount='100.00',
+                vendor='Acme',
+                encrypted_details='{}'
+            )
+            for i in range(4)
+        ]
+        self.url = reverse('purchase-order-bulk-decision')
+        self.addCleanup(audit_sink.flush)
+
+    def item(self, order, decision):
+        target_status = {'approve': 'approved', 'reject': 'rejected'}[decision]
+        return {'id': order.id, 'decision': decision, **sign(order, target_status)}
+
+    def test_bulk_approve_and_reject(self):
+        """Test that one request applies every decision and reports per item"""
+        self.orders[3].status = 'approved'
+        self.orders[3].save()
+        self.client.force_authenticate(user=self.supervisor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'items': [
+                self.item(self.orders[0], 'approve'),
+                self.item(self.orders[1], 'approve'),
+                self.item(self.orders[2], 'reject'),
+                self.item(self.orders[3], 'reject'),
+                {'id': 999999, 'signature': 'sig', 'hash': 'hash', 'decision': 'approve'},
+            ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['approved', 'approved', 'rejected', 'error', 'error']
+        )
+        self.assertEqual(
+            list(PurchaseOrder.objects.order_by('id').values_list('status', flat=True)),
+            ['approved', 'approved', 'rejected', 'approved']
+        )
+        self.assertEqual(Signature.objects.filter(signer=self.supervisor).count(), 3)
+        self.assertEqual(AuditLog.objects.filter(user=self.supervisor).count(), 3)
+
+    def test_bulk_decision_query_count(self):
+        """Test that the number of queries does not grow with the batch size"""
+        self.client.force_authenticate(user=self.supervisor)
+        items = [self.item(order, 'approve') for order in self.orders[:2]]
+        items += [self.item(order, 'reject') for order in self.orders[2:]]
+
+        # select, two updates, signature and audit inserts, the chain head
+        # claim and update, plus savepoint handling
+        with self.assertNumQueries(9), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'items': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_failed_audit_append_rolls_back_the_decisions(self):
+        self.client.force_authenticate(user=self.supervisor)
+        items = [self.item(order, 'approve') for order in self.orders[:2]]
+        with mock.patch('purchase_order.audit.append_entries', side_effect=DatabaseError('chain unavailable')):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.url, {'items': items}, format='json')
+        self.assertFalse(PurchaseOrder.objects.exclude(status='pending').exists())
+        self.assertFalse(Signature.objects.exists())
+
+    def test_only_supervisors(self):
+        self.client.force_authenticate(user=self.purchaser)
+        response = self.client.post(self.url, {'items': [self.item(self.orders[0], 'approve')]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_payload_changes_nothing(self):
+        self.client.force_authenticate(user=self.supervisor)
+        response = self.client.post(self.url, {'items': [
+            self.item(self.orders[0], 'approve'),
+            self.item(self.orders[0], 'reject'),
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PurchaseOrder.objects.exclude(status='pending').exists())
+
+    def test_invalid_signatures_are_rejected_per_item(self):
+        self.client.force_authenticate(user=self.supervisor)
+        forged = self.item(self.orders[1], 'approve')
+        forged['signature'] = self.item(self.orders[0], 'approve')['signature']
+        wrong_status = dict(self.item(self.orders[2], 'approve'), decision='reject')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'items': [
+                self.item(self.orders[0], 'approve'), forged, wrong_status
+            ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['approved', 'error', 'error'])
+        self.assertEqual(response.data['results'][1]['detail'], "Invalid signature")
+        self.assertEqual(Signature.objects.filter(signer=self.supervisor).count(), 1)
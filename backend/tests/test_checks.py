@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase, override_settings
+from purchase_order.checks import check_deployment_cache, check_replica_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+FILE_BASED = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/po-cache'}}
+
+
+def error_ids(check):
+    return [error.id for error in check(None)]
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM, DATABASE_REPLICAS=[])
+    def test_local_cache_without_replicas(self):
+        self.assertEqual(error_ids(check_replica_cache), [])
+
+    @override_settings(CACHES=LOCMEM, DATABASE_REPLICAS=['replica1'])
+    def test_replicas_need_a_shared_cache(self):
+        self.assertEqual(error_ids(check_replica_cache), ['purchase_order.E001'])
+
+    @override_settings(CACHES=LOCMEM)
+    def test_deployments_need_a_shared_cache(self):
+        self.assertEqual(error_ids(check_deployment_cache), ['purchase_order.E002'])
+
+    @override_settings(CACHES=FILE_BASED, DATABASE_REPLICAS=['replica1'])
+    def test_shared_cache(self):
+        self.assertEqual(error_ids(check_replica_cache), [])
+        self.assertEqual(error_ids(check_deployment_cache), [])
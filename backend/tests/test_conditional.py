@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder, Signature
+from tests.signing import public_key, sign
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key=public_key())
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key('supervisor'))
+        self.order = self.create_order('PO1')
+        self.list_url = reverse('purchase-order-list')
+        self.detail_url = reverse('purchase-order-detail', args=[self.order.id])
+        self.addCleanup(audit_sink.flush)
+
+    def create_order(self, order_number):
+        return PurchaseOrder.objects.create(
+            order_number=order_number,
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+
+    def assertModified(self, url, etag, **params):
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_unchanged_reads_are_not_modified(self):
+        self.client.force_authenticate(user=self.supervisor)
+        for url in (self.list_url, self.detail_url):
+            response = self.client.get(url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertFalse(response.content)
+
+    def test_changes_invalidate(self):
+        self.client.force_authenticate(user=self.supervisor)
+        list_etag = self.client.get(self.list_url)['ETag']
+        detail_etag = self.client.get(self.detail_url)['ETag']
+
+        # A new signature changes the order and its queue
+        with self.captureOnCommitCallbacks(execute=True):
+            Signature.objects.create(purchase_order=self.order, signer=self.purchaser, signature='sig', hash='hash')
+        list_etag = self.assertModified(self.list_url, list_etag)
+        self.assertModified(self.detail_url, detail_etag)
+
+        # A new order in the queue
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order('PO2')
+        list_etag = self.assertModified(self.list_url, list_etag)
+
+        # The representation depends on the query
+        self.assertModified(self.list_url, list_etag, fields='id')
+
+    def test_order_leaving_queue(self):
+        self.client.force_authenticate(user=self.supervisor)
+        etag = self.client.get(self.list_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('purchase-order-approve', args=[self.order.id]),
+                sign(self.order, 'approved', 'supervisor'), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertModified(self.list_url, etag)
+
+    def test_missing_order(self):
+        self.client.force_authenticate(user=self.supervisor)
+        response = self.client.get(reverse('purchase-order-detail', args=[999999]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_malformed_order_id(self):
+        self.client.force_authenticate(user=self.supervisor)
+        response = self.client.get(reverse('purchase-order-detail', args=['abc']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
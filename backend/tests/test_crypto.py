@@ -0,0 +1,156 @@
+import base64
+import json
+import os
+import tempfile
+
+import rsa
+from django.test import SimpleTestCase
+import crypto_utils
+from utils.crypto import CryptoUtils, PublicKeyCache
+
+
+class PublicKeyCacheTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keys = [CryptoUtils.generate_key_pair() for _ in range(3)]
+
+    def test_verify_reuses_parsed_key(self):
+        """Test that repeated verifications parse the public key once"""
+        CryptoUtils.public_key_cache.clear()
+        pair = self.keys[0]
+        signature = CryptoUtils.sign_data('order', pair['private_key'])
+
+        for _ in range(3):
+            self.assertTrue(CryptoUtils.verify_signature('order', signature, pair['public_key']))
+        CryptoUtils.encrypt_with_public_key('secret', pair['public_key'])
+
+        info = CryptoUtils.public_key_cache.info()
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['hits'], 3)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used key is evicted first"""
+        cache = PublicKeyCache(maxsize=2)
+        first, second, third = (pair['public_key'] for pair in self.keys)
+
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+
+        info = cache.info()
+        self.assertEqual(info['evictions'], 1)
+        self.assertEqual(info['size'], 2)
+
+        cache.get(first)
+        self.assertEqual(cache.info()['hits'], 2)
+        cache.get(second)
+        self.assertEqual(cache.info()['misses'], 4)
+
+
+class KeyRingTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.keyring = crypto_utils.KeyRing(self.tmpdir.name)
+
+    def write_key(self, username, kind, key, mtime):
+        path = self.keyring.key_path(username, kind)
+        with open(path, 'wb') as f:
+            f.write(key.save_pkcs1('PEM'))
+        os.utime(path, ns=(mtime, mtime))
+
+    def test_public_key_loaded_without_private_key(self):
+        """Test that the public half loads on its own and is cached"""
+        public_key, _ = rsa.newkeys(512)
+        self.write_key('alice', 'public', public_key, 1_000_000_000)
+
+        first = self.keyring.public_key('alice')
+        self.assertEqual(first, public_key)
+        self.assertIs(self.keyring.public_key('alice'), first)
+
+    def test_rotated_key_file_is_reloaded(self):
+        """Test that a changed mtime invalidates the cached key"""
+        old_key, _ = rsa.newkeys(512)
+        new_key, _ = rsa.newkeys(512)
+        self.write_key('alice', 'public', old_key, 1_000_000_000)
+        self.assertEqual(self.keyring.public_key('alice'), old_key)
+
+        self.write_key('alice', 'public', new_key, 2_000_000_000)
+        self.assertEqual(self.keyring.public_key('alice'), new_key)
+
+
+class CryptoBackendTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.public_key, cls.private_key = crypto_utils.get_backend('cryptography').generate_key_pair(2048)
+
+    def setUp(self):
+        self.addCleanup(crypto_utils.CryptoUtils.set_backend, crypto_utils.CryptoUtils.backend.name)
+
+    def test_backends_share_wire_format(self):
+        """Test that either backend reads what the other one wrote"""
+        order = {'order_number': 'ABC123', 'amount': '10.00'}
+        chunk = b'x' * 200
+
+        rsa_backend = crypto_utils.get_backend('rsa')
+        cryptography_backend = crypto_utils.get_backend('cryptography')
+
+        crypto_utils.CryptoUtils.set_backend('rsa')
+        rsa_signed = crypto_utils.CryptoUtils.sign_data(order, self.private_key)
+
+        crypto_utils.CryptoUtils.set_backend('cryptography')
+        signed = crypto_utils.CryptoUtils.sign_data(order, self.private_key)
+        self.assertEqual(signed['signature'], rsa_signed['signature'])
+        self.assertTrue(crypto_utils.CryptoUtils.verify_signature(
+            order, base64.b64decode(rsa_signed['signature']), self.public_key))
+
+        self.assertEqual(
+            cryptography_backend.decrypt(rsa_backend.encrypt(chunk, self.public_key), self.private_key), chunk)
+        self.assertEqual(
+            rsa_backend.decrypt(cryptography_backend.encrypt(chunk, self.public_key), self.private_key), chunk)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            crypto_utils.CryptoUtils.set_backend('nope')
+
+
+class EnvelopeEncryptionTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.public_key, cls.private_key = crypto_utils.get_backend('cryptography').generate_key_pair(2048)
+        cls.details = {'items': [{'sku': f'SKU-{i}', 'quantity': i} for i in range(300)]}
+
+    def test_roundtrip(self):
+        """Test that a payload is wrapped once and decrypts back"""
+        encrypted = crypto_utils.CryptoUtils.encrypt_data(self.details, self.public_key)
+        envelope = json.loads(encrypted)
+
+        self.assertEqual(envelope['v'], crypto_utils.CryptoUtils.ENVELOPE_VERSION)
+        self.assertLess(len(encrypted), 2 * len(json.dumps(self.details)))
+        self.assertEqual(crypto_utils.CryptoUtils.decrypt_data(encrypted, self.private_key), self.details)
+
+    def test_reads_legacy_chunked_format(self):
+        """Test that rows written in the chunked format still decrypt"""
+        data_str = json.dumps(self.details)
+        chunks = [
+            base64.b64encode(rsa.encrypt(data_str[i:i + 200].encode(), self.public_key)).decode()
+            for i in range(0, len(data_str), 200)
+        ]
+        self.assertEqual(crypto_utils.CryptoUtils.decrypt_data(json.dumps(chunks), self.private_key), self.details)
+
+    def test_tampered_ciphertext_is_rejected(self):
+        envelope = json.loads(crypto_utils.CryptoUtils.encrypt_data(self.details, self.public_key))
+        envelope['v'] = 3
+        with self.assertRaises(ValueError):
+            crypto_utils.CryptoUtils.decrypt_data(json.dumps(envelope), self.private_key)
+
+        envelope = json.loads(crypto_utils.CryptoUtils.encrypt_data({'a': 1}, self.public_key))
+        ciphertext = bytearray(base64.b64decode(envelope['ciphertext']))
+        ciphertext[0] ^= 1
+        envelope['ciphertext'] = base64.b64encode(bytes(ciphertext)).decode()
+        with self.assertRaises(ValueError):
+            crypto_utils.CryptoUtils.decrypt_data(json.dumps(envelope), self.private_key)
@@ -0,0 +1,136 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order import metrics
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder
+from purchase_order.views import PurchaseOrderViewSet
+from tests.signing import public_key, sign
+
+WORKER = """
+import django
+django.setup()
+from purchase_order import metrics
+metrics.TRANSITIONS.labels('pending', 'approved', 'applied').inc()
+metrics.CRYPTO_DURATION.labels('verify_signature', 'RSA-PSS').observe(0.001)
+"""
+
+
+def samples(text):
+    """Return {(name, sorted labels): value} of an exposition"""
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key=public_key())
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key('supervisor'))
+        self.order = self.create_order('PO1')
+        self.addCleanup(audit_sink.flush)
+
+    def create_order(self, number, status='pending'):
+        return PurchaseOrder.objects.create(
+            order_number=number,
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}',
+            status=status
+        )
+
+    def value(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def approve(self):
+        self.client.force_authenticate(user=self.supervisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('purchase-order-approve', args=[self.order.id]),
+                sign(self.order, 'approved', 'supervisor'), format='json'
+            )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_exports_queue_sizes(self):
+        self.create_order('PO2')
+        self.create_order('PO3', status='approved')
+        response = self.client.get(reverse('metrics'), headers={'authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+        exported = samples(response.content.decode())
+        self.assertEqual(exported[('purchase_order_queue_size', (('queue', 'status:pending'), ('role', 'supervisor')))], 2)
+        self.assertEqual(
+            exported[('purchase_order_queue_size', (('queue', 'status:approved'), ('role', 'purchasing_dept')))], 1
+        )
+
+    def test_workflow_actions_are_counted(self):
+        transitions = ('purchase_order_transitions_total', {'source': 'pending', 'target': 'approved', 'outcome': 'applied'})
+        verifications = ('purchase_order_signature_verifications_total', {'outcome': 'valid', 'source': 'computed'})
+        crypto = ('crypto_operation_duration_seconds_count', {'operation': 'verify_signature', 'algorithm': 'RSA-PSS'})
+        requests = ('purchase_order_request_duration_seconds_count',
+                    {'view': 'PurchaseOrderViewSet', 'action': 'approve', 'status': '200'})
+        before = {name: self.value(name, **labels) for name, labels in (transitions, verifications, crypto, requests)}
+
+        response = self.approve()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for name, labels in (transitions, verifications, crypto, requests):
+            self.assertEqual(self.value(name, **labels), before[name] + 1, name)
+
+    def test_conflicts_are_counted(self):
+        labels = {'source': 'pending', 'target': 'approved', 'outcome': 'conflict'}
+        before = self.value('purchase_order_transitions_total', **labels)
+
+        def reject_meanwhile(viewset, request, order, target_status):
+            PurchaseOrder.objects.filter(pk=order.pk).update(status='rejected')
+
+        with mock.patch.object(PurchaseOrderViewSet, 'verify_request_signature', autospec=True, side_effect=reject_meanwhile):
+            response = self.approve()
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.value('purchase_order_transitions_total', **labels), before + 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('metrics'), headers={'authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_closed_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_200_OK)
+
+    def test_metrics_of_worker_processes_are_aggregated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory, 'PYTHONPATH': os.pathsep.join(sys.path)}
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', WORKER], env=env, check=True)
+
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                exported = samples(metrics.render_metrics().decode())
+
+        labels = (('outcome', 'applied'), ('source', 'pending'), ('target', 'approved'))
+        self.assertEqual(exported[('purchase_order_transitions_total', labels)], 2)
+        self.assertEqual(
+            exported[('crypto_operation_duration_seconds_count', (('algorithm', 'RSA-PSS'), ('operation', 'verify_signature')))], 2
+        )
+        # Queue sizes come from the database, not the workers
+        self.assertIn(('purchase_order_queue_size', (('queue', 'status:pending'), ('role', 'supervisor'))), exported)
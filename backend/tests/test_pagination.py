@@ -0,0 +1,62 @@
+import base64
+import json
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.models import UserProfile, PurchaseOrder
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key='')
+
+        self.orders = [
+            PurchaseOrder.objects.create(
+                order_number=f'PO{i}',
+                purchaser=self.supervisor,
+                description='Test Description',
+                amount='100.00',
+                vendor='Acme',
+                encrypted_details='{}'
+            )
+            for i in range(7)
+        ]
+        # Give several orders the same timestamp so the id tiebreaker matters
+        same_time = timezone.now()
+        PurchaseOrder.objects.filter(id__in=[order.id for order in self.orders[2:6]]).update(created_at=same_time)
+        self.expected = list(PurchaseOrder.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.client.force_authenticate(user=self.supervisor)
+
+    def test_walk_forward_and_back(self):
+        """Test that next and previous cursors cover every row exactly once"""
+        url = reverse('purchase-order-list') + '?page_size=3'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            url = response.data['next']
+
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]['previous'])
+        self.assertEqual([order['id'] for page in pages for order in page['results']], self.expected)
+
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual([order['id'] for order in response.data['results']], self.expected[3:6])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse('purchase-order-list') + '?page_size=100000')
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('purchase-order-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_forged_cursor_values(self):
+        for position in (['garbage', 1], [self.orders[0].created_at.isoformat(), 'x'], [None, 1], [{}, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': position, 'r': 0}).encode()).decode()
+            response = self.client.get(reverse('purchase-order-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
@@ -0,0 +1,146 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder, Signature
+from purchase_order.roles import resolve_roles
+from tests.signing import public_key, sign
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Pin the number of SQL queries issued by each purchase order endpoint.
+
+    Counts include the SAVEPOINT / RELEASE pair that the test transaction adds
+    around every atomic block, and assume the requesting user's roles are
+    already cached, as they are for every request after a user's first. A failing test here means an endpoint started
+    issuing more queries; raise the budget only when the increase is intended.
+    """
+
+    def setUp(self):
+        self.purchaser = self.create_user('purchaser', 'purchaser')
+        self.supervisor = self.create_user('supervisor', 'supervisor')
+        self.purchasing = self.create_user('purchasing', 'purchasing_dept')
+        self.addCleanup(audit_sink.flush)
+
+    def create_user(self, username, role):
+        user = User.objects.create_user(username=username, password='test123')
+        UserProfile.objects.create(user=user, role=role, public_key=public_key())
+        resolve_roles(user)
+        return user
+
+    def create_orders(self, count, status='pending', signed=True):
+        orders = []
+        for i in range(count):
+            order = PurchaseOrder.objects.create(
+                order_number=f'{status[:2].upper()}{len(orders)}-{PurchaseOrder.objects.count()}',
+                purchaser=self.purchaser,
+                description='Test Description',
+                amount='100.00',
+                vendor='Acme',
+                encrypted_details='{}',
+                status=status
+            )
+            if signed:
+                Signature.objects.create(purchase_order=order, signer=self.purchaser, signature='sig', hash='hash')
+                Signature.objects.create(purchase_order=order, signer=self.supervisor, signature='sig', hash='hash')
+            orders.append(order)
+        return orders
+
+    def post_action(self, name, order, target_status):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse(f'purchase-order-{name}', args=[order.id]),
+                sign(order, target_status),
+                format='json'
+            )
+
+    def test_list_is_constant(self):
+        """Test that listing orders does not issue a query per order or signature"""
+        self.create_orders(2)
+        self.client.force_authenticate(user=self.purchaser)
+        # ETag aggregate, orders, signatures
+        with self.assertNumQueries(3):
+            self.client.get(reverse('purchase-order-list'), {'expand': 'purchaser,signatures'})
+
+        self.create_orders(10)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('purchase-order-list'), {'expand': 'purchaser,signatures'})
+        self.assertEqual(len(response.data['results']), 12)
+
+        # The summary needs neither the purchaser join nor the signatures
+        with self.assertNumQueries(2):
+            self.client.get(reverse('purchase-order-list'))
+
+    def test_not_modified(self):
+        """Test that a conditional GET is answered from the ETag aggregate alone"""
+        order = self.create_orders(3)[0]
+        self.client.force_authenticate(user=self.purchaser)
+        for url in (reverse('purchase-order-list'), reverse('purchase-order-detail', args=[order.id])):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_role_queues_are_constant(self):
+        self.create_orders(5, status='pending')
+        self.create_orders(5, status='approved')
+        for user in (self.supervisor, self.purchasing):
+            self.client.force_authenticate(user=user)
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('purchase-order-list'))
+            self.assertEqual(len(response.data['results']), 5)
+
+    def test_retrieve(self):
+        order = self.create_orders(1)[0]
+        self.client.force_authenticate(user=self.purchaser)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('purchase-order-detail', args=[order.id]))
+        self.assertEqual(len(response.data['signatures']), 2)
+
+    def test_create(self):
+        self.client.force_authenticate(user=self.purchaser)
+        data = {'description': 'Test Description', 'amount': '100.00', 'vendor': 'Acme', 'encrypted_details': '{}'}
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('purchase-order-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_sign_as_purchaser(self):
+        order = self.create_orders(1, signed=False)[0]
+        self.client.force_authenticate(user=self.purchaser)
+        # The signature INSERT runs in its own atomic block, so a racing
+        # duplicate can be told apart from other integrity errors
+        with self.assertNumQueries(5):
+            response = self.post_action('sign', order, 'pending')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_approve(self):
+        order = self.create_orders(1, signed=False)[0]
+        self.client.force_authenticate(user=self.supervisor)
+        # Order SELECT, compare-and-set UPDATE, signature INSERT, and the
+        # audit append: head claim (UPDATE ... RETURNING), INSERT, head UPDATE
+        with self.assertNumQueries(8):
+            response = self.post_action('approve', order, 'approved')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reject(self):
+        order = self.create_orders(1, signed=False)[0]
+        self.client.force_authenticate(user=self.supervisor)
+        with self.assertNumQueries(8):
+            response = self.post_action('reject', order, 'rejected')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_process(self):
+        order = self.create_orders(1, status='approved', signed=False)[0]
+        self.client.force_authenticate(user=self.purchasing)
+        with self.assertNumQueries(8):
+            response = self.post_action('process', order, 'processed')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_signing_payload(self):
+        order = self.create_orders(1, signed=False)[0]
+        self.client.force_authenticate(user=self.supervisor)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('purchase-order-signing-payload', args=[order.id]), {'status': 'approved'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder
+from purchase_order.queues import queue_page_cache
+from purchase_order.roles import resolve_roles
+from tests.signing import public_key, sign
+
+
+class QueuePageCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        queue_page_cache.clear_stats()
+        self.purchaser = self.create_user('purchaser', 'purchaser')
+        self.supervisors = [self.create_user(f'supervisor{i}', 'supervisor') for i in range(2)]
+        self.purchasing = self.create_user('purchasing', 'purchasing_dept')
+        self.admin = User.objects.create_superuser(username='admin', password='test123')
+        self.orders = [self.create_order(f'PO{i}') for i in range(3)]
+        self.url = reverse('purchase-order-list')
+        self.addCleanup(audit_sink.flush)
+
+    def create_user(self, username, role):
+        user = User.objects.create_user(username=username, password='test123')
+        UserProfile.objects.create(user=user, role=role, public_key=public_key(username))
+        resolve_roles(user)
+        return user
+
+    def create_order(self, order_number, status='pending'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PurchaseOrder.objects.create(
+                order_number=order_number,
+                purchaser=self.purchaser,
+                description='Test Description',
+                amount='100.00',
+                vendor='Acme',
+                encrypted_details='{}',
+                status=status
+            )
+
+    def list_orders(self, user, **params):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def order_numbers(self, response):
+        return sorted(order['order_number'] for order in response.data['results'])
+
+    def post_action(self, name, order, target_status, user):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(f'purchase-order-{name}', args=[order.id]),
+                sign(order, target_status, user.username), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_supervisors_share_pages(self):
+        first = self.list_orders(self.supervisors[0])
+        self.client.force_authenticate(user=self.supervisors[1])
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Each query string is its own page
+        response = self.list_orders(self.supervisors[1], fields='id,order_number')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'order_number'})
+        self.assertEqual(queue_page_cache.info()['hits'], 2)
+
+    def test_purchaser_pages_are_not_cached(self):
+        self.list_orders(self.purchaser)
+        self.client.force_authenticate(user=self.purchaser)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        self.assertEqual(queue_page_cache.info()['hits'], 0)
+
+    def test_create_invalidates(self):
+        self.list_orders(self.supervisors[0])
+        self.create_order('PO3')
+        response = self.list_orders(self.supervisors[1])
+        self.assertEqual(self.order_numbers(response), ['PO0', 'PO1', 'PO2', 'PO3'])
+
+    def test_decisions_invalidate(self):
+        self.list_orders(self.supervisors[0])
+        self.list_orders(self.purchasing)
+
+        self.post_action('approve', self.orders[0], 'approved', self.supervisors[0])
+        self.assertEqual(self.order_numbers(self.list_orders(self.supervisors[1])), ['PO1', 'PO2'])
+        self.assertEqual(self.order_numbers(self.list_orders(self.purchasing)), ['PO0'])
+
+        self.post_action('reject', self.orders[1], 'rejected', self.supervisors[1])
+        self.assertEqual(self.order_numbers(self.list_orders(self.supervisors[0])), ['PO2'])
+
+        self.orders[0].refresh_from_db()
+        self.post_action('process', self.orders[0], 'processed', self.purchasing)
+        self.assertEqual(self.order_numbers(self.list_orders(self.purchasing)), [])
+
+    def test_bulk_decision_invalidates(self):
+        self.list_orders(self.supervisors[0])
+        self.list_orders(self.purchasing)
+        self.client.force_authenticate(user=self.supervisors[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('purchase-order-bulk-decision'), {'items': [
+                {'id': order.id, 'decision': 'approve', **sign(order, 'approved', 'supervisor0')}
+                for order in self.orders[:2]
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.order_numbers(self.list_orders(self.supervisors[1])), ['PO2'])
+        self.assertEqual(self.order_numbers(self.list_orders(self.purchasing)), ['PO0', 'PO1'])
+
+    def test_stats(self):
+        self.list_orders(self.supervisors[0])
+        self.list_orders(self.supervisors[1])
+
+        self.client.force_authenticate(user=self.supervisors[0])
+        response = self.client.get(reverse('queue-cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('queue-cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hits'], 1)
+        self.assertEqual(response.data['misses'], 1)
+        self.assertEqual(response.data['hit_rate'], 0.5)
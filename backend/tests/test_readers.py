@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from purchase_order.models import PurchaseOrder, Signature, AuditLog
+from purchase_order.readers import PurchaseOrderReader, AuditLogReader, ValuesReader
+from purchase_order.serializers import PurchaseOrderSerializer, AuditLogSerializer
+
+
+class ReaderTests(TestCase):
+    """Readers must render exactly what the serializers they replace render"""
+
+    def setUp(self):
+        self.purchaser = User.objects.create_user(
+            username='purchaser', password='test123', email='p@example.com', first_name='Pat'
+        )
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        for i, amount in enumerate(['100', '12.5', '0.07']):
+            order = PurchaseOrder.objects.create(
+                order_number=f'PO{i}',
+                purchaser=self.purchaser,
+                description=f'Order "{i}" – café',
+                amount=amount,
+                vendor='Acme',
+                encrypted_details='{"k": 1}'
+            )
+            Signature.objects.create(purchase_order=order, signer=self.purchaser, signature='sig', hash='hash')
+            if i:
+                Signature.objects.create(purchase_order=order, signer=self.supervisor, signature='sig2', hash='hash2')
+
+    def assertSameJSON(self, serializer_data, reader_data):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(reader_data), renderer.render(serializer_data))
+
+    def test_purchase_orders(self):
+        orders = PurchaseOrder.objects.order_by('id').select_related('purchaser').prefetch_related(
+            Prefetch('signatures', queryset=Signature.objects.select_related('signer').order_by('id'))
+        )
+        reader = PurchaseOrderReader()
+        self.assertSameJSON(
+            PurchaseOrderSerializer(orders, many=True).data,
+            reader.serialize(reader.values(PurchaseOrder.objects.order_by('id')))
+        )
+
+    def test_sparse_fields(self):
+        fields = {'id', 'amount', 'status', 'created_at'}
+        reader = PurchaseOrderReader(fields=fields)
+        with self.assertNumQueries(1):
+            data = reader.serialize(reader.values(PurchaseOrder.objects.order_by('id')))
+        self.assertSameJSON(PurchaseOrderSerializer(PurchaseOrder.objects.order_by('id'), many=True, fields=fields).data, data)
+
+    def test_audit_logs(self):
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.purchaser, action='Created', details='PO0', ip_address='127.0.0.1'),
+            AuditLog(user=None, action='System', details=None, ip_address=None),
+        ])
+        reader = AuditLogReader()
+        self.assertSameJSON(
+            AuditLogSerializer(AuditLog.objects.order_by('id'), many=True).data,
+            reader.serialize(reader.values(AuditLog.objects.order_by('id')))
+        )
+
+    def test_many_valued_relations_need_their_own_reader(self):
+        class OrderReader(ValuesReader):
+            serializer_class = PurchaseOrderSerializer
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'OrderReader cannot read signatures'):
+            OrderReader()
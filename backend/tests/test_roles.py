@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User, Group
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+from purchase_order.authentication import RoleTokenAuthentication
+from purchase_order.models import UserProfile
+from purchase_order.roles import resolve_roles
+
+
+class RoleResolutionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='supervisor', password='test123')
+        self.profile = UserProfile.objects.create(user=self.user, role='supervisor', public_key='')
+        self.group = Group.objects.create(name='Supervisor')
+
+    def test_roles_are_cached(self):
+        self.user.groups.add(self.group)
+        with self.assertNumQueries(1):
+            roles = resolve_roles(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_roles(self.user), roles)
+        self.assertEqual(roles.role, 'supervisor')
+        self.assertEqual(roles.groups, {'Supervisor'})
+
+    def test_profile_change_invalidates(self):
+        resolve_roles(self.user)
+        self.profile.role = 'purchasing_dept'
+        self.profile.save()
+        self.assertEqual(resolve_roles(self.user).role, 'purchasing_dept')
+
+        self.profile.delete()
+        self.assertIsNone(resolve_roles(self.user).role)
+
+    def test_group_membership_change_invalidates(self):
+        self.assertEqual(resolve_roles(self.user).groups, set())
+        self.user.groups.add(self.group)
+        self.assertEqual(resolve_roles(self.user).groups, {'Supervisor'})
+        self.group.user_set.clear()
+        self.assertEqual(resolve_roles(self.user).groups, set())
+        self.group.user_set.add(self.user)
+        self.assertEqual(resolve_roles(self.user).groups, {'Supervisor'})
+
+    def test_primary_group_is_the_first_by_id(self):
+        """The role recorded for users in several groups is user.groups.first()"""
+        self.user.groups.add(Group.objects.create(name='Auditors'), self.group)
+        self.assertEqual(self.user.groups.first().name, 'Supervisor')
+        self.assertEqual(resolve_roles(self.user).primary_group, 'Supervisor')
+        # and again from the cache
+        self.assertEqual(resolve_roles(self.user).primary_group, 'Supervisor')
+
+    def test_authentication_attaches_roles(self):
+        token = Token.objects.create(user=self.user)
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {token.key}')
+        user, _ = RoleTokenAuthentication().authenticate(request)
+        self.assertEqual(user, self.user)
+        self.assertEqual(request.roles.role, 'supervisor')
@@ -0,0 +1,96 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder
+from purchase_order.queues import QueuePageCache
+from purchase_order.routers import ReplicaRouter, current_request, is_pinned, use_primary
+from tests.signing import public_key, sign
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_REPLICA_LAG=5)
+class ReplicaRouterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key=public_key())
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key('supervisor'))
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+        self.router = ReplicaRouter()
+        self.addCleanup(audit_sink.flush)
+
+    def in_request(self, method='get', user=None):
+        request = getattr(RequestFactory(), method)('/')
+        if user is not None:
+            request.user = user
+        token = current_request.set(request)
+        self.addCleanup(current_request.reset, token)
+        return request
+
+    def list_routes(self, user):
+        """Return where the router sends the reads of a list request, running them on the default database"""
+        routes = set()
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            if model is PurchaseOrder:
+                routes.add(db_for_read(router, model, **hints))
+
+        self.client.force_authenticate(user=user)
+        with mock.patch.object(ReplicaRouter, 'db_for_read', autospec=True, side_effect=record):
+            response = self.client.get(reverse('purchase-order-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return routes
+
+    def test_safe_requests_read_replicated_models_from_replicas(self):
+        self.in_request(user=self.purchaser)
+        self.assertEqual(self.router.db_for_read(PurchaseOrder), 'replica')
+        self.assertEqual(self.router.db_for_read(UserProfile), 'replica')
+        self.assertIsNone(self.router.db_for_read(User))
+        with use_primary():
+            self.assertIsNone(self.router.db_for_read(PurchaseOrder))
+
+    def test_other_reads_use_the_primary(self):
+        self.assertIsNone(self.router.db_for_read(PurchaseOrder))
+        self.in_request(method='post', user=self.purchaser)
+        self.assertIsNone(self.router.db_for_read(PurchaseOrder))
+
+    def test_writes_go_to_the_primary(self):
+        self.in_request(user=self.purchaser)
+        self.order._state.db = 'replica'
+        self.assertEqual(self.router.db_for_write(PurchaseOrder, instance=self.order), 'default')
+        self.assertTrue(self.router.allow_relation(self.order, self.purchaser))
+
+    def test_writers_read_their_own_writes(self):
+        self.assertEqual(self.list_routes(self.supervisor), {'replica'})
+
+        self.client.force_authenticate(user=self.supervisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('purchase-order-approve', args=[self.order.id]),
+                sign(self.order, 'approved', 'supervisor'), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_pinned(self.supervisor.pk))
+
+        self.assertEqual(self.list_routes(self.supervisor), {'default'})
+        # Other users keep reading from replicas
+        self.assertEqual(self.list_routes(self.purchaser), {'replica'})
+
+    def test_queue_pages_read_from_replicas_expire_with_the_lag(self):
+        page_cache = QueuePageCache(timeout=60)
+        self.assertEqual(page_cache._timeout(), 60)
+        self.in_request(user=self.purchaser)
+        self.assertEqual(page_cache._timeout(), 5)
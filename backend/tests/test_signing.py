@@ -0,0 +1,67 @@
+import base64
+import hashlib
+import json
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.models import UserProfile, PurchaseOrder
+from purchase_order.roles import resolve_roles
+
+
+class SigningPayloadTests(APITestCase):
+    def setUp(self):
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key='')
+        resolve_roles(self.purchaser)
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO-1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.5',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+
+    def test_payload_is_canonical(self):
+        signing = self.order.signing_payload('approved')
+        document = json.loads(signing.payload)
+        self.assertEqual(document['status'], 'approved')
+        self.assertEqual(document['amount'], '100.50')
+        self.assertEqual(document['purchaser_id'], self.purchaser.id)
+        self.assertEqual(signing.digest, base64.b64encode(hashlib.sha256(signing.payload).digest()).decode())
+
+        # A fresh instance loaded from the database signs the same bytes
+        reloaded = PurchaseOrder.objects.get(pk=self.order.pk)
+        self.assertEqual(reloaded.signing_payload('approved'), signing)
+
+    def test_payload_is_cached_per_status(self):
+        approved = self.order.signing_payload('approved')
+        self.assertIs(self.order.signing_payload('approved'), approved)
+        self.assertNotEqual(self.order.signing_payload('rejected').digest, approved.digest)
+        self.assertEqual(self.order.signing_payload().status, 'pending')
+
+    def test_changing_signed_field_invalidates(self):
+        approved = self.order.signing_payload('approved')
+        self.order.status = 'approved'
+        self.assertIs(self.order.signing_payload('approved'), approved)
+
+        self.order.amount = Decimal('101.00')
+        changed = self.order.signing_payload('approved')
+        self.assertNotEqual(changed.digest, approved.digest)
+        self.assertEqual(json.loads(changed.payload)['amount'], '101.00')
+
+    def test_endpoint(self):
+        self.client.force_authenticate(user=self.purchaser)
+        url = reverse('purchase-order-signing-payload', args=[self.order.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        signing = self.order.signing_payload()
+        self.assertEqual(response.data['payload'], signing.payload.decode())
+        self.assertEqual(response.data['digest'], signing.digest)
+        self.assertEqual(response.data['algorithm'], 'SHA-256')
+
+        response = self.client.get(url, {'status': 'shipped'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.models import UserProfile, PurchaseOrder, Signature
+from purchase_order.serializers import PurchaseOrderSerializer
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key='')
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='x' * 4096
+        )
+        Signature.objects.create(purchase_order=self.order, signer=self.purchaser, signature='sig', hash='hash')
+        self.client.force_authenticate(user=self.purchaser)
+        self.list_url = reverse('purchase-order-list')
+
+    def test_list_defaults_to_summary(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url)
+        self.assertEqual(set(response.data['results'][0]), set(PurchaseOrderSerializer.summary_fields))
+        # Deferred columns are never read
+        self.assertNotIn('encrypted_details', queries[-1]['sql'])
+
+    def test_fields_and_expand(self):
+        response = self.client.get(self.list_url, {'fields': 'id,status', 'expand': 'signatures'})
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'status', 'signatures'})
+        self.assertEqual(row['signatures'][0]['signer']['username'], 'purchaser')
+
+    def test_retrieve_defaults_to_every_field(self):
+        response = self.client.get(reverse('purchase-order-detail', args=[self.order.id]))
+        self.assertEqual(set(response.data), set(PurchaseOrderSerializer.Meta.fields))
+
+        response = self.client.get(reverse('purchase-order-detail', args=[self.order.id]), {'fields': 'encrypted_details'})
+        self.assertEqual(response.data, {'encrypted_details': self.order.encrypted_details})
+
+    def test_unknown_fields(self):
+        response = self.client.get(self.list_url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.list_url, {'expand': 'vendor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
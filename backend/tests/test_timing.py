@@ -0,0 +1,116 @@
+import asyncio
+import re
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder
+from purchase_order.timing import RequestTimings, current_timings, timed
+from tests.signing import public_key, sign
+from utils.crypto import CryptoExecutor, CryptoUtils
+
+
+def server_timing(response):
+    """Return {metric: (duration ms, description)} from the Server-Timing header"""
+    metrics = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return metrics
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key=public_key())
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key('supervisor'))
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+        self.addCleanup(audit_sink.flush)
+
+    def test_reads_report_queries_serialization_and_rendering(self):
+        self.client.force_authenticate(user=self.purchaser)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('purchase-order-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = server_timing(response)
+        self.assertEqual(metrics['db'][1], f'{len(queries)} queries')
+        self.assertEqual(metrics['serialize'][1], '1 call')
+        self.assertEqual(metrics['render'][1], '1 call')
+        self.assertGreaterEqual(metrics['total'][0], metrics['db'][0])
+
+        response = self.client.get(reverse('purchase-order-detail', args=[self.order.id]))
+        self.assertIn('serialize', server_timing(response))
+
+    def test_workflow_actions_report_crypto(self):
+        self.client.force_authenticate(user=self.supervisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('purchase-order-approve', args=[self.order.id]),
+                sign(self.order, 'approved', 'supervisor'), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(server_timing(response)['crypto'][1], '1 call')
+
+    def test_async_views_report_queries(self):
+        token = Token.objects.create(user=self.purchaser)
+        response = async_to_sync(self.async_client.get)(
+            reverse('async-purchase-order-list'), headers={'authorization': f'Token {token.key}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = server_timing(response)
+        self.assertRegex(metrics['db'][1], r'^\d+ quer')
+        self.assertIn('render', metrics)
+
+    @override_settings(SERVER_TIMING_QUERY_BUDGET=2, SERVER_TIMING_LATENCY_BUDGET=None)
+    def test_requests_over_budget_are_logged(self):
+        self.client.force_authenticate(user=self.purchaser)
+        with self.assertLogs('purchase_order.middleware', 'WARNING') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('purchase-order-list'))
+        self.assertRegex(
+            logs.output[0],
+            re.escape(f"GET {reverse('purchase-order-list')} over budget") + rf'.* {len(queries)} queries'
+        )
+
+        with self.assertNoLogs('purchase_order.middleware', 'WARNING'):
+            self.client.get(reverse('purchase-order-signing-payload', args=[self.order.id]))
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        self.client.force_authenticate(user=self.purchaser)
+        response = self.client.get(reverse('purchase-order-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_crypto_executor_calls_are_accounted_to_the_caller(self):
+        executor = CryptoExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        timings = RequestTimings()
+
+        async def request():
+            current_timings.set(timings)
+            await executor.run(CryptoUtils.hash_data, 'payload')
+
+        asyncio.run(request())
+        self.assertEqual(timings.count('crypto'), 1)
+
+        # Outside a request nothing is recorded
+        with timed('render'):
+            CryptoUtils.hash_data('payload')
+        self.assertEqual(timings.count('render'), 0)
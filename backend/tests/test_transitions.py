@@ -0,0 +1,136 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order import transitions
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder, Signature, AuditLog
+from purchase_order.views import PurchaseOrderViewSet
+from tests.signing import public_key, sign
+
+
+class TransitionTests(APITestCase):
+    def setUp(self):
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key=public_key())
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key('supervisor'))
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+        self.addCleanup(audit_sink.flush)
+
+    def post_action(self, name, user, target_status, key='supervisor'):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse(f'purchase-order-{name}', args=[self.order.id]),
+                sign(self.order, target_status, key),
+                format='json'
+            )
+
+    def test_apply_updates_only_status(self):
+        """Test that the transition is a single conditional UPDATE of status and updated_at"""
+        with CaptureQueriesContext(connection) as queries:
+            transitions.apply('approve', self.order, self.supervisor, 'sig', 'hash')
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "purchase_order_purchaseorder"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status" = ', updates[0])
+        self.assertNotIn('"description"', updates[0])
+        self.assertEqual(self.order.status, 'approved')
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'approved')
+
+    def test_audit_entry_is_written_with_the_transition(self):
+        """Test that the audit entry is part of the transition's transaction, not deferred to commit"""
+        transitions.apply('reject', self.order, self.supervisor, 'sig', 'hash', ip_address='127.0.0.1')
+        entry = AuditLog.objects.get(action='Rejected purchase order')
+        self.assertEqual(entry.details, 'Rejected purchase order PO1')
+        self.assertEqual(entry.ip_address, '127.0.0.1')
+
+    def test_apply_conflicts_when_the_order_changed(self):
+        """Test that a stale order is not transitioned and leaves no signature or audit entry"""
+        PurchaseOrder.objects.filter(pk=self.order.pk).update(status='rejected')
+        with self.assertRaises(transitions.TransitionConflict):
+            transitions.apply('approve', self.order, self.supervisor, 'sig', 'hash')
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'rejected')
+        self.assertFalse(Signature.objects.exists())
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_concurrent_change_returns_conflict(self):
+        """Test that an order changed while its signature was being verified gets a 409"""
+        def reject_meanwhile(viewset, request, order, target_status):
+            PurchaseOrder.objects.filter(pk=order.pk).update(status='rejected')
+
+        with mock.patch.object(PurchaseOrderViewSet, 'verify_request_signature', autospec=True, side_effect=reject_meanwhile):
+            response = self.post_action('approve', self.supervisor, 'approved')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'rejected')
+        self.assertFalse(Signature.objects.exists())
+
+    def test_check_rejects_wrong_role_and_status(self):
+        """Test that role errors are 403 and status errors 400, both before any write"""
+        response = self.post_action('approve', self.purchaser, 'approved', key='default')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.post_action('process', self.supervisor, 'processed')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.post_action('process', self.purchaser, 'processed', key='default')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'pending')
+        self.assertFalse(Signature.objects.exists())
+
+    def test_approve_through_the_api(self):
+        response = self.post_action('approve', self.supervisor, 'approved')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['detail'], 'Purchase order approved successfully')
+        self.assertEqual(Signature.objects.get().signer, self.supervisor)
+
+    def test_signer_cannot_sign_again_through_a_transition(self):
+        """Test that a purchaser who signed the order gets a 400, not a 500, when processing it"""
+        response = self.post_action('sign', self.purchaser, 'pending', key='default')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.post_action('approve', self.supervisor, 'approved').status_code, status.HTTP_200_OK)
+        self.order.refresh_from_db()
+
+        response = self.post_action('process', self.purchaser, 'processed', key='default')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], 'You have already signed this purchase order.')
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'approved')
+        self.assertEqual(Signature.objects.count(), 2)
+
+    def test_supervisor_sign_conflicts_when_the_order_changed(self):
+        """Test that a supervisor's signature approves through the transition and gets a 409 on a stale order"""
+        def reject_meanwhile(viewset, request, order, target_status):
+            PurchaseOrder.objects.filter(pk=order.pk).update(status='rejected')
+
+        with mock.patch.object(PurchaseOrderViewSet, 'verify_request_signature', autospec=True, side_effect=reject_meanwhile):
+            response = self.post_action('sign', self.supervisor, 'approved')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'rejected')
+        self.assertFalse(Signature.objects.exists())
+
+    def test_supervisor_sign_approves_the_order(self):
+        response = self.post_action('sign', self.supervisor, 'approved')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'approved')
+        self.assertTrue(AuditLog.objects.filter(action='Approved purchase order').exists())
+
+    def test_duplicate_sign_race_returns_bad_request(self):
+        """Test that a signature stored after the duplicate check gets the same 400 as one stored before it"""
+        def sign_meanwhile(viewset, request, order, target_status):
+            Signature.objects.create(purchase_order=order, signer=self.purchaser, signature='sig', hash='hash')
+
+        with mock.patch.object(PurchaseOrderViewSet, 'verify_request_signature', autospec=True, side_effect=sign_meanwhile):
+            response = self.post_action('sign', self.purchaser, 'pending', key='default')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], 'You have already signed this purchase order.')
+        self.assertEqual(Signature.objects.count(), 1)
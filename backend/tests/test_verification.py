@@ -0,0 +1,79 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from purchase_order.audit import audit_sink
+from purchase_order.models import UserProfile, PurchaseOrder, Signature
+from purchase_order.verification import verify_signature
+from tests.signing import public_key, sign
+from utils.crypto import CryptoUtils
+
+
+class SignatureVerificationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.purchaser = User.objects.create_user(username='purchaser', password='test123')
+        UserProfile.objects.create(user=self.purchaser, role='purchaser', public_key=public_key())
+        self.supervisor = User.objects.create_user(username='supervisor', password='test123')
+        UserProfile.objects.create(user=self.supervisor, role='supervisor', public_key=public_key('supervisor'))
+        self.order = PurchaseOrder.objects.create(
+            order_number='PO1',
+            purchaser=self.purchaser,
+            description='Test Description',
+            amount='100.00',
+            vendor='Acme',
+            encrypted_details='{}'
+        )
+        self.addCleanup(audit_sink.flush)
+
+    def approve(self, data):
+        self.client.force_authenticate(user=self.supervisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('purchase-order-approve', args=[self.order.id]), data, format='json')
+
+    def test_valid_signature_is_accepted(self):
+        response = self.approve(sign(self.order, 'approved', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Signature.objects.get().hash, self.order.signing_payload('approved').digest)
+
+    def test_invalid_signatures_are_rejected(self):
+        # Signed by another key
+        response = self.approve(sign(self.order, 'approved'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "Invalid signature")
+
+        # Signed for a different transition
+        response = self.approve(sign(self.order, 'rejected', 'supervisor'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.approve({'signature': 'not base64!', 'hash': self.order.signing_payload('approved').digest})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Signature.objects.exists())
+
+    def test_results_are_cached(self):
+        signed = sign(self.order, 'approved', 'supervisor')
+        signing = self.order.signing_payload('approved')
+        with mock.patch.object(CryptoUtils, 'verify_signature', wraps=CryptoUtils.verify_signature) as verify:
+            self.assertTrue(verify_signature(signed['signature'], public_key('supervisor'), signing))
+            self.assertTrue(verify_signature(signed['signature'], public_key('supervisor'), signing))
+            self.assertFalse(verify_signature(signed['signature'], public_key(), signing))
+            self.assertFalse(verify_signature(signed['signature'], public_key(), signing))
+        self.assertEqual(verify.call_count, 2)
+
+    def test_verify_stored_signatures(self):
+        self.approve(sign(self.order, 'approved', 'supervisor'))
+        self.client.force_authenticate(user=self.purchaser)
+        url = reverse('purchase-order-verify-signatures', args=[self.order.id])
+
+        with mock.patch.object(CryptoUtils, 'verify_signature') as verify:
+            response = self.client.get(url)
+        verify.assert_not_called()
+        self.assertTrue(response.data['valid'])
+        self.assertEqual(response.data['signatures'][0]['signer'], 'supervisor')
+
+        # Editing a signed field invalidates the signature
+        PurchaseOrder.objects.filter(pk=self.order.pk).update(amount='999.00')
+        response = self.client.get(url)
+        self.assertFalse(response.data['valid'])
@@ -17,31 +17,31 @@ def update_public_keys():
     # These are the public keys corresponding to the private keys in keyStorage.js
     demo_public_keys = {
         'purchaser1': """-----BEGIN PUBLIC KEY-----
-MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAqvufnB3qZG/cxRavjJiZ
-3xeQ0EAp21BBrILPzuBBcKrGQUJv6QrPnCn2fSf4lgDBhWaDuRaUGWeqVAY+9VNJ
-dfjsJ6zt0mqyZW9CxG2ChdS71RO1K7CqQ0sLtzHEPCazZvppAie41EZEF0NCpXBz
-vT4mBdcJAifMRPQWFiQOrnEPEEhD9JYyfcyqB4d4CHTJ1C8/lUB9UBMjyn/hnkmR
-ZrdUBMkF9V3mIEfcaSyyT9PNBVnVQ19R1VI0u5/JjYJl5HwoyjYvAFl/ORe4EMpv
-whCz5KUSFDlV8QsY/4isPljh4EXyMx3108bwhpv8ru+kPDSyY9EAIDUQ2oUMZcNW
-QwIDAQAB
+MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAsTl2ToMLBeP6NapfKeBp
+5pnRI1aT7IZzwm4dcdyq7OJ3Nq0p45GNXs+w67U1ILbe2PEovZomAb14AEtu0B35
+RJ+DZOUDNHWVuSK3GF9wqSPo04q8dYOPZ6jq1H6PJf4XrjENUbUd3s3qm2l3AyNF
+9doJCJI0heviu3XyqSTRRGUNT8qXOTtRDlJHzGu2vTknaFR1oglbql6WtitF1ccN
+yTlJyN0M+or0NBsUGW9+chMvG+jyQwXoa4z/0d8LyOFkvyiZKI40ROSb9j53OJ9d
+u4J+ZP96yfX3DLXYcE850IGpF7xoHx0gOFOYNpl7m/6Uz+PfCyKg6nDC9ECWJInT
+9QIDAQAB
 -----END PUBLIC KEY-----""",
         'supervisor1': """-----BEGIN PUBLIC KEY-----
-MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAqwR11mMJlIvW/oViqc+z
-JF8DrAf4ZJbzW8WdVL8EtsDEbmRFRbFI+MZhv278/xu9x1vvpOjf5Nvto6/jWitu
-Xi4A/1YSfYyhjmJv+vuU3xpAY9SxdcQJBxDC+BnvAzDf+xdkqzz345IRGlnWhRt6
-xZi6jW1kTVzyAhGlmYKozCWD7/t159/yokaC1XhZcVBr1MeA5dfLdKyV1LCvhH3e
-Fy+V0VFqrvu+TWZf5+oWZP5V3K9ONRFxDsqLEIgQAYyG0818BOZk97UtHmQ8fsCZ
-0EHRNSi/T2AvJU8PGd91bXdQxPCQWMA7IRybgahfzdWylCR+/mAKGnoEc2LTtNJe
-zQIDAQAB
+MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAmBgR7aVew13r3qWc+6K4
+jOQHvGZUYuE5lTCu4mqp1dUNpWgJM5ObR/Varb9/MvZaaS1gw0ewc1ng9OCyK49G
+DMAe15XKGCx7IFFLbxoPtjZUQQsFWON74f7tTNiWkC8tXdMT7ITrgyBR0u/hJhrO
+y15XTq/NxLbl1ToJQ+cuQw6EmAfNwuxhwIBwGeZA2pMjeQBf7vqjLJ0yshBqV7aT
+amU5svUUGrjfDqV2Ezz059Pt8yvPSgPMdo5lPYix6RGwkEWJSrNUnPLPWTkctFiv
+yfKHi77hW5qNDMoK6FS3nLQ2S0duyWKzfo446PH7pzTx1F5+8PIeeytZgVRMlwqf
+GQIDAQAB
 -----END PUBLIC KEY-----""",
         'purchasing_dept1': """-----BEGIN PUBLIC KEY-----
-MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAuKYKW3xRDVEKh6BeFqcI
-8v9Uf4ABpsfRODLhQqVY98PgVd7RB8TW3kVHzGZtJ2ev5WY0OnB31DMKjEvgVpU6
-kfoN0Wm9Zy4dgPrjdCPI5PhirFfIaRpx8MjJ9nvuwKqW+2tnyVZjJG3BWgGLh2vX
-KuqsefGDy5CV0yioYR7wRwniswHQYdJ/bSfQy96fjqPki2WhsktEUFsCsmKrMi+8
-2Fu5M95hIspYzHGDtmN2+fSS6c29cjmGs8Z5ivQNVb6TMGA+lEP8PNG5Hn6kS7iV
-giaGTkknT8pnMg39f1EOfPvQwAt0xfRzc0GZVbxf+3Kh10GySNsA7isSVa0Spzzr
-RQIDAQAB
+MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAnFwrCN/tSqfT66JsLNDt
+T85T/UATt731sxA2X6DYN9gMhiytYb4Y2Bp3meGwQdDumxEdQnIdDNfuORXSX1su
+o2415rR0q7Oyr0H0PayiPubZ8kLe3byAYa+Ar3uyycM8ZWIEFfea+i0uyJvVhDkm
+k9gWnATASZc0nraJkHcuaPQAGRylHYhR6nY499DUbmBkr2pnyw3pgP5LFQq5HikS
+qNzgGh/UBMqbkoup+UfkiMfcPfSh9XPO8j6HVBkPEfz2WqBH+T7cG8ydBd8QG9vQ
+boQH3lscmu/cRKncW/a+qSye50zrb26EKNIy0oeo4hbfk5axnIHM8qO7BkzCtvtX
+WwIDAQAB
 -----END PUBLIC KEY-----"""
     }
     
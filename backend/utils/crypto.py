@@ -1,17 +1,155 @@
+import asyncio
 import base64
+import contextvars
+import functools
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 
+class PublicKeyCache:
+    """Bounded LRU cache of parsed public keys, keyed by a SHA-256 fingerprint of the PEM"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(public_key_pem):
+        """Return the hex SHA-256 fingerprint of a PEM encoded key"""
+        if isinstance(public_key_pem, str):
+            public_key_pem = public_key_pem.encode('utf-8')
+        return hashlib.sha256(public_key_pem.strip()).hexdigest()
+
+    def get(self, public_key_pem):
+        """Return the parsed key for a PEM, loading and caching it on a miss"""
+        if isinstance(public_key_pem, str):
+            public_key_pem = public_key_pem.encode('utf-8')
+        fingerprint = self.fingerprint(public_key_pem)
+
+        with self._lock:
+            public_key = self._keys.get(fingerprint)
+            if public_key is not None:
+                self._keys.move_to_end(fingerprint)
+                self.hits += 1
+                return public_key
+            self.misses += 1
+
+        # Parse outside the lock so a slow load does not serialize other lookups
+        public_key = serialization.load_pem_public_key(
+            public_key_pem,
+            backend=default_backend()
+        )
+
+        with self._lock:
+            self._keys[fingerprint] = public_key
+            self._keys.move_to_end(fingerprint)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+        return public_key
+
+    def clear(self):
+        """Drop all cached keys and reset the counters"""
+        with self._lock:
+            self._keys.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        """Return the cache counters as a dictionary"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._keys),
+                'maxsize': self.maxsize
+            }
+
+
+class CryptoExecutor:
+    """
+    Bounded thread pool for CPU-bound CryptoUtils calls made from async views.
+
+    At most max_workers calls run at once; further calls queue for a thread
+    while the event loop keeps serving other requests.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crypto')
+            return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on the pool and return its result"""
+        loop = asyncio.get_running_loop()
+        # Like asyncio.to_thread, run func in the caller's context
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Callables called as hook(operation, seconds) after every CryptoUtils
+# operation, e.g. to account crypto time per request
+operation_hooks = []
+
+
+def _observed(func):
+    operation = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not operation_hooks:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            for hook in operation_hooks:
+                hook(operation, seconds)
+    return wrapper
+
+
 class CryptoUtils:
+    public_key_cache = PublicKeyCache()
+
+    @staticmethod
+    def load_public_key(public_key_pem):
+        """Return a parsed public key, reusing previously parsed keys"""
+        return CryptoUtils.public_key_cache.get(public_key_pem)
+
     @staticmethod
-    def generate_key_pair():
+    @_observed
+    def generate_key_pair(key_size=2048):
         """Generate an RSA key pair for a new user"""
         private_key = rsa.generate_private_key(
             public_exponent=65537,
-            key_size=2048,
+            key_size=key_size,
             backend=default_backend()
         )
         
@@ -36,6 +174,7 @@ class CryptoUtils:
         }
     
     @staticmethod
+    @_observed
     def sign_data(data, private_key_pem):
         """Sign data with a private key"""
         if isinstance(data, str):
@@ -59,6 +198,7 @@ class CryptoUtils:
         return base64.b64encode(signature).decode('utf-8')
     
     @staticmethod
+    @_observed
     def verify_signature(data, signature, public_key_pem):
         """Verify a signature using a public key"""
         if isinstance(data, str):
@@ -66,10 +206,7 @@ class CryptoUtils:
             
         signature = base64.b64decode(signature)
         
-        public_key = serialization.load_pem_public_key(
-            public_key_pem.encode('utf-8'),
-            backend=default_backend()
-        )
+        public_key = CryptoUtils.load_public_key(public_key_pem)
         
         try:
             public_key.verify(
@@ -86,15 +223,13 @@ class CryptoUtils:
             return False
     
     @staticmethod
+    @_observed
     def encrypt_with_public_key(data, public_key_pem):
         """Encrypt data with a public key"""
         if isinstance(data, str):
             data = data.encode('utf-8')
             
-        public_key = serialization.load_pem_public_key(
-            public_key_pem.encode('utf-8'),
-            backend=default_backend()
-        )
+        public_key = CryptoUtils.load_public_key(public_key_pem)
         
         ciphertext = public_key.encrypt(
             data,
@@ -108,6 +243,7 @@ class CryptoUtils:
         return base64.b64encode(ciphertext).decode('utf-8')
     
     @staticmethod
+    @_observed
     def decrypt_with_private_key(encrypted_data, private_key_pem):
         """Decrypt data with a private key"""
         encrypted_data = base64.b64decode(encrypted_data)
@@ -130,6 +266,7 @@ class CryptoUtils:
         return plaintext.decode('utf-8')
     
     @staticmethod
+    @_observed
     def symmetric_encrypt(data, key=None):
         """Encrypt data with AES-256-GCM"""
         if isinstance(data, str):
@@ -159,6 +296,7 @@ class CryptoUtils:
         }
     
     @staticmethod
+    @_observed
     def symmetric_decrypt(encrypted_data):
         """Decrypt data with AES-256-GCM"""
         key = base64.b64decode(encrypted_data['key'])
@@ -178,6 +316,7 @@ class CryptoUtils:
         return plaintext.decode('utf-8')
     
     @staticmethod
+    @_observed
     def hash_data(data):
         """Create a SHA-256 hash of data"""
         if isinstance(data, str):
@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, useLocation } from 'react-router-dom';
 import axios from 'axios';
 import { Container, Card, Button, Alert, Spinner } from 'react-bootstrap';
+import { getPrivateKey } from '../utils/keyStorage';
+import { signTransition } from '../utils/signing';
 
 const ApproveRejectPurchaseOrder = () => {
   const { id } = useParams();
@@ -38,17 +40,18 @@ const ApproveRejectPurchaseOrder = () => {
     setSuccess('');
     
     try {
-      // Create a simpler signature for demo purposes
-      const timestamp = new Date().toISOString();
-      const demoSignature = `${timestamp}_${action}_${id}`;
+      const privateKey = getPrivateKey();
+      if (!privateKey) {
+        throw new Error('Private key not found. Please log in again.');
+      }
       
       console.log(`Performing ${action} action on purchase order ${id}`);
       
+      // Sign the order's payload for the status this action moves it to
+      const body = await signTransition(id, isApprove ? 'approved' : 'rejected', privateKey);
+      
       // Send the action request to the backend
-      await axios.post(`http://localhost:8000/api/purchase-orders/${id}/${action}/`, {
-        hash: `hash_of_po_${id}`, 
-        signature: demoSignature
-      });
+      await axios.post(`http://localhost:8000/api/purchase-orders/${id}/${action}/`, body);
       
       setSuccess(`Purchase order successfully ${isApprove ? 'approved' : 'rejected'}!`);
       
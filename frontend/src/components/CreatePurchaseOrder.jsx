@@ -2,8 +2,9 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { Container, Form, Button, Alert, Spinner, Card, Modal } from 'react-bootstrap';
-import { symmetricEncrypt, generateSymmetricKey, hashData, signData } from '../utils/cryptoFunctions';
+import { symmetricEncrypt, generateSymmetricKey } from '../utils/cryptoFunctions';
 import { getPrivateKey } from '../utils/keyStorage';
+import { signTransition } from '../utils/signing';
 
 // Add axios interceptor to include authorization token in all requests
 axios.interceptors.request.use(
@@ -166,38 +167,12 @@ const CreatePurchaseOrder = () => {
       console.log("Private key retrieved, length:", privateKey.length);
       console.log("Key starts with:", privateKey.substring(0, 27) + "...");
 
-      // Calculate hash of the purchase order
-      const orderData = {
-        id: createdOrder.id,
-        order_number: createdOrder.order_number,
-        description: createdOrder.description,
-        amount: createdOrder.amount,
-        vendor: createdOrder.vendor,
-        timestamp: new Date().toISOString()
-      };
-      
-      console.log("Order data prepared:", JSON.stringify(orderData));
-      
-      // Step 1: Hash the data - let's do this carefully with error handling
-      console.log("Calculating hash for purchase order...");
-      let hash;
+      // Step 1: Sign the canonical payload the server verifies the new
+      // order's signature against
+      console.log("Signing purchase order...");
+      let signature, hash;
       try {
-        hash = await hashData(orderData);
-        console.log("Hash created successfully:", hash?.substring(0, 20) + "...");
-      } catch (hashError) {
-        console.error("Error in hash creation:", hashError);
-        throw new Error(`Failed to create hash: ${hashError.message}`);
-      }
-      
-      if (!hash) {
-        throw new Error('Hash function returned empty result');
-      }
-      
-      // Step 2: Sign the hash - with careful error tracking
-      console.log("Signing purchase order hash...");
-      let signature;
-      try {
-        signature = await signData(hash, privateKey);
+        ({ signature, hash } = await signTransition(createdOrder.id, createdOrder.status, privateKey));
         console.log("Signature created successfully, length:", signature?.length);
         console.log("Signature sample:", signature?.substring(0, 20) + "...");
       } catch (signError) {
@@ -205,11 +180,7 @@ const CreatePurchaseOrder = () => {
         throw new Error(`Failed to sign data: ${signError.message}`);
       }
       
-      if (!signature) {
-        throw new Error('Signature function returned empty result');
-      }
-      
-      // Step 3: Send the signature to the server
+      // Step 2: Send the signature to the server
       console.log("Sending signature to server...");
       try {
         const response = await axios.post(`http://localhost:8000/api/purchase-orders/${createdOrder.id}/sign/`, {
@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { Container, Row, Col, Card, Button, Badge, ListGroup, Alert, Spinner } from 'react-bootstrap';
+import { getPrivateKey } from '../utils/keyStorage';
+import { signTransition } from '../utils/signing';
 
 const PurchaseOrderDetail = () => {
   const { id } = useParams();
@@ -41,17 +43,18 @@ const PurchaseOrderDetail = () => {
     setSuccess(null);
     
     try {
-      // Create a simple signature for processing
-      const timestamp = new Date().toISOString();
-      const demoSignature = `${timestamp}_process_${id}`;
+      const privateKey = getPrivateKey();
+      if (!privateKey) {
+        throw new Error('Private key not found. Please log in again.');
+      }
       
       console.log(`Processing purchase order ${id}`);
       
+      // Sign the order's payload for its processed status
+      const body = await signTransition(id, 'processed', privateKey);
+      
       // Send the process request to the backend
-      await axios.post(`http://localhost:8000/api/purchase-orders/${id}/process/`, {
-        hash: `hash_of_po_${id}`,
-        signature: demoSignature
-      });
+      await axios.post(`http://localhost:8000/api/purchase-orders/${id}/process/`, body);
       
       setSuccess('Purchase order successfully processed!');
       
@@ -32,7 +32,7 @@ const PurchaseOrderList = () => {
     try {
       setLoading(true);
       const response = await axios.get('http://localhost:8000/api/purchase-orders/');
-      setPurchaseOrders(response.data);
+      setPurchaseOrders(response.data.results ?? response.data);
       setError('');
     } catch (error) {
       console.error('Error fetching purchase orders:', error);
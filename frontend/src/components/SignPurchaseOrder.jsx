@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { Container, Card, Button, Alert, Spinner } from 'react-bootstrap';
-import { hashData, signData } from '../utils/cryptoFunctions';
+import { signTransition } from '../utils/signing';
 import { getPrivateKey } from '../utils/keyStorage';
 
 const SignPurchaseOrder = () => {
@@ -46,34 +46,16 @@ const SignPurchaseOrder = () => {
 
       console.log(`Starting ${action} process for purchase order ${id}`);
 
-      // Create a hash of the purchase order data
-      const orderData = {
-        id: purchaseOrder.id,
-        order_number: purchaseOrder.order_number,
-        description: purchaseOrder.description,
-        amount: purchaseOrder.amount,
-        vendor: purchaseOrder.vendor,
-        timestamp: new Date().toISOString()
-      };
-      
-      console.log("Order data prepared for signing:", orderData);
-      
-      // Hash the data
-      console.log("Hashing order data...");
-      let hash;
-      try {
-        hash = await hashData(orderData);
-        console.log("Hash created successfully:", hash);
-      } catch (hashError) {
-        console.error("Error creating hash:", hashError);
-        throw new Error(`Failed to create hash: ${hashError.message}`);
-      }
-      
-      // Sign the hash
-      console.log("Signing hash...");
-      let signature;
+      // A supervisor's signature approves the order; anyone else signs it
+      // in its current status
+      const userProfile = JSON.parse(localStorage.getItem('userProfile') || '{}');
+      const targetStatus = userProfile.role === 'supervisor' ? 'approved' : purchaseOrder.status;
+
+      // Sign the canonical payload the server verifies against
+      console.log("Signing purchase order...");
+      let signature, hash;
       try {
-        signature = await signData(hash, privateKey);
+        ({ signature, hash } = await signTransition(id, targetStatus, privateKey));
         console.log("Signature created:", signature?.substring(0, 50) + "...");
       } catch (signError) {
         console.error("Error creating signature:", signError);
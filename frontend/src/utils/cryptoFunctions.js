@@ -114,34 +114,38 @@ export const hashData = async (data) => {
   }
 };
 
-// Create a simplified "signature" using a combination of the hash and a timestamp
-// This is not cryptographically secure but will work for demo purposes
-export const signData = async (hash, privateKey) => {
+// RSA-PSS salt length the server uses (PSS.MAX_LENGTH): the longest salt
+// the key's modulus leaves room for next to a SHA-256 digest
+const pssSaltLength = (key) => Math.ceil((key.algorithm.modulusLength - 1) / 8) - 32 - 2;
+
+// Sign data (a string, e.g. a purchase order's signing payload) with a PEM
+// encoded PKCS#8 private key using RSA-PSS with SHA-256
+export const signData = async (data, privateKeyPem) => {
   try {
-    console.log("Using simplified signing method for demo purposes");
-    
-    // Extract username from the private key (just for logging)
-    let userIdentifier = "unknown-user";
-    if (privateKey.includes("purchaser")) {
-      userIdentifier = "purchaser";
-    } else if (privateKey.includes("supervisor")) {
-      userIdentifier = "supervisor";
-    }
-    
-    // Create a unique signature based on the hash, timestamp, and a prefix from the key
-    const timestamp = new Date().getTime();
-    const keyFragment = privateKey.substring(100, 110); // Just grab some characters from the key
-    
-    // Instead of cryptographic signing, we'll create a demo signature by combining elements
-    const combinedString = `${userIdentifier}:${timestamp}:${hash}:${keyFragment}`;
-    const signatureBuffer = await window.crypto.subtle.digest('SHA-256', stringToArrayBuffer(combinedString));
-    const signatureBase64 = arrayBufferToBase64(signatureBuffer);
+    const privateKey = await window.crypto.subtle.importKey(
+      "pkcs8",
+      base64ToArrayBuffer(privateKeyPem),
+      {
+        name: "RSA-PSS",
+        hash: "SHA-256",
+      },
+      false,
+      ["sign"]
+    );
+  
+    const signature = await window.crypto.subtle.sign(
+      {
+        name: "RSA-PSS",
+        saltLength: pssSaltLength(privateKey),
+      },
+      privateKey,
+      stringToArrayBuffer(data)
+    );
     
-    console.log(`Created demo signature for ${userIdentifier}: ${signatureBase64.substring(0, 20)}...`);
-    return signatureBase64;
+    return arrayBufferToBase64(signature);
   } catch (error) {
-    console.error('Error creating demo signature:', error);
-    throw new Error(`Simplified signing error: ${error.message}`);
+    console.error('Error signing data:', error);
+    throw new Error(`Signing error: ${error.message}`);
   }
 };
   
@@ -167,7 +171,7 @@ export const verifySignature = async (data, signature, publicKeyBase64) => {
     const isValid = await window.crypto.subtle.verify(
       {
         name: "RSA-PSS",
-        saltLength: 32,
+        saltLength: pssSaltLength(publicKey),
       },
       publicKey,
       base64ToArrayBuffer(signature),
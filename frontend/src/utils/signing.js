@@ -0,0 +1,19 @@
+/**
+ * Signing purchase order workflow actions
+ */
+import axios from 'axios';
+import { signData } from './cryptoFunctions';
+
+// Sign moving purchase order orderId to targetStatus: fetch the canonical
+// payload the server verifies against and sign exactly those bytes.
+// Returns the { signature, hash } body the sign, approve, reject and
+// process endpoints expect.
+export const signTransition = async (orderId, targetStatus, privateKey) => {
+  const response = await axios.get(
+    `http://localhost:8000/api/purchase-orders/${orderId}/signing-payload/`,
+    { params: { status: targetStatus } }
+  );
+  const { payload, digest } = response.data;
+  const signature = await signData(payload, privateKey);
+  return { signature, hash: digest };
+};